@@ -10,10 +10,12 @@ from discord.ext import commands
 from collections import defaultdict
 from unidecode import unidecode
 
+from utilities import bulk
 from utilities import utils
 from utilities import views
 from utilities import checks
 from utilities import helpers
+from utilities import history
 from utilities import converters
 from utilities import decorators
 
@@ -30,6 +32,8 @@ class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.mass = defaultdict(str)
+        self.jobs = {}  # server_id: running BulkAction
+        self.paused = {}  # server_id: cancelled BulkAction
 
     def start_working(self, guild, action):
         """
@@ -47,6 +51,90 @@ class Admin(commands.Cog):
     def stop_working(self, guild):
         self.mass.pop(guild.id)
 
+    async def run_job(self, ctx, job, message):
+        """
+        Runs a bulk action with progress edits, then reports
+        its results. Cancelled actions are kept so they
+        can be picked up again with massresume.
+        """
+        self.start_working(ctx.guild, str(job.ctx.command))
+        self.jobs[ctx.guild.id] = job
+        self.paused.pop(ctx.guild.id, None)
+        succeeded = len(job.succeeded)
+        failed = len(job.failed)
+        try:
+            await job.run(message)
+        finally:
+            self.jobs.pop(ctx.guild.id, None)
+            self.stop_working(ctx.guild)
+
+        if job.pending:
+            self.paused[ctx.guild.id] = job
+            content = (
+                f"{self.bot.emote_dict['warn']} {job.summary()} Cancelled with "
+                f"{len(job.pending):,} {job.noun}{bulk.plural(len(job.pending))} "
+                f"remaining. Use `{ctx.clean_prefix}massresume` to continue."
+            )
+        else:
+            content = f"{self.bot.emote_dict['success']} {job.summary()}"
+        try:
+            await message.edit(content=content)
+        except discord.HTTPException:
+            await ctx.send_or_reply(content)
+
+        if job.succeeded[succeeded:]:
+            self.bot.dispatch("mod_action", job.ctx, targets=job.succeeded[succeeded:])
+        if job.failed[failed:]:
+            await helpers.error_info(job.ctx, job.failed[failed:])
+
+    @decorators.command(
+        aliases=["massstop"],
+        brief="Cancel a mass command in progress.",
+    )
+    @checks.guild_only()
+    @checks.has_perms(manage_guild=True)
+    @checks.cooldown()
+    async def masscancel(self, ctx):
+        """
+        Usage: {0}masscancel
+        Alias: {0}massstop
+        Permission: Manage Server
+        Output:
+            Stops the mass command running in the server.
+        Notes:
+            Users already being handled will finish.
+            The rest are kept, use {0}massresume
+            to pick up where the command left off.
+        """
+        job = self.jobs.get(ctx.guild.id)
+        if job is None:
+            return await ctx.fail("No mass command is in progress.")
+        job.cancel()
+        await ctx.success(f"Cancelling `{job.ctx.command}`...")
+
+    @decorators.command(brief="Resume a cancelled mass command.")
+    @checks.guild_only()
+    @checks.has_perms(manage_guild=True)
+    @checks.cooldown(2, 30, bucket=commands.BucketType.guild)
+    async def massresume(self, ctx):
+        """
+        Usage: {0}massresume
+        Permission: Manage Server
+        Output:
+            Continues the last cancelled mass
+            command from where it stopped.
+        """
+        job = self.paused.get(ctx.guild.id)
+        if job is None:
+            return await ctx.fail("No cancelled mass command to resume.")
+        if job.ctx.author.id != ctx.author.id and not checks.is_admin(ctx):
+            return await ctx.fail(f"Only {job.ctx.author} can resume this command.")
+        message = await ctx.load(
+            f"Resuming `{job.ctx.command}` for {len(job.pending):,} "
+            f"{job.noun}{bulk.plural(len(job.pending))}..."
+        )
+        await self.run_job(ctx, job, message)
+
     @decorators.command(brief="Setup server muting system.", aliases=["setmuterole"])
     @checks.guild_only()
     @checks.bot_has_perms(manage_roles=True)
@@ -212,35 +300,27 @@ class Admin(commands.Cog):
                 f"Dehoisting {len(hoisted)} user{'' if len(hoisted) == 1 else 's'}..."
             )
 
-            self.start_working(ctx.guild, "massdehoist")
+            reason = utils.responsible(
+                ctx.author, "Nickname edited by dehoist command."
+            )
 
-            edited = []
-            failed = []
-            for user in hoisted:
+            async def dehoist(user):
                 name = copy.copy(user.display_name)
                 while name.startswith(tuple(characters)):
                     name = name[1:]
                 if name.strip() == "":
                     name = "Dehoisted"
-                try:
-                    await user.edit(
-                        nick=name,
-                        reason=utils.responsible(
-                            ctx.author, "Nickname edited by dehoist command."
-                        ),
-                    )
-                    edited.append(str(user))
-                except Exception:
-                    failed.append(str(user))
-
-            self.stop_working(ctx.guild)
-
-            msg = ""
-            if edited:
-                msg += f"{self.bot.emote_dict['success']} Dehoisted {len(edited)} user{'' if len(edited) == 1 else 's'}."
-            if failed:
-                msg += f"\n{self.bot.emote_dict['failed']} Failed to dehoist {len(failed)} user{'' if len(failed) == 1 else 's'}."
-            await message.edit(content=msg)
+                await user.edit(nick=name, reason=reason)
+
+            job = bulk.BulkAction(
+                ctx,
+                hoisted,
+                dehoist,
+                verb="Dehoisted",
+                gerund="Dehoisting",
+                check=None,  # Nickname commands never checked the hierarchy
+            )
+            await self.run_job(ctx, job, message)
 
     @decorators.command(brief="Mass nickname users with odd names.")
     @checks.guild_only()
@@ -284,28 +364,21 @@ class Admin(commands.Cog):
                 f"Ascifying {len(odd_names)} user{'' if len(odd_names) == 1 else 's'}..."
             )
 
-            self.start_working(ctx.guild, "massascify")
-
-            edited = 0
-            failed = 0
-            for user in odd_names:
-                try:
-                    ascified = unidecode(user.display_name)
-                    await user.edit(
-                        nick=ascified, reason="Nickname changed by massascify command."
-                    )
-                    edited += 1
-                except Exception:
-                    failed += 1
-
-            self.stop_working(ctx.guild)
+            async def ascify(user):
+                await user.edit(
+                    nick=unidecode(user.display_name),
+                    reason="Nickname changed by massascify command.",
+                )
 
-            msg = ""
-            if edited:
-                msg += f"{self.bot.emote_dict['success']} Ascified {edited} user{'' if edited == 1 else 's'}."
-            if failed:
-                msg += f"\n{self.bot.emote_dict['failed']} Failed to ascify {failed} user{'' if failed == 1 else 's'}."
-            await message.edit(content=msg)
+            job = bulk.BulkAction(
+                ctx,
+                odd_names,
+                ascify,
+                verb="Ascified",
+                gerund="Ascifying",
+                check=None,
+            )
+            await self.run_job(ctx, job, message)
 
     @decorators.command(brief="Reset all server nicknames.", aliases=["massrenickname"])
     @checks.guild_only()
@@ -341,27 +414,20 @@ class Admin(commands.Cog):
                 f"Re-nicknaming {len(renick)} user{'' if len(renick) == 1 else 's'}..."
             )
 
-            self.start_working(ctx.guild, "massrenick")
-
-            edited = 0
-            failed = 0
-            for user in renick:
-                try:
-                    await user.edit(
-                        nick=None, reason="Nickname changed by massrenick command."
-                    )
-                    edited += 1
-                except Exception:
-                    failed += 1
-
-            self.stop_working(ctx.guild)
+            async def reset_nick(user):
+                await user.edit(
+                    nick=None, reason="Nickname changed by massrenick command."
+                )
 
-            msg = ""
-            if edited > 0:
-                msg += f"{self.bot.emote_dict['success']} Re-nicknamed {edited} user{'' if edited == 1 else 's'}."
-            if failed > 0:
-                msg += f"\n{self.bot.emote_dict['failed']} Failed to re-nickname {failed} user{'' if failed == 1 else 's'}."
-            await message.edit(content=msg)
+            job = bulk.BulkAction(
+                ctx,
+                renick,
+                reset_nick,
+                verb="Re-nicknamed",
+                gerund="Re-nicknaming",
+                check=None,
+            )
+            await self.run_job(ctx, job, message)
 
     @decorators.command(
         aliases=["multiban"],
@@ -495,11 +561,14 @@ class Admin(commands.Cog):
             if args.files:
                 predicates.append(args.files)
 
-            async for message in channel.history(
-                limit=min(max(1, args.search), 2000), before=before, after=after
+            async for message in history.scan(
+                channel,
+                limit=min(max(1, args.search), 2000),
+                before=before,
+                after=after,
+                check=lambda m: all(p(m) for p in predicates),
             ):
-                if all(p(message) for p in predicates):
-                    members.append(message.author)
+                members.append(message.author)
         else:
             if ctx.guild.chunked:
                 members = ctx.guild.members
@@ -613,31 +682,23 @@ class Admin(commands.Cog):
         if not confirm:
             return
 
-        self.start_working(ctx.guild, "massban")
-
-        banned = []
-        failed = []
-        for member in members:
-            res = await checks.check_priv(ctx, member)
-            if res:
-                failed.append((str(member), res))
-                continue
-            try:
-                await ctx.guild.ban(member, reason=reason)
-                banned.append((str(member), raw_reason))
-            except Exception as e:
-                failed.append((str(member), e))
-                continue
-
-        self.stop_working(ctx.guild)
-
-        if banned:
-            await ctx.success(
-                f"Mass banned {len(banned)}/{len(members)} user{'' if len(members) == 1 else 's'}."
+        async def ban(batch):
+            return await bulk.bulk_ban(
+                ctx.guild, batch, reason=reason, delete_message_days=1
             )
-            self.bot.dispatch("mod_action", ctx, targets=banned)
-        if failed:
-            await helpers.error_info(ctx, failed)
+
+        job = bulk.BulkAction(
+            ctx,
+            list(members),
+            ban,
+            verb="Mass banned",
+            gerund="Banning",
+            record=lambda member: (str(member), raw_reason),
+            batch_size=bulk.BAN_BATCH,
+            workers=1,
+        )
+        message = await ctx.load(job.progress())
+        await self.run_job(ctx, job, message)
 
     @decorators.command(
         aliases=["multikick"],
@@ -771,11 +832,14 @@ class Admin(commands.Cog):
             if args.files:
                 predicates.append(args.files)
 
-            async for message in channel.history(
-                limit=min(max(1, args.search), 2000), before=before, after=after
+            async for message in history.scan(
+                channel,
+                limit=min(max(1, args.search), 2000),
+                before=before,
+                after=after,
+                check=lambda m: all(p(m) for p in predicates),
             ):
-                if all(p(message) for p in predicates):
-                    members.append(message.author)
+                members.append(message.author)
         else:
             if ctx.guild.chunked:
                 members = ctx.guild.members
@@ -889,31 +953,19 @@ class Admin(commands.Cog):
         if not confirm:
             return
 
-        self.start_working(ctx.guild, "masskick")
-
-        kicked = []
-        failed = []
-        for member in members:
-            res = await checks.check_priv(ctx, member)
-            if res:
-                failed.append((str(member), res))
-                continue
-            try:
-                await ctx.guild.kick(member, reason=reason)
-                kicked.append((str(member), raw_reason))
-            except Exception as e:
-                failed.append((str(member), e))
-                continue
-
-        self.stop_working(ctx.guild)
+        async def kick(member):
+            await ctx.guild.kick(member, reason=reason)
 
-        if kicked:
-            await ctx.success(
-                f"Mass kicked {len(kicked)}/{len(members)} user{'' if len(members) == 1 else 's'}."
-            )
-            self.bot.dispatch("mod_action", ctx, targets=kicked)
-        if failed:
-            await helpers.error_info(ctx, failed)
+        job = bulk.BulkAction(
+            ctx,
+            list(members),
+            kick,
+            verb="Mass kicked",
+            gerund="Kicking",
+            record=lambda member: (str(member), raw_reason),
+        )
+        message = await ctx.load(job.progress())
+        await self.run_job(ctx, job, message)
 
     async def get_warncount(self, guild):
         query = """
@@ -1114,50 +1166,32 @@ class Admin(commands.Cog):
             await self.do_massrole(ctx, "remove", targets, role, "bot")
 
     async def do_massrole(self, ctx, add_or_remove, targets, role, obj):
-
-        self.start_working(ctx.guild, "massrole")
-
-        if add_or_remove.lower() == "add":
-            add = True
-        else:
-            add = False
         res = await checks.role_priv(ctx, role)
         if res:
             return await ctx.fail(res)
 
-        success = []
-        failed = []
-
-        warning = "This process may take several minutes. Please be patient."
+        add = add_or_remove.lower() == "add"
         ternary = "Add" if add else "Remov"
         to_from = "to" if add else "from"
-        plural = lambda l: "" if len(l) == 1 else "s"
-        em = self.bot.emote_dict["loading"]
-        msg = await ctx.send_or_reply(
-            f"{em} {ternary}ing role `{role.name}` {to_from} {len(targets)} {obj}{plural(targets)}. {warning}"
-        )
-
-        for target in targets:
-            try:
-                reason = f"Role {ternary.lower()}ed by command."
-                if add:
-                    await target.add_roles(role, reason=reason)
-                else:
-                    await target.remove_roles(role, reason=reason)
-                success.append(str(target))
-            except Exception as e:
-                failed.append((str(target), e))
+        reason = f"Role {ternary.lower()}ed by command."
 
-        self.stop_working(ctx.guild)
-
-        if success or not failed:
-            em = self.bot.emote_dict["success"]
-            await msg.edit(
-                content=f"{em} {ternary}ed role `{role.name}` {to_from} {len(success)} {obj}{plural(success)}."
-            )
-            self.bot.dispatch("mod_action", ctx, targets=success)
-        if failed:
-            await helpers.error_info(ctx, failed)
+        async def edit_role(target):
+            if add:
+                await target.add_roles(role, reason=reason)
+            else:
+                await target.remove_roles(role, reason=reason)
+
+        job = bulk.BulkAction(
+            ctx,
+            targets,
+            edit_role,
+            verb=f"{ternary}ed role `{role.name}` {to_from}",
+            gerund=f"{ternary}ing role `{role.name}` {to_from}",
+            noun=obj,
+            check=None,  # The role's position was checked above
+        )
+        message = await ctx.send_or_reply(job.progress())
+        await self.run_job(ctx, job, message)
 
     @decorators.group(
         name="prefix",
@@ -1,15 +1,20 @@
 import json
+import time
 import discord
 
-from better_profanity import profanity
-from discord.ext import commands, menus
+from datetime import timedelta
+from collections import Counter, defaultdict
+from discord.ext import commands, menus, tasks
 
+from utilities import cache
 from utilities import utils
 from utilities import checks
 from utilities import helpers
 from utilities import converters
 from utilities import decorators
 from utilities import pagination
+from utilities import raid
+from utilities import wordfilter
 
 
 def setup(bot):
@@ -23,6 +28,19 @@ class Automod(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.filters = wordfilter.FilterCache()  # Compiled word filters
+        self.invites = cache.InviteCache(bot)  # Invite code to server ID
+        self.raids = raid.RaidEngine()  # Sliding window raid detection
+        self.pending_deletes = defaultdict(set)  # channel_id: {message_ids}
+        self.bulk_deleter.start()
+        self.raid_pruner.start()
+
+    def cog_unload(self):
+        self.bulk_deleter.stop()
+        self.raid_pruner.stop()
+
+    def cache_stats(self):
+        return {"Invite Cache": self.invites.stats()}
 
     ###################
     ## Warn Commands ##
@@ -348,6 +366,59 @@ class Automod(commands.Cog):
             await self.bot.cxn.execute(query, removeinvitelinks, ctx.guild.id)
         await ctx.send_or_reply(msg)
 
+    @decorators.command(
+        brief="Enable or disable raid detection.",
+        aliases=["raidmode", "antiraids"],
+    )
+    @checks.guild_only()
+    @checks.bot_has_perms(manage_messages=True, manage_roles=True)
+    @checks.has_perms(manage_guild=True)
+    @checks.cooldown()
+    async def antiraid(self, ctx, *, yes_no=None):
+        """
+        Usage:      {0}antiraid <yes|enable|true|on||no|disable|false|off>
+        Aliases:    {0}raidmode, {0}antiraids
+        Permission: Manage Server
+        Output:     Detects raids and cleans up after raiders.
+        Notes:
+            When too many users join at once, or several
+            new users repeat the same message, the server
+            enters raid mode. Raider messages are bulk
+            deleted and the busiest channel is locked
+            until raid mode ends. A single user spamming
+            or mass mentioning only has their messages
+            deleted. Users with the Manage Messages
+            permission are immune.
+        """
+        current = self.bot.server_settings[ctx.guild.id].get("antiraid") is True
+        if yes_no is None:
+            # Output current setting
+            msg = "{} currently *{}*.".format(
+                "Raid detection", "enabled" if current else "disabled"
+            )
+        elif yes_no.lower() in ["yes", "on", "true", "enabled", "enable"]:
+            yes_no = True
+            msg = "{} {} *enabled*.".format(
+                "Raid detection", "remains" if current else "is now"
+            )
+        elif yes_no.lower() in ["no", "off", "false", "disabled", "disable"]:
+            yes_no = False
+            msg = "{} {} *disabled*.".format(
+                "Raid detection", "is now" if current else "remains"
+            )
+        else:
+            msg = "That is not a valid setting."
+            yes_no = current
+        if yes_no != current and yes_no is not None:
+            self.bot.server_settings[ctx.guild.id]["antiraid"] = yes_no
+            query = """
+                    UPDATE servers
+                    SET antiraid = $1
+                    WHERE server_id = $2
+                    """
+            await self.bot.cxn.execute(query, yes_no, ctx.guild.id)
+        await ctx.send_or_reply(msg)
+
     @decorators.group(
         aliases=["autoroles", "autoassign"],
         brief="Assign roles to new members.",
@@ -605,6 +676,7 @@ class Automod(commands.Cog):
 
         query = """UPDATE servers SET profanities = $1 WHERE server_id = $2;"""
         await self.bot.cxn.execute(query, current_filter, ctx.guild.id)
+        self.filters.invalidate(ctx.guild.id)
 
         if added:
             await ctx.success(
@@ -660,6 +732,7 @@ class Automod(commands.Cog):
                 WHERE server_id = $2;
                 """
         await self.bot.cxn.execute(query, word_list, ctx.guild.id)
+        self.filters.invalidate(ctx.guild.id)
 
         if removed:
             await ctx.success(
@@ -722,6 +795,7 @@ class Automod(commands.Cog):
                 """
         await self.bot.cxn.execute(query, ctx.guild.id)
         self.bot.server_settings[ctx.guild.id]["profanities"].clear()
+        self.filters.invalidate(ctx.guild.id)
 
         await ctx.success("Removed all filtered words.")
 
@@ -745,12 +819,90 @@ class Automod(commands.Cog):
             await self.bot.cxn.execute(
                 query, self.bot.constants.profanities, ctx.guild.id
             )
+            self.filters.invalidate(ctx.guild.id)
             await ctx.success("Now using the default word filter.")
 
+    #################
+    ## Raid Engine ##
+    #################
+
+    def is_raiding(self, guild):
+        return self.raids.in_raid(guild.id, time.time())
+
+    async def handle_raid(self, guild, trigger):
+        """
+        Queues a trigger's messages for bulk deletion and
+        locks the busiest channel when a raid first trips.
+        """
+        for channel_id, message_id in trigger.messages:
+            self.pending_deletes[channel_id].add(message_id)
+
+        if not trigger.raid:
+            return  # One user flooding, or raid mode is already on.
+
+        mod = self.bot.get_cog("Mod")
+        channels = Counter(channel_id for channel_id, _ in trigger.messages)
+        if not mod or not self.bot.get_cog("Tasks") or not channels:
+            return  # Locking needs both cogs for the unlock timer
+        channel = guild.get_channel(channels.most_common(1)[0][0])
+        if not channel:
+            return
+        if channel.overwrites_for(guild.default_role).send_messages is False:
+            return  # Already locked
+
+        duration = self.raids.thresholds.raid_duration
+        now = discord.utils.utcnow().replace(tzinfo=None)
+        try:
+            await mod.lock_channel(
+                channel,
+                guild.me,
+                endtime=now + timedelta(seconds=duration),
+                created=now,
+                reason=f"Raid detected ({trigger.kind}).",
+            )
+            await channel.send(
+                f"{self.bot.emote_dict['lock']} Raid detected. "
+                f"This channel is locked for {duration // 60} minutes."
+            )
+        except discord.HTTPException:
+            pass
+
+    @tasks.loop(minutes=1.0)
+    async def raid_pruner(self):
+        self.raids.prune(time.time())
+
+    @tasks.loop(seconds=1.0)
+    async def bulk_deleter(self):
+        for channel_id in list(self.pending_deletes):
+            message_ids = sorted(self.pending_deletes.pop(channel_id))
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                continue
+            for i in range(0, len(message_ids), 100):
+                chunk = [discord.Object(id=x) for x in message_ids[i : i + 100]]
+                try:
+                    await channel.delete_messages(chunk)
+                except discord.HTTPException:
+                    continue
+
+    @bulk_deleter.error
+    async def bulk_deleter_error(self, exc):
+        self.bot.dispatch("error", "automod_error", tb=utils.traceback_maker(exc))
+
     #####################
     ## Event Listeners ##
     #####################
 
+    @commands.Cog.listener("on_member_join")
+    @decorators.wait_until_ready()
+    @decorators.event_check(lambda s, m: not m.bot)
+    async def raid_join(self, member):
+        if not self.bot.server_settings[member.guild.id].get("antiraid"):
+            return
+        trigger = self.raids.on_join(member.guild.id, member.id, time.time())
+        if trigger:
+            await self.handle_raid(member.guild, trigger)
+
     @commands.Cog.listener()
     @decorators.wait_until_ready()
     @decorators.event_check(lambda s, m: not m.bot)
@@ -820,17 +972,37 @@ class Automod(commands.Cog):
         if message.author.guild_permissions.manage_messages:
             return  # We are immune!
 
+        if self.bot.server_settings[message.guild.id].get("antiraid"):
+            now = time.time()
+            joined_at = message.author.joined_at
+            trigger = self.raids.on_message(
+                message.guild.id,
+                message.channel.id,
+                message.author.id,
+                message.id,
+                message.content,
+                len(message.raw_mentions) + len(message.raw_role_mentions),
+                now,
+                newcomer=self.raids.is_newcomer(
+                    message.author.created_at.timestamp(),
+                    joined_at.timestamp() if joined_at else None,
+                    now,
+                ),
+            )
+            if trigger:
+                return await self.handle_raid(message.guild, trigger)
+
         removeinvitelinks = self.bot.server_settings[message.guild.id]["antiinvite"]
         if removeinvitelinks:  # Do we care?
             match = self.bot.dregex.search(message.content)
             if match:  # Message containg an invite
                 try:
-                    invite = await self.bot.fetch_invite(
-                        match.group(0), with_counts=False, with_expiration=False
-                    )
-                except discord.NotFound:
-                    pass
+                    guild_id = await self.invites.resolve(match.group(0), message.guild)
                 except discord.HTTPException:
+                    remove = True
+                else:  # We allow invites for the current server.
+                    remove = guild_id is not None and guild_id != message.guild.id
+                if remove:
                     try:
                         await message.delete()
                         await message.channel.send(
@@ -839,23 +1011,14 @@ class Automod(commands.Cog):
                         )
                     except Exception:  # We tried...
                         pass
-                else:
-                    if (
-                        invite.guild.id != message.guild.id
-                    ):  # We allow invites for the current server.
-                        try:
-                            await message.delete()
-                            await message.channel.send(
-                                f"{self.bot.emote_dict['failed']} No invite links allowed",
-                                delete_after=7,
-                            )
-                        except Exception:  # We tried...
-                            pass
 
         bad_words = self.bot.server_settings[message.guild.id]["profanities"]
         if bad_words:
-            profanity.load_censor_words(bad_words)
-            if profanity.contains_profanity(message.content):
+            matcher = self.filters.get(message.guild.id, bad_words)
+            if matcher.contains_profanity(message.content):
+                if self.is_raiding(message.guild):  # No DMs during a raid.
+                    self.pending_deletes[message.channel.id].add(message.id)
+                    return
                 try:
                     await message.delete()
                 except Exception:  # We tried...
@@ -887,8 +1050,8 @@ class Automod(commands.Cog):
 
         bad_words = self.bot.server_settings[after.guild.id]["profanities"]
         if bad_words:
-            profanity.load_censor_words(bad_words)
-            if profanity.contains_profanity(after.content):
+            matcher = self.filters.get(after.guild.id, bad_words)
+            if matcher.contains_profanity(after.content):
                 try:
                     await after.delete()
                 except Exception:  # We tried...
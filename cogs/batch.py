@@ -30,8 +30,10 @@ class Batch(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-        self.whitelist = []  # Users that opted out
+        self.whitelist = set()  # Users that opted out
         bot.loop.create_task(self.load_whitelist())
+        # Reload when another process writes to the whitelist.
+        bot.invalidator.subscribe("whitelist", self.reload_whitelist)
 
         # Removed for now at least
         # self.activity_batch = defaultdict(dict)
@@ -58,6 +60,7 @@ class Batch(commands.Cog):
         self.status_inserter.start()
 
     def cog_unload(self):
+        self.bot.invalidator.unsubscribe("whitelist", self.reload_whitelist)
         self.bulk_inserter.stop()
         self.message_inserter.stop()
         self.status_inserter.stop()
@@ -65,17 +68,26 @@ class Batch(commands.Cog):
 
     async def load_whitelist(self):
         query = "SELECT ARRAY(SELECT user_id FROM whitelist);"
-        self.whitelist = await self.bot.cxn.fetchval(query)
+        self.whitelist = set(await self.bot.cxn.fetchval(query))
+
+    async def reload_whitelist(self, user_id):
+        if user_id is None:
+            return await self.load_whitelist()
+        query = "SELECT EXISTS(SELECT 1 FROM whitelist WHERE user_id = $1);"
+        if await self.bot.cxn.fetchval(query, user_id):
+            self.whitelist.add(user_id)
+        else:
+            self.whitelist.discard(user_id)
 
     async def opt_in(self, user_id):
-        self.whitelist.remove(user_id)
+        self.whitelist.discard(user_id)
         query = "DELETE FROM whitelist WHERE user_id = $1"
         await self.bot.cxn.execute(query, user_id)
 
     async def opt_out(self, user_id):
         query = "INSERT INTO whitelist VALUES ($1);"
         await self.bot.cxn.execute(query, user_id)
-        self.whitelist.append(user_id)
+        self.whitelist.add(user_id)
         await self.delete_all(user_id)
 
     async def delete_all(self, user_id):
@@ -40,12 +40,30 @@ class Botadmin(commands.Cog):
 
         self.torment = False
 
+        bot.ipc.register("servers", self.get_local_servers)
+
+    def cog_unload(self):
+        self.bot.ipc.unregister("servers")
+
     # This is a bot admin only cog
     async def cog_check(self, ctx):
         if checks.is_admin(ctx):
             return True
         return
 
+    async def get_local_servers(self):
+        return [(g.name, g.id, len(g.members)) for g in self.bot.guilds]
+
+    async def get_all_servers(self):
+        """
+        Returns (name, id, member count) for
+        the servers on every cluster.
+        """
+        servers = []
+        for result in await self.bot.ipc.broadcast("servers"):
+            servers.extend(result or ())
+        return servers
+
     async def github_request(
         self, method, url, *, params=None, data=None, headers=None
     ):
@@ -364,16 +382,16 @@ class Botadmin(commands.Cog):
         Output: Lists the servers I'm connected to.
         """
         our_list = []
-        for guild in self.bot.guilds:
+        for name, guild_id, member_count in await self.get_all_servers():
             our_list.append(
                 {
-                    "name": guild.name,
+                    "name": name,
                     "value": "{:,} member{}\nID: `{}`".format(
-                        len(guild.members),
-                        "" if len(guild.members) == 1 else "s",
-                        guild.id,
+                        member_count,
+                        "" if member_count == 1 else "s",
+                        guild_id,
                     ),
-                    "users": len(guild.members),
+                    "users": member_count,
                 }
             )
         p = pagination.MainMenu(
@@ -383,7 +401,7 @@ class Botadmin(commands.Cog):
                     for y, x in enumerate(our_list)
                 ],
                 title="Server's I'm Connected To ({:,} total)".format(
-                    len(self.bot.guilds)
+                    len(our_list)
                 ),
                 per_page=15,
             )
@@ -401,14 +419,14 @@ class Botadmin(commands.Cog):
         Output: The servers with the most memebers
         """
         our_list = []
-        for guild in self.bot.guilds:
+        for name, guild_id, member_count in await self.get_all_servers():
             our_list.append(
                 {
-                    "name": guild.name,
+                    "name": name,
                     "value": "{:,} member{}".format(
-                        len(guild.members), "" if len(guild.members) == 1 else "s"
+                        member_count, "" if member_count == 1 else "s"
                     ),
-                    "users": len(guild.members),
+                    "users": member_count,
                 }
             )
         our_list = sorted(our_list, key=lambda x: x["users"], reverse=True)
@@ -419,7 +437,7 @@ class Botadmin(commands.Cog):
                     for y, x in enumerate(our_list)
                 ],
                 title="Top Servers By Population ({} total)".format(
-                    len(self.bot.guilds)
+                    len(our_list)
                 ),
                 per_page=15,
             )
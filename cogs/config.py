@@ -4,7 +4,6 @@ import asyncpg
 import discord
 import itertools
 
-from collections import defaultdict
 from discord.ext import commands
 
 from utilities import checks
@@ -12,6 +11,7 @@ from utilities import helpers
 from utilities import converters
 from utilities import formatting
 from utilities import decorators
+from utilities import permissions
 
 
 def setup(bot):
@@ -29,8 +29,15 @@ class Config(commands.Cog):
         bot.loop.create_task(self.load_command_config())
 
         self.bot = bot
-        self.ignored = defaultdict(list)  # List of ignored entities
-        self.command_config = defaultdict(list)  # list of ignored commands
+        self.resolver = permissions.PermissionResolver()  # Ignores and disables
+
+        # Reload when another process writes to these tables.
+        bot.invalidator.subscribe("plonks", self.reload_plonks)
+        bot.invalidator.subscribe("command_config", self.reload_command_config)
+
+    def cog_unload(self):
+        self.bot.invalidator.unsubscribe("plonks", self.reload_plonks)
+        self.bot.invalidator.unsubscribe("command_config", self.reload_command_config)
 
     async def load_command_config(self):
         query = """
@@ -38,11 +45,18 @@ class Config(commands.Cog):
                 FROM command_config GROUP BY entity_id;
                 """
         records = await self.bot.cxn.fetch(query)
-        if records:
-            [
-                self.command_config[record["entity_id"]].extend(record["commands"])
-                for record in records
-            ]
+        self.resolver.load_disabled(records)
+
+    async def reload_command_config(self, entity_id):
+        if entity_id is None:
+            return await self.load_command_config()
+        query = """
+                SELECT ARRAY_AGG(command)
+                FROM command_config
+                WHERE entity_id = $1;
+                """
+        commands = await self.bot.cxn.fetchval(query, entity_id)
+        self.resolver.set_disabled(entity_id, commands or ())
 
     async def load_plonks(self):
         query = """
@@ -50,70 +64,28 @@ class Config(commands.Cog):
                 FROM plonks GROUP BY server_id;
                 """
         records = await self.bot.cxn.fetch(query)
-        if records:
-            [
-                self.ignored[record["server_id"]].extend(record["entities"])
-                for record in records
-            ]
+        self.resolver.load_ignored(records)
 
-    async def bot_check_once(self, ctx):
-        # Reasons for bypassing
-        if ctx.guild is None:
-            return True  # Do not restrict in DMs.
-
-        if checks.is_admin(ctx):
-            return True  # Contibutors are immune.
-
-        if isinstance(ctx.author, discord.Member):
-            if ctx.author.guild_permissions.manage_guild:
-                return True  # Manage guild is immune.
-
-        # Now check channels, roles, and users.
-        if ctx.channel.id in self.ignored[ctx.guild.id]:
-            return False  # Channel is ignored.
-
-        if ctx.author.id in self.ignored[ctx.guild.id]:
-            return False  # User is ignored.
-
-        if any(
-            (
-                role_id in self.ignored[ctx.guild.id]
-                for role_id in [r.id for r in ctx.author.roles]
-            )
-        ):
-            return False  # Role is ignored.
+    async def reload_plonks(self, server_id):
+        if server_id is None:
+            return await self.load_plonks()
+        query = """
+                SELECT ARRAY_AGG(entity_id)
+                FROM plonks
+                WHERE server_id = $1;
+                """
+        entities = await self.bot.cxn.fetchval(query, server_id)
+        self.resolver.set_ignored(server_id, entities or ())
 
-        return True  # Ok just in case we get here...
+    async def bot_check_once(self, ctx):
+        if self.resolver.is_immune(ctx):
+            return True
+        return not self.resolver.is_ignored(ctx)
 
     async def bot_check(self, ctx):
-        if ctx.guild is None:
-            return True  # Do not restrict in DMs.
-
-        if checks.is_admin(ctx):
-            return True  # Bot devs are immune.
-
-        if isinstance(ctx.author, discord.Member):
-            if ctx.author.guild_permissions.manage_guild:
-                return True  # Manage guild is immune.
-
-        if str(ctx.command) in self.command_config[ctx.guild.id]:
-            return False  # Disabled for the whole server.
-
-        if str(ctx.command) in self.command_config[ctx.channel.id]:
-            return False  # Disabled for the channel
-
-        if str(ctx.command) in self.command_config[ctx.author.id]:
-            return False  # Disabled for the user
-
-        if any(
-            (
-                str(ctx.command) in self.command_config[role_id]
-                for role_id in ctx.author._roles
-            )
-        ):
-            return False  # Disabled for the role
-
-        return True  # Ok just in case we get here...
+        if self.resolver.is_immune(ctx):
+            return True
+        return not self.resolver.is_disabled(ctx, ctx.command)
 
     async def ignore_entities(self, ctx, entities):
         failed = []
@@ -135,7 +107,7 @@ class Config(commands.Cog):
                         continue
                     else:
                         success.append(str(entity))
-                        self.ignored[ctx.guild.id].append(entity.id)
+                        self.resolver.ignore(ctx.guild.id, [entity.id])
         if success:
             await ctx.success(
                 f"Ignored entit{'y' if len(success) == 1 else 'ies'} `{', '.join(success)}`"
@@ -288,7 +260,7 @@ class Config(commands.Cog):
         await ctx.trigger_typing()
         query = "DELETE FROM plonks WHERE server_id = $1;"
         await self.bot.cxn.execute(query, ctx.guild.id)
-        self.ignored[ctx.guild.id].clear()
+        self.resolver.clear_ignored(ctx.guild.id)
         await ctx.success("Cleared the server's ignore list.")
 
     @decorators.group(
@@ -326,9 +298,7 @@ class Config(commands.Cog):
                 """
         entries = [c.id for c in entities]
         await self.bot.cxn.execute(query, ctx.guild.id, entries)
-        self.ignored[ctx.guild.id] = [
-            x for x in self.ignored[ctx.guild.id] if x not in entries
-        ]
+        self.resolver.unignore(ctx.guild.id, entries)
         await ctx.success(
             f"Removed `{', '.join([str(x) for x in entities])}` from the ignored list."
         )
@@ -377,7 +347,7 @@ class Config(commands.Cog):
                         continue
                     else:
                         success.append(command)
-                        self.command_config[entity.id].append(command)
+                        self.resolver.disable(entity.id, [command])
         if success:
             await ctx.success(
                 f"Disabled command{'' if len(success) == 1 else 's'} `{', '.join(success)}` for entity `{entity}`"
@@ -393,9 +363,7 @@ class Config(commands.Cog):
                 AND command = ANY($3::TEXT[]);
                 """
         await self.bot.cxn.execute(query, ctx.guild.id, entity.id, commands)
-        self.command_config[entity.id] = [
-            x for x in self.command_config[entity.id] if x not in commands
-        ]
+        self.resolver.enable(entity.id, commands)
         await ctx.success(
             f"Enabled commands `{', '.join(commands)}` for entity `{entity}`"
         )
@@ -6,6 +6,7 @@ from discord.ext import commands
 
 from utilities import utils
 from utilities import checks
+from utilities import history
 from utilities import decorators
 from utilities import formatting
 
@@ -524,30 +525,20 @@ class Files(commands.Cog):
             ),
         )
 
-        counter = 0
-        msg = ""
-        async for message in chan.history(limit=messages):
-            counter += 1
-            msg += message.content + "\n"
-            msg += (
-                "----Sent-By: "
-                + message.author.name
-                + "#"
-                + message.author.discriminator
-                + "\n"
-            )
-            msg += (
-                "---------At: " + message.created_at.strftime("%Y-%m-%d %H.%M") + "\n"
+        buffer = io.StringIO()
+        async for message in history.scan(chan, limit=messages):
+            buffer.write(f"{message.content}\n")
+            buffer.write(f"----Sent-By: {message.author}\n")
+            buffer.write(
+                f"---------At: {message.created_at.strftime('%Y-%m-%d %H.%M')}\n"
             )
             if message.edited_at:
-                msg += (
-                    "--Edited-At: "
-                    + message.edited_at.strftime("%Y-%m-%d %H.%M")
-                    + "\n"
+                buffer.write(
+                    f"--Edited-At: {message.edited_at.strftime('%Y-%m-%d %H.%M')}\n"
                 )
-            msg += "\n"
+            buffer.write("\n")
 
-        data = io.BytesIO(msg[:-2].encode("utf-8"))
+        data = io.BytesIO(buffer.getvalue()[:-2].encode("utf-8"))
 
         await mess.edit(content="Uploading `{}`...".format(log_file))
         try:
@@ -42,6 +42,11 @@ class Info(commands.Cog):
         self.socket_since = discord.utils.utcnow()
         self.message_latencies = collections.deque(maxlen=500)
 
+        bot.ipc.register("shared_servers", self.count_shared_servers)
+
+    def cog_unload(self):
+        self.bot.ipc.unregister("shared_servers")
+
     #####################
     ## Event Listeners ##
     #####################
@@ -106,28 +111,24 @@ class Info(commands.Cog):
         """
         msg = await ctx.load("Collecting Bot Statistics...")
 
-        total_members = sum(1 for x in self.bot.get_all_members())
+        totals = await self.bot.get_totals()  # Summed across all clusters
         uptime = utils.timeago(discord.utils.utcnow() - self.bot.uptime)
 
-        voice_channels = 0
-        text_channels = 0
-        stage_channels = 0
-
-        for guild in self.bot.guilds:
-            stage_channels += len(guild.stage_channels)
-            text_channels += len(guild.text_channels)
-            voice_channels += len(guild.voice_channels)
-
         embed = discord.Embed(color=self.bot.constants.embed)
         embed.set_thumbnail(url=self.bot.user.display_avatar.url)
 
         embed.add_field(name="Last Boot", value=str(uptime).capitalize())
         embed.add_field(name="Developer", value=str(self.bot.hecate))
-        embed.add_field(name="Server Count", value=f"{len(self.bot.guilds):,}")
-        embed.add_field(name="Text Channels", value=f"{text_channels:,}")
-        embed.add_field(name="Voice Channels", value=f"{voice_channels:,}")
-        embed.add_field(name="Stage Channels", value=f"{stage_channels:,}")
-        embed.add_field(name="Member Count", value=f"{total_members:,}")
+        embed.add_field(name="Server Count", value=f"{totals['servers']:,}")
+        embed.add_field(name="Text Channels", value=f"{totals['text_channels']:,}")
+        embed.add_field(name="Voice Channels", value=f"{totals['voice_channels']:,}")
+        embed.add_field(name="Stage Channels", value=f"{totals['stage_channels']:,}")
+        embed.add_field(name="Member Count", value=f"{totals['members']:,}")
+        if self.bot.cluster.clustered:
+            embed.add_field(
+                name="Clusters",
+                value=f"{totals['clusters']}/{self.bot.cluster.cluster_count} online",
+            )
         embed.add_field(
             name="Total Messages", value=f"{await self.total_global_messages():,}"
         )
@@ -962,17 +963,15 @@ class Info(commands.Cog):
             user = ctx.author
 
         if user.id == self.bot.user.id:
+            servers = (await self.bot.get_totals())["servers"]
             return await ctx.send_or_reply(
                 "I'm on **{:,}** server{}. ".format(
-                    len(self.bot.guilds), "" if len(self.bot.guilds) == 1 else "s"
+                    servers, "" if servers == 1 else "s"
                 )
             )
 
-        count = 0
-        for guild in self.bot.guilds:
-            for mem in guild.members:
-                if mem.id == user.id:
-                    count += 1
+        results = await self.bot.ipc.broadcast("shared_servers", user_id=user.id)
+        count = sum(result for result in results if result)
         if ctx.author.id == user.id:
             targ = "You share"
         else:
@@ -984,6 +983,9 @@ class Info(commands.Cog):
             )
         )
 
+    async def count_shared_servers(self, user_id):
+        return sum(1 for guild in self.bot.guilds if guild.get_member(user_id))
+
     async def run_process(self, command):
         try:
             process = await asyncio.create_subprocess_shell(
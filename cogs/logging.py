@@ -1,18 +1,19 @@
 import io
 import re
-import json
 import codecs
 import discord
 
 from collections import defaultdict, Counter
 from discord.ext import commands, menus, tasks
 
+from utilities import cache
 from utilities import utils
 from utilities import checks
 from utilities import converters
 from utilities import decorators
 from utilities import exceptions
 from utilities import pagination
+from utilities import webhooks
 
 DISCORD_FAILURE = "https://cdn.discordapp.com/attachments/846597178918436885/873793100613582878/poop.png"
 CREATED_MESSAGE = "https://cdn.discordapp.com/attachments/846597178918436885/846841649542725632/messagecreate.png"
@@ -31,15 +32,11 @@ class Logging(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.entities = defaultdict(list)
+        self.entities = {}  # Frozensets of ignored entity IDs
         self.log_data = defaultdict(dict)
-        self.settings = defaultdict(dict)
-        self.tasks = defaultdict(list)
+        self.settings = {}  # Bitmasks of enabled logging events
         self.webhooks = defaultdict(discord.Webhook)
 
-        bot.loop.create_task(self.load_settings())
-        bot.loop.create_task(self.load_log_data())
-
         self.log_types = [
             "avatars",
             "channels",
@@ -56,68 +53,106 @@ class Logging(commands.Cog):
             "voice",
         ]  # Helper list with all our logging types.
 
-        # self.dispatch_webhooks.add_exception_type(discord.NotFound)
-        self.dispatch_webhooks.start()  # Start the task loop
+        # Each logging type gets its own bit in a server's settings.
+        self.flags = {log_type: 1 << i for i, log_type in enumerate(self.log_types)}
+        self.all_flags = (1 << len(self.log_types)) - 1
+
+        bot.loop.create_task(self.load_settings())
+        bot.loop.create_task(self.load_log_data())
+
+        self.dispatcher = webhooks.WebhookDispatcher(bot)  # Per webhook senders
 
         self.map = {
             True: bot.emote_dict["pass"],
             False: bot.emote_dict["fail"],
         }  # Map for determining the emote.
 
-        self.snipes = []
-        self.edited = []
+        self.snipes = cache.SnipeCache(maxlen=50, ttl=86400)  # Deleted messages
+        self.edited = cache.SnipeCache(maxlen=50, ttl=86400)  # Edited messages
+        self.snipe_pruner.start()
+
+        # Reload when another process writes to these tables.
+        bot.invalidator.subscribe("logs", self.reload_settings)
+        bot.invalidator.subscribe("log_data", self.reload_log_data)
 
-    def cog_unload(self):  # Stop the task loop
-        self.dispatch_webhooks.stop()
+    def cog_unload(self):  # Stop the sender tasks
+        self.dispatcher.close()
+        self.snipe_pruner.stop()
+        self.bot.invalidator.unsubscribe("logs", self.reload_settings)
+        self.bot.invalidator.unsubscribe("log_data", self.reload_log_data)
+
+    @tasks.loop(hours=1.0)
+    async def snipe_pruner(self):
+        # Channels nobody snipes from would otherwise keep content forever.
+        self.snipes.prune()
+        self.edited.prune()
 
     async def load_settings(self):
-        query = """
-                SELECT 
-                logs.server_id,
-                (SELECT ROW_TO_JSON(_) FROM (SELECT
-                    logs.avatars,
-                    logs.channels,
-                    logs.emojis,
-                    logs.invites,
-                    logs.joins,
-                    logs.leaves,
-                    logs.messages,
-                    logs.moderation,
-                    logs.nicknames,
-                    logs.usernames,
-                    logs.roles,
-                    logs.server,
-                    logs.voice
-                ) AS _) AS settings
+        query = f"""
+                SELECT server_id, {', '.join(self.log_types)}
                 FROM logs;
                 """
         records = await self.bot.cxn.fetch(query)
-        if records:
-            for record in records:
-                self.settings[record["server_id"]].update(
-                    json.loads(record["settings"])
-                )
+        self.settings = {
+            record["server_id"]: self.get_mask(record) for record in records
+        }
+
+    async def reload_settings(self, server_id):
+        if server_id is None:
+            return await self.load_settings()
+        query = f"""
+                SELECT {', '.join(self.log_types)}
+                FROM logs
+                WHERE server_id = $1;
+                """
+        record = await self.bot.cxn.fetchrow(query, server_id)
+        if record is None:
+            self.settings.pop(server_id, None)
+        else:
+            self.settings[server_id] = self.get_mask(record)
+
+    def get_mask(self, record):
+        return sum(flag for log_type, flag in self.flags.items() if record[log_type])
 
     async def load_log_data(self):
         query = """
-                SELECT 
-                d.server_id, d.entities,
-                (SELECT ROW_TO_JSON(_) FROM (SELECT
-                    d.channel_id,
-                    d.webhook_id,
-                    d.webhook_token
-                ) AS _) AS log_data
-                FROM log_data as d;
+                SELECT server_id, channel_id,
+                webhook_id, webhook_token, entities
+                FROM log_data;
                 """
         records = await self.bot.cxn.fetch(query)
-        if records:
-            for record in records:
-                self.log_data[record["server_id"]].update(
-                    json.loads(record["log_data"])
-                )
-                self.entities[record["server_id"]].extend(record["entities"])
-                webhook = self.parse_json(json.loads(record["log_data"]))
-                self.webhooks[record["server_id"]] = webhook
+        for record in records:
+            self.cache_log_data(record)
+
+    async def reload_log_data(self, server_id):
+        if server_id is None:
+            return await self.load_log_data()
+        query = """
+                SELECT server_id, channel_id,
+                webhook_id, webhook_token, entities
+                FROM log_data
+                WHERE server_id = $1;
+                """
+        record = await self.bot.cxn.fetchrow(query, server_id)
+        webhook = self.webhooks.get(server_id)
+        if record is None:  # Logging was disabled
+            self.log_data.pop(server_id, None)
+            self.entities.pop(server_id, None)
+            self.webhooks.pop(server_id, None)
+        else:
+            self.cache_log_data(record)
+        if webhook and (record is None or webhook.id != record["webhook_id"]):
+            self.dispatcher.remove(webhook)  # Delete pending embeds/files.
+
+    def cache_log_data(self, record):
+        data = {
+            "channel_id": record["channel_id"],
+            "webhook_id": record["webhook_id"],
+            "webhook_token": record["webhook_token"],
+        }
+        self.log_data[record["server_id"]].update(data)
+        self.entities[record["server_id"]] = frozenset(record["entities"] or ())
+        self.webhooks[record["server_id"]] = self.parse_json(data)
 
     def parse_json(self, data):
         return self.fetch_webhook(data["webhook_id"], data["webhook_token"])
@@ -142,16 +177,19 @@ class Logging(commands.Cog):
         webhook = self.webhooks.get(guild.id)
         if event is None:
             return webhook
-        settings = self.get_settings(guild, event)
-        if webhook and settings:
+        if webhook and self.settings.get(guild.id, 0) & self.flags[event]:
             return webhook
 
     def get_settings(self, guild, event=None):
+        """
+        Returns the server's event bitmask, or None if
+        logging isn't set up. If an event is passed,
+        returns whether that event is being logged.
+        """
         settings = self.settings.get(guild.id)
         if event is None:
             return settings
-        if settings:
-            return self.settings[guild.id].get(event)
+        return bool(settings and settings & self.flags[event])
 
     def get_log_data(self, guild):
         return self.log_data.get(guild.id)
@@ -185,9 +223,9 @@ class Logging(commands.Cog):
 
     async def send_webhook(self, webhook, *, embed=None, file=None):
         if embed:
-            self.tasks[webhook].append(embed)
+            self.dispatcher.put(webhook, embed)
         if file:
-            self.tasks[webhook].append(file)
+            self.dispatcher.put(webhook, file)
 
     # Helper function to truncate oversized strings.
     def truncate(self, string, max_chars):
@@ -195,38 +233,8 @@ class Logging(commands.Cog):
 
     # Helper function to check if an object is ignored
     def is_ignored(self, guild, objects):
-        return any([obj in self.entities[guild.id] for obj in objects])
-
-    @tasks.loop(seconds=3.0)
-    async def dispatch_webhooks(self):
-        if self.tasks:
-            for webhook, objects in self.tasks.items():
-                if objects:
-                    to_send = objects[:10]
-                    embeds = [x for x in to_send if type(x) is discord.Embed]
-                    files = [x for x in to_send if type(x) is discord.File]
-                    try:
-                        await webhook.send(
-                            embeds=embeds,
-                            files=files,
-                            username=f"{self.bot.user.name}-logger",
-                            avatar_url=self.bot.user.display_avatar.url,
-                        )
-                    except discord.NotFound:  # Raised when users manually delete the webhook.
-                        pass
-                    except discord.HTTPException:  # Embed too large
-                        pass  # TODO truncate instead of ignoring size errors.
-                    except Exception as e:
-                        self.bot.dispatch(
-                            "error", "logging_error", tb=utils.traceback_maker(e)
-                        )
-                    embeds.clear()
-                    files.clear()
-                    self.tasks[webhook] = objects[10:]
-
-    @dispatch_webhooks.error  # For unhandled errors
-    async def logging_error(self, exc):
-        self.bot.dispatch("error", "logging_error", tb=utils.traceback_maker(exc))
+        ignored = self.entities.get(guild.id)
+        return bool(ignored) and not ignored.isdisjoint(objects)
 
     @decorators.group(
         name="log",
@@ -267,10 +275,11 @@ class Logging(commands.Cog):
         Subcommands:
             {0}log channel [channel]  # Set up the server's logging
             {0}log disable  # Remove the server's logging
+            {0}log stats  # Show the logging queue stats
         """
         if ctx.invoked_subcommand is None:
             settings = self.get_settings(ctx.guild)
-            if not settings:  # No settings = No logging
+            if settings is None:  # No settings = No logging
                 return await ctx.fail("Logging is disabled on this server.")
 
             if event is None:  # Output the current settings
@@ -280,7 +289,8 @@ class Logging(commands.Cog):
                     color=self.bot.constants.embed,
                 )
 
-                for key, value in settings.items():
+                for key, flag in self.flags.items():
+                    value = bool(settings & flag)
                     embed.description += f"{self.map.get(value)} {key.capitalize()}\n"
 
                 embed.add_field(
@@ -291,8 +301,7 @@ class Logging(commands.Cog):
                 await ctx.send_or_reply(embed=embed)
             else:
                 if event == "all":  # Want to log all events.
-                    current = all([e is True for e in settings.values()])
-                    if current is True:  # All events already enabled...
+                    if settings == self.all_flags:  # All events already enabled...
                         return await ctx.success(
                             "All logging events are already enabled."
                         )
@@ -310,11 +319,10 @@ class Logging(commands.Cog):
                     await self.bot.cxn.execute(query, ctx.guild.id)
 
                     # Update the logging settings in the cache
-                    self.settings[ctx.guild.id] = {x: True for x in self.log_types}
+                    self.settings[ctx.guild.id] = self.all_flags
                     await ctx.success("All logging events have been enabled.")
                 else:  # They specified an event
-                    current = settings.get(event)
-                    if current is True:  # Already logging this event.
+                    if settings & self.flags[event]:  # Already logging this event.
                         return await ctx.success(
                             f"Logging event `{event}` is already enabled."
                         )
@@ -327,7 +335,7 @@ class Logging(commands.Cog):
                     await self.bot.cxn.execute(query, True, ctx.guild.id)
 
                     # Update the event in the cache to reflect the db.
-                    self.settings[ctx.guild.id][event] = True
+                    self.settings[ctx.guild.id] |= self.flags[event]
                     await ctx.success(f"Logging event `{event}` has been enabled.")
 
     @_log.command(
@@ -354,11 +362,45 @@ class Logging(commands.Cog):
         if c:  # They confirmed they wanted to teardown the logging system
             await self.destroy_logging(ctx.guild)  # Drop from DB and delete webhooks.
             self.log_data[ctx.guild.id].clear()  # Clear data cache
-            self.settings[ctx.guild.id].clear()  # Clear settings cache
+            self.settings.pop(ctx.guild.id, None)  # Clear settings cache
             self.webhooks.pop(ctx.guild.id, None)  # Clear cached webhook
-            self.tasks.pop(webhook, None)  # Delete any pending embeds/files to be sent.
+            self.dispatcher.remove(webhook)  # Delete any pending embeds/files to be sent.
             await ctx.success("Logging successfully disabled.")
 
+    @_log.command(
+        name="stats",
+        aliases=["queue"],
+        brief="Show logging queue stats.",
+        hidden=True,
+    )
+    @checks.cooldown()
+    @checks.bot_has_perms(embed_links=True)
+    @checks.has_perms(manage_guild=True)
+    async def _stats(self, ctx):
+        """
+        Usage: {0}log stats
+        Alias: {0}log queue
+        Permission: Manage Server
+        Output:
+            Shows how many logs are waiting
+            to be sent and how long the
+            logging webhook takes to respond.
+        """
+        webhook = self.get_webhook(ctx.guild)
+        if not webhook:  # No webhook = No logging.
+            return await ctx.fail("Logging is disabled on this server.")
+
+        depth, latency, average, sent = self.dispatcher.stats(webhook)
+        embed = discord.Embed(
+            title="Logging Queue",
+            description=f"**Queued:** `{depth:,}`\n"
+            f"**Messages sent:** `{sent:,}`\n"
+            f"**Last send:** `{latency * 1000:.2f} ms`\n"
+            f"**Average send:** `{average * 1000:.2f} ms`\n",
+            color=self.bot.constants.embed,
+        )
+        await ctx.send_or_reply(embed=embed)
+
     @_log.command(
         name="channel",
         aliases=["enable"],
@@ -389,7 +431,7 @@ class Logging(commands.Cog):
             raise exceptions.WebhookLimit(channel)
 
         settings = self.get_settings(ctx.guild)
-        if settings:  # Logging already set up. Check if they want to override.
+        if settings is not None:  # Logging already set up. Check if they want to override.
             c = await ctx.confirm(
                 "Logging is already set up on this server. "
                 f"Clicking the {self.bot.emote_dict['success']} button will override the current configuration."
@@ -425,7 +467,7 @@ class Logging(commands.Cog):
             "webhook_token": wh.token,
         }
         # Update the settings to reflect the default logging config.
-        self.settings[ctx.guild.id] = {log_type: True for log_type in self.log_types}
+        self.settings[ctx.guild.id] = self.all_flags
         # Set the server logging webhook to the webhook we just created.
         self.webhooks[ctx.guild.id] = wh
 
@@ -454,12 +496,11 @@ class Logging(commands.Cog):
             logging system.
         """
         settings = self.get_settings(ctx.guild)
-        if not settings:  # No settings = No logging.
+        if settings is None:  # No settings = No logging.
             return await ctx.fail(f"Logging is disabled on this server.")
 
         if event == "all":  # They want to disable all.
-            current = all([e is not True for e in settings.values()])
-            if current is True:  # Already have all events disabled.
+            if settings == 0:  # Already have all events disabled.
                 return await ctx.success("All logging events are already disabled.")
 
             query = """
@@ -476,11 +517,10 @@ class Logging(commands.Cog):
             await self.bot.cxn.execute(query, ctx.guild.id, *args)
 
             # Update all the cached event settings to false
-            self.settings[ctx.guild.id] = {x: False for x in self.log_types}
+            self.settings[ctx.guild.id] = 0
             await ctx.success("All logging events have been disabled.")
         else:  # They specified an event.
-            current = settings.get(event)
-            if current is not True:  # Not logging this event.
+            if not settings & self.flags[event]:  # Not logging this event.
                 return await ctx.success(
                     f"Logging event `{event}` is already disabled."
                 )
@@ -493,7 +533,7 @@ class Logging(commands.Cog):
             await self.bot.cxn.execute(query, False, ctx.guild.id)
 
             # Update the cache to match the DB
-            self.settings[ctx.guild.id][event] = False
+            self.settings[ctx.guild.id] &= ~self.flags[event]
             await ctx.success(f"Logging event `{event}` has been disabled.")
 
     ###################
@@ -549,9 +589,9 @@ class Logging(commands.Cog):
         if webhook:
             await self.destroy_logging(guild)  # Drop from DB and delete webhooks.
             self.log_data[guild.id].clear()  # Clear data cache
-            self.settings[guild.id].clear()  # Clear settings cache
+            self.settings.pop(guild.id, None)  # Clear settings cache
             self.webhooks.pop(guild.id, None)  # Clear cached webhook
-            self.tasks.pop(webhook, None)  # Delete any pending embeds/files to be sent.
+            self.dispatcher.remove(webhook)  # Delete any pending embeds/files to be sent.
 
     @commands.Cog.listener()
     @decorators.wait_until_ready()
@@ -707,6 +747,9 @@ class Logging(commands.Cog):
     @commands.Cog.listener()
     @decorators.wait_until_ready()
     async def on_guild_channel_delete(self, channel):
+        self.snipes.remove_channel(channel.id)  # Free the channel's snipe buffers
+        self.edited.remove_channel(channel.id)
+
         webhook = self.get_webhook(channel.guild, "channels")
         if not webhook:
             return
@@ -1029,7 +1072,7 @@ class Logging(commands.Cog):
     @decorators.wait_until_ready()
     @decorators.event_check(lambda s, b, a: a.guild and not a.author.bot)
     async def on_message_edit(self, before, after):
-        self.edited.append(before)
+        self.edited.add(before)
         if before.content == after.content:
             return  # giphy, tenor, and imgur links trigger this but they shouldn't be logged
 
@@ -1080,7 +1123,7 @@ class Logging(commands.Cog):
     @decorators.event_check(lambda s, m: m.guild and not m.author.bot)
     async def on_message_delete(self, message):
 
-        self.snipes.append(message)
+        self.snipes.add(message)
 
         webhook = self.get_webhook(message.guild, "messages")
         if not webhook:
@@ -1167,37 +1210,24 @@ class Logging(commands.Cog):
         Notes:
             Will fetch a messages sent by a specific user if specified
         """
-
-        def get_snipe(author_id=None):
-            msgs = [m for m in self.snipes if m.channel.id == ctx.channel.id]
-            if author_id:
-                msgs = [m for m in msgs if m.author_id == author_id]
-
-            if msgs:
-                return msgs[-1]
-
-        if member is None:
-            msg = get_snipe()
-        else:
-            msg = get_snipe(member.id)
-
+        msg = self.snipes.get(ctx.channel.id, member.id if member else None)
         if not msg:
             return await ctx.fail(f"There is nothing to snipe.")
 
-        author = msg.author.id
         message_id = msg.id
         content = msg.content
-        timestamp = msg.created_at.utcnow()
+        timestamp = msg.created_at
 
-        author = self.bot.get_user(author)
-        if not author:
-            author = await self.bot.fetch_user(author)
+        author = await self.bot.get_or_fetch_user(msg.author_id)
 
         if str(content).startswith("```"):
             content = f"**__Message Content__**\n {str(content)}"
         else:
             content = f"**__Message Content__**\n ```fix\n{str(content)}```"
 
+        if msg.attachments:
+            content += "\n**__Attachments__**\n" + "\n".join(msg.attachments)
+
         embed = discord.Embed(
             description=f"**Author:**  {author.mention}, **ID:** `{author.id}`\n"
             f"**Channel:** {ctx.channel.mention} **ID:** `{ctx.channel.id}`\n"
@@ -1228,31 +1258,15 @@ class Logging(commands.Cog):
         Notes:
             Will fetch a messages sent by a specific user if specified
         """
-
-        def get_snipe(author_id=None):
-            msgs = [m for m in self.edited if m.channel.id == ctx.channel.id]
-            if author_id:
-                msgs = [m for m in msgs if m.author_id == author_id]
-
-            if msgs:
-                return msgs[-1]
-
-        if member is None:
-            msg = get_snipe()
-        else:
-            msg = get_snipe(member.id)
-
+        msg = self.edited.get(ctx.channel.id, member.id if member else None)
         if not msg:
             return await ctx.fail(f"There are no edits to snipe.")
 
-        author = msg.author.id
         message_id = msg.id
         content = msg.content
-        timestamp = msg.created_at.utcnow()
+        timestamp = msg.created_at
 
-        author = self.bot.get_user(author)
-        if not author:
-            author = await self.bot.fetch_user(author)
+        author = await self.bot.get_or_fetch_user(msg.author_id)
 
         if str(content).startswith("```"):
             content = f"**__Previous Message Content__**\n {str(content)}"
@@ -1322,7 +1336,7 @@ class Logging(commands.Cog):
             the specified activity
         """
         loop = []
-        for i in ctx.guild.members:
+        for i in await self.bot.get_members(ctx.guild):
             if i.activities and (not i.bot):
                 for g in i.activities:
                     if g.name and (search.lower() in g.name.lower()):
@@ -1359,8 +1373,8 @@ class Logging(commands.Cog):
         """
         loop = [
             f"{i} ({i.id})"
-            for i in ctx.guild.members
-            if search.lower() in i.name.lower() and not i.bot
+            for i in await self.bot.search_members(ctx.guild, "name", search)
+            if not i.bot
         ]
         if not loop:
             return await ctx.fail(f"**No results.**")
@@ -1396,9 +1410,8 @@ class Logging(commands.Cog):
         """
         loop = [
             f"{i.nick} | {i} ({i.id})"
-            for i in ctx.guild.members
-            if i.nick
-            if (search.lower() in i.nick.lower()) and not i.bot
+            for i in await self.bot.search_members(ctx.guild, "nick", search)
+            if not i.bot
         ]
         if not loop:
             return await ctx.fail(f"**No results.**")
@@ -1428,7 +1441,7 @@ class Logging(commands.Cog):
         """
         loop = [
             f"{i} | {i} ({i.id})"
-            for i in ctx.guild.members
+            for i in await self.bot.get_members(ctx.guild)
             if (str(search) in str(i.id)) and not i.bot
         ]
         if not loop:
@@ -1468,7 +1481,8 @@ class Logging(commands.Cog):
                 content="You must provide exactly 4 digits",
             )
 
-        loop = [f"{i} ({i.id})" for i in ctx.guild.members if search == i.discriminator]
+        members = await self.bot.get_members(ctx.guild)
+        loop = [f"{i} ({i.id})" for i in members if search == i.discriminator]
         if not loop:
             return await ctx.fail(f"**No results.**")
         stuff = "\r\n".join(
@@ -1500,7 +1514,7 @@ class Logging(commands.Cog):
             are not unique on the server
         """
         name_list = []
-        for member in ctx.guild.members:
+        for member in await self.bot.get_members(ctx.guild):
             name_list.append(member.display_name.lower())
 
         name_list = Counter(name_list)
@@ -1559,16 +1573,17 @@ class Logging(commands.Cog):
             to search for hard to mention
             usernames instead of nicknames.
         """
+        members = await self.bot.get_members(ctx.guild)
         if str(username).lower() in ["--username", " -u", "-username", "--u"]:
             loop = [
                 member
-                for member in ctx.message.guild.members
+                for member in members
                 if self._is_hard_to_mention(str(member.name))
             ]
         else:
             loop = [
                 member
-                for member in ctx.message.guild.members
+                for member in members
                 if self._is_hard_to_mention(member.display_name)
             ]
         if not loop:
@@ -10,6 +10,7 @@ from collections import Counter
 from discord.ext import commands
 from discord.ext.commands import converter
 
+from utilities import bulk
 from utilities import utils
 from utilities import checks
 from utilities import helpers
@@ -156,24 +157,16 @@ class Mod(commands.Cog):
         if not len(targets):
             await ctx.usage()
 
-        kicked = []
-        failed = []
-        for target in targets:
-            res = await checks.check_priv(ctx, target)
-            if res:
-                failed.append((str(target), res))
-                continue
-            try:
-                await ctx.guild.kick(target, reason=reason)
-                kicked.append(str(target))
-            except Exception as e:
-                failed.append((str(target), e))
-                continue
-        if kicked:
-            await ctx.success(f"Kicked `{', '.join(kicked)}`")
-            self.bot.dispatch("mod_action", ctx, targets=kicked)
-        if failed:
-            await helpers.error_info(ctx, failed)
+        async def kick(target):
+            await ctx.guild.kick(target, reason=reason)
+
+        job = bulk.BulkAction(ctx, targets, kick, verb="Kicked", gerund="Kicking")
+        await job.run()
+        if job.succeeded:
+            await ctx.success(f"Kicked `{', '.join(job.succeeded)}`")
+            self.bot.dispatch("mod_action", ctx, targets=job.succeeded)
+        if job.failed:
+            await helpers.error_info(ctx, job.failed)
 
     ##################
     ## Ban Commands ##
@@ -213,28 +206,20 @@ class Mod(commands.Cog):
                 "The number of days to delete messages must be greater than 0."
             )
 
-        banned = []
-        failed = []
-        for target in targets:
-            res = await checks.check_priv(ctx, target)
-            if res:
-                failed.append((str(target), res))
-                continue
-            try:
-                await ctx.guild.ban(
-                    target,
-                    reason=await converters.ActionReason().convert(ctx, reason),
-                    delete_message_days=delete_message_days,
-                )
-                banned.append(str(target))
-            except Exception as e:
-                failed.append((str(target), e))
-                continue
-        if banned:
-            await ctx.success(f"Banned `{', '.join(banned)}`")
-            self.bot.dispatch("mod_action", ctx, targets=banned)
-        if failed:
-            await helpers.error_info(ctx, failed)
+        reason = await converters.ActionReason().convert(ctx, reason)
+
+        async def ban(target):
+            await ctx.guild.ban(
+                target, reason=reason, delete_message_days=delete_message_days
+            )
+
+        job = bulk.BulkAction(ctx, targets, ban, verb="Banned", gerund="Banning")
+        await job.run()
+        if job.succeeded:
+            await ctx.success(f"Banned `{', '.join(job.succeeded)}`")
+            self.bot.dispatch("mod_action", ctx, targets=job.succeeded)
+        if job.failed:
+            await helpers.error_info(ctx, job.failed)
 
     @decorators.command(
         brief="Softban users from the server.",
@@ -274,31 +259,23 @@ class Mod(commands.Cog):
                 "The number of days to delete messages must be greater than 0."
             )
 
-        banned = []
-        failed = []
-        for target in targets:
-            res = await checks.check_priv(ctx, target)
-            if res:
-                failed.append((str(target), res))
-                continue
-            try:
-                await ctx.guild.ban(
-                    target,
-                    reason=await converters.ActionReason().convert(ctx, reason),
-                    delete_message_days=delete_message_days,
-                )
-                await ctx.guild.unban(
-                    target, reason=await converters.ActionReason().convert(ctx, reason)
-                )
-                banned.append(str(target))
-            except Exception as e:
-                failed.append((str(target), e))
-                continue
-        if banned:
-            await ctx.success(f"Softbanned `{', '.join(banned)}`")
-            self.bot.dispatch("mod_action", ctx, targets=banned)
-        if failed:
-            await helpers.error_info(ctx, failed)
+        reason = await converters.ActionReason().convert(ctx, reason)
+
+        async def softban(target):
+            await ctx.guild.ban(
+                target, reason=reason, delete_message_days=delete_message_days
+            )
+            await ctx.guild.unban(target, reason=reason)
+
+        job = bulk.BulkAction(
+            ctx, targets, softban, verb="Softbanned", gerund="Softbanning"
+        )
+        await job.run()
+        if job.succeeded:
+            await ctx.success(f"Softbanned `{', '.join(job.succeeded)}`")
+            self.bot.dispatch("mod_action", ctx, targets=job.succeeded)
+        if job.failed:
+            await helpers.error_info(ctx, job.failed)
 
     @decorators.command(
         aliases=["revokeban"],
@@ -440,43 +417,62 @@ class Mod(commands.Cog):
             raise commands.BadArgument("This feature is unavailable.")
 
         msg = await ctx.load(f"Locking channel {channel.mention}...")
-        bot_perms = channel.overwrites_for(ctx.guild.me)
+        endtime = duration.dt.replace(tzinfo=None) if duration and duration.dt else None
+        reason = "Channel locked by command."
+        timer = await self.lock_channel(
+            channel,
+            ctx.author,
+            endtime=endtime,
+            created=ctx.message.created_at.replace(tzinfo=None),
+            reason=await converters.ActionReason().convert(ctx, reason),
+        )
+
+        if duration and duration.dt:
+            timefmt = humantime.human_timedelta(endtime, source=timer.created_at)
+        else:
+            timefmt = None
+
+        formatting = f" for {timefmt}" if timefmt else ""
+        await msg.edit(
+            content=f"{self.bot.emote_dict['lock']} Channel {channel.mention} locked{formatting}."
+        )
+
+    async def lock_channel(self, channel, moderator, *, endtime, created, reason):
+        """
+        Denies send_messages for the default role in a channel
+        and schedules a lockdown timer to restore it.
+        Returns the timer. Used by the lock command and raid mode.
+        """
+        task = self.bot.get_cog("Tasks")
+        overwrites = channel.overwrites_for(channel.guild.default_role)
+        perms = overwrites.send_messages
+
+        bot_perms = channel.overwrites_for(channel.guild.me)
         if not bot_perms.send_messages:
             bot_perms.send_messages = True
             await channel.set_permissions(
-                ctx.guild.me, overwrite=bot_perms, reason="For channel lockdown."
+                channel.guild.me, overwrite=bot_perms, reason="For channel lockdown."
             )
 
-        endtime = duration.dt.replace(tzinfo=None) if duration and duration.dt else None
-
         timer = await task.create_timer(
             endtime,
             "lockdown",
-            ctx.guild.id,
-            ctx.author.id,
+            channel.guild.id,
+            moderator.id,
             channel.id,
             perms=perms,
             channel_id=channel.id,
+            guild_id=channel.guild.id,
             connection=self.bot.cxn,
-            created=ctx.message.created_at.replace(tzinfo=None),
+            created=created,
         )
         overwrites.send_messages = False
-        reason = "Channel locked by command."
         await channel.set_permissions(
-            ctx.guild.default_role,
+            channel.guild.default_role,
             overwrite=overwrites,
-            reason=await converters.ActionReason().convert(ctx, reason),
-        )
-
-        if duration and duration.dt:
-            timefmt = humantime.human_timedelta(endtime, source=timer.created_at)
-        else:
-            timefmt = None
-
-        formatting = f" for {timefmt}" if timefmt else ""
-        await msg.edit(
-            content=f"{self.bot.emote_dict['lock']} Channel {channel.mention} locked{formatting}."
+            reason=reason,
         )
+        return timer
 
     @decorators.command(
         brief="Unlock a channel.",
@@ -623,53 +619,49 @@ class Mod(commands.Cog):
         reason = duration.arg if duration and duration.arg != "…" else None
         endtime = duration.dt.replace(tzinfo=None)
 
-        banned = []
-        failed = []
-        for user in users:
-            res = await checks.check_priv(ctx, user)
-            if res:
-                failed.append((str(user), res))
-                continue
-            try:
-                if reason:
-                    embed = discord.Embed(color=self.bot.constants.embed)
-                    timefmt = humantime.human_timedelta(
-                        endtime, source=ctx.message.created_at
-                    )
-                    embed.title = f"{self.bot.emote_dict['ban']} Tempban Notice"
-                    embed.description = (
-                        f"**Server: `{ctx.guild.name} ({ctx.guild.id})`**\n"
-                    )
-                    embed.description += (
-                        f"**Moderator: `{ctx.author} ({ctx.author.id})`**\n"
-                    )
-                    embed.description += f"**Duration: `{timefmt}`**\n"
-                    embed.description += f"**Reason: `{reason}`**"
-                    try:
-                        await user.send(embed=embed)
-                    except (AttributeError, discord.HTTPException):
-                        pass
-
-                await ctx.guild.ban(user, reason=reason)
-                timer = await task.create_timer(
-                    endtime,
-                    "tempban",
-                    ctx.guild.id,
-                    ctx.author.id,
-                    user.id,
-                    connection=self.bot.cxn,
-                    created=ctx.message.created_at.replace(tzinfo=None),
+        created = ctx.message.created_at.replace(tzinfo=None)
+
+        async def tempban(user):
+            if reason:
+                embed = discord.Embed(color=self.bot.constants.embed)
+                timefmt = humantime.human_timedelta(
+                    endtime, source=ctx.message.created_at
+                )
+                embed.title = f"{self.bot.emote_dict['ban']} Tempban Notice"
+                embed.description = f"**Server: `{ctx.guild.name} ({ctx.guild.id})`**\n"
+                embed.description += (
+                    f"**Moderator: `{ctx.author} ({ctx.author.id})`**\n"
                 )
-                banned.append(str(user))
-            except Exception as e:
-                failed.append((str(user), e))
-        if banned:
-            self.bot.dispatch("mod_action", ctx, targets=banned)
+                embed.description += f"**Duration: `{timefmt}`**\n"
+                embed.description += f"**Reason: `{reason}`**"
+                try:
+                    await user.send(embed=embed)
+                except (AttributeError, discord.HTTPException):
+                    pass
+
+            await ctx.guild.ban(user, reason=reason)
+            await task.create_timer(
+                endtime,
+                "tempban",
+                ctx.guild.id,
+                ctx.author.id,
+                user.id,
+                guild_id=ctx.guild.id,
+                connection=self.bot.cxn,
+                created=created,
+            )
+
+        job = bulk.BulkAction(
+            ctx, users, tempban, verb="Tempbanned", gerund="Tempbanning"
+        )
+        await job.run()
+        if job.succeeded:
+            self.bot.dispatch("mod_action", ctx, targets=job.succeeded)
             await ctx.success(
-                f"Tempbanned `{', '.join(banned)}` for {humantime.human_timedelta(duration.dt, source=timer.created_at)}."
+                f"Tempbanned `{', '.join(job.succeeded)}` for {humantime.human_timedelta(duration.dt, source=created)}."
             )
-        if failed:
-            await helpers.error_info(ctx, failed)
+        if job.failed:
+            await helpers.error_info(ctx, job.failed)
 
     @commands.Cog.listener()
     @decorators.wait_until_ready()
@@ -775,74 +767,67 @@ class Mod(commands.Cog):
             endtime = None
             dm = False
 
-        failed = []
-        muted = []
-        for user in users:
-            if (
-                user.bot
-            ):  # This is because bots sometimes have a role that cannot be removed
-                failed.append((str(user), "I cannot mute bots."))
-                continue  # I mean we could.. but why would someone want to mute a bot.
-            res = await checks.check_priv(ctx, user)
-            if res:
-                failed.append((str(user), res))
-                continue
+        created = ctx.message.created_at.replace(tzinfo=None)
+
+        async def check(ctx, user):
+            if user.bot:  # Bots sometimes have a role that cannot be removed
+                return "I cannot mute bots."
+            return await checks.check_priv(ctx, user)
+
+        async def mute(user):
             query = """
                     DELETE FROM tasks
                     WHERE event = 'mute'
                     AND extra->'kwargs'->>'user_id' = $1;
                     """
             await self.bot.cxn.fetchval(query, str(user.id))
-            try:
-                timer = await task.create_timer(
-                    endtime,
-                    "mute",
-                    ctx.guild.id,
-                    ctx.author.id,
-                    user.id,
-                    dm=dm,
-                    user_id=user.id,
-                    roles=[x.id for x in user.roles],
-                    connection=self.bot.cxn,
-                    created=ctx.message.created_at.replace(tzinfo=None),
+            await task.create_timer(
+                endtime,
+                "mute",
+                ctx.guild.id,
+                ctx.author.id,
+                user.id,
+                dm=dm,
+                user_id=user.id,
+                roles=[x.id for x in user.roles],
+                guild_id=ctx.guild.id,
+                connection=self.bot.cxn,
+                created=created,
+            )
+            if user.premium_since:
+                await user.edit(
+                    roles=[muterole, ctx.guild.premium_subscriber_role],
+                    reason=reason,
+                )
+            else:
+                await user.edit(roles=[muterole], reason=reason)
+            if reason:
+                embed = discord.Embed(color=self.bot.constants.embed)
+                embed.title = f"Mute Notice"
+                embed.description = f"**Server: `{ctx.guild.name} ({ctx.guild.id})`**\n"
+                embed.description += (
+                    f"**Moderator: `{ctx.author} ({ctx.author.id})`**\n"
                 )
-                if user.premium_since:
-                    await user.edit(
-                        roles=[muterole, ctx.guild.premium_subscriber_role],
-                        reason=reason,
-                    )
-                else:
-                    await user.edit(roles=[muterole], reason=reason)
-                # to_remove = (role for role in user.roles if role != ctx.guild.premium_subscriber_role and role != ctx.guild.default_role)
-                # await user.remove_roles(*to_remove, reason=reason)
-                # await user.add_roles(muterole, reason=reason)
-                muted.append(str(user))
-                if reason:
-                    embed = discord.Embed(color=self.bot.constants.embed)
-                    embed.title = f"Mute Notice"
-                    embed.description = (
-                        f"**Server: `{ctx.guild.name} ({ctx.guild.id})`**\n"
-                    )
-                    embed.description += (
-                        f"**Moderator: `{ctx.author} ({ctx.author.id})`**\n"
-                    )
-                    if endtime:
-                        timefmt = humantime.human_timedelta(
-                            endtime, source=timer.created_at
-                        )
-                        embed.description += f"**Duration: `{timefmt}`**\n"
-                    embed.description += f"**Reason: `{reason}`**"
+                if endtime:
+                    timefmt = humantime.human_timedelta(endtime, source=created)
+                    embed.description += f"**Duration: `{timefmt}`**\n"
+                embed.description += f"**Reason: `{reason}`**"
                 try:
                     await user.send(embed=embed)
                 except Exception:  # We tried
                     pass
-            except Exception as e:
-                failed.append((str(user), e))
+
+        job = bulk.BulkAction(
+            ctx, users, mute, verb="Muted", gerund="Muting", check=check
+        )
+        await job.run()
+        muted = job.succeeded
+        failed = job.failed
         if muted:
             self.bot.dispatch("mod_action", ctx, targets=muted)
             reason_str = f" Reason: {reason}" if reason else ""
             if endtime:
-                timefmt = humantime.human_timedelta(endtime, source=timer.created_at)
+                timefmt = humantime.human_timedelta(endtime, source=created)
                 msg = f"Muted `{', '.join(muted)}` for **{timefmt}.**{reason_str}"
             else:
                 msg = f"Muted `{', '.join(muted)}`.{reason_str}"
@@ -880,14 +865,9 @@ class Mod(commands.Cog):
         """
         if not len(users):
             return await ctx.usage()
-        failed = []
-        unmuted = []
-        for user in users:
-            res = await checks.check_priv(ctx, user)
-            if res:
-                failed.append((str(user), res))
-                continue
+        reason = await converters.ActionReason().convert(ctx, reason)
 
+        async def unmute(user):
             query = """
                     select (id, extra)
                     from tasks
@@ -896,27 +876,17 @@ class Mod(commands.Cog):
                     """
             s = await self.bot.cxn.fetchval(query, str(user.id))
             if not s:
-                unmuted.append(str(user))
-                continue
-            await ctx.trigger_typing()
+                return
             task_id = s[0]
             args_and_kwargs = json.loads(s[1])
             dm = args_and_kwargs["kwargs"]["dm"]
             roles = args_and_kwargs["kwargs"]["roles"]
-            try:
-                await user.edit(
-                    roles=[ctx.guild.get_role(x) for x in roles],
-                    reason=await converters.ActionReason().convert(ctx, reason),
-                )
-                query = """
-                        DELETE FROM tasks
-                        WHERE id = $1
-                        """
-                await self.bot.cxn.execute(query, task_id)
-                unmuted.append(str(user))
-            except Exception as e:
-                failed.append((str(user), e))
-                continue
+            await user.edit(roles=[ctx.guild.get_role(x) for x in roles], reason=reason)
+            query = """
+                    DELETE FROM tasks
+                    WHERE id = $1
+                    """
+            await self.bot.cxn.execute(query, task_id)
             if dm:
                 embed = discord.Embed(color=self.bot.constants.embed)
                 embed.title = f"Unmute Notice"
@@ -926,6 +896,12 @@ class Mod(commands.Cog):
                     await user.send(embed=embed)
                 except Exception:
                     pass
+
+        await ctx.trigger_typing()
+        job = bulk.BulkAction(ctx, users, unmute, verb="Unmuted", gerund="Unmuting")
+        await job.run()
+        unmuted = job.succeeded
+        failed = job.failed
         if unmuted:
             await ctx.success(f"Unmuted `{' '.join(unmuted)}`")
         if failed:
@@ -1034,6 +1010,7 @@ class Mod(commands.Cog):
             ctx.guild.id,
             user.id,
             role.id,
+            guild_id=ctx.guild.id,
             connection=self.bot.cxn,
             created=ctx.message.created_at.replace(tzinfo=None),
         )
@@ -426,6 +426,29 @@ class Monitor(commands.Cog):
         except menus.MenuError as e:
             await ctx.send_or_reply(e)
 
+    @decorators.command(aliases=["cachestats"], brief="Show bot cache stats.")
+    async def caches(self, ctx):
+        """
+        Usage: {0}caches
+        Alias: {0}cachestats
+        Output:
+            Shows hit and miss counters
+            for the bot's internal caches.
+        """
+        embed = discord.Embed(title="Cache Stats", color=self.bot.constants.embed)
+        for cog in self.bot.get_cogs():
+            try:
+                stats = cog.cache_stats()
+            except AttributeError:
+                continue
+            for name, values in stats.items():
+                value = "\n".join(f"{k.capitalize()}: {v}" for k, v in values.items())
+                embed.add_field(name=name, value=f"```prolog\n{value}```")
+
+        if not embed.fields:
+            return await ctx.fail("No caches are currently loaded.")
+        await ctx.send_or_reply(embed=embed)
+
     @decorators.command(brief="Show bot health.")
     async def bothealth(self, ctx):
         """
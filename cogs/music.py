@@ -25,16 +25,18 @@ import aiohttp
 import asyncio
 import asyncpg
 import discord
+import bisect
 import logging
-import functools
 import itertools
+import threading
 import traceback
 import youtube_dl
 
 from datetime import datetime
 from discord.ext import commands, tasks
 from logging.handlers import RotatingFileHandler
-from collections import deque, defaultdict
+from collections import Counter, OrderedDict, deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
 from settings import constants
@@ -72,6 +74,9 @@ FFMPEG_OPTION_BASE = (
     "-loglevel panic -reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
 )
 
+# Seconds of audio in each frame the voice client reads
+FRAME_SECONDS = discord.opus.Encoder.FRAME_LENGTH / 1000
+
 # YTDL options for creating sources
 YTDL_OPTIONS = {
     "format": "bestaudio/best",
@@ -93,8 +98,32 @@ YTDL_OPTIONS = {
     "writeautomaticsub": True,
 }
 
-# YTDL info extractor class
-YOUTUBE_DL = youtube_dl.YoutubeDL(YTDL_OPTIONS)
+# Extraction pool settings, lower priorities run first
+EXTRACTION_WORKERS = 4  # Threads running youtube_dl
+PRIORITY_NEXT = 0  # The track about to play
+PRIORITY_USER = 1  # A user waiting on a command
+PRIORITY_PREFETCH = 2  # Background lookups
+PRIORITY_SEARCH = 3  # Queued searches found ahead of time
+SEARCH_WORKERS = 4  # Queued searches looked up at once per server
+PREFETCH_TRACKS = constants.config.get("music_prefetch", 2)  # Tracks resolved early
+IDLE_TIMEOUT = constants.config.get("music_idle_timeout", 600)  # Seconds until reaped
+
+# Extraction cache settings
+EXTRACTION_CACHE_SIZE = 1000  # Extractions kept in memory
+METADATA_TTL = 86400  # Seconds to keep extractions without stream urls
+STREAM_TTL = 1800  # Seconds to keep stream urls that don't say when they expire
+REFRESH_MARGIN = 600  # Seconds before a stream url expires to refresh it
+PRELOAD_SECONDS = 10  # Seconds before a track ends to start the next one
+SPOTIFY_BATCH_SIZE = 50  # Most track IDs the /tracks endpoint takes
+SPOTIFY_BATCH_WINDOW = 0.05  # Seconds to collect track IDs for one request
+SPOTIFY_CACHE_SIZE = 5000  # Tracks kept in memory
+SPOTIFY_TTL = 86400  # Seconds to keep a track's album and artists
+SPOTIFY_PLAYLIST_LIMIT = 500  # Most tracks queued from a playlist
+VALIDATION_TTL = 300  # Seconds to trust a stream url that passed a check
+VALIDATION_CACHE_SIZE = 500  # Stream urls remembered as valid
+HISTORY_INTERVAL = 10  # Seconds between track history writes
+HISTORY_BATCH = 500  # Pending rows that trigger a write right away
+HISTORY_LIMIT = 10000  # Pending rows kept while postgres is unavailable
 
 
 class exceptions:
@@ -152,9 +181,19 @@ class exceptions:
 
 
 class Spotify:
+    """
+    Spotify catalog client. One client and token are shared
+    by every cog. Single track lookups are collected for a
+    moment and sent to the /tracks endpoint 50 IDs at a time,
+    and tracks are cached with their album and artists.
+    """
+
     # https://github.com/Just-Some-Bots/MusicBot
     OAUTH_TOKEN_URL = "https://accounts.spotify.com/api/token"
     API_BASE = "https://api.spotify.com/v1/"
+    ID_REGEX = re.compile(r"^[0-9A-Za-z]{22}$")
+
+    shared = None  # The client returned by MusicUtils.spotify()
 
     def __init__(self, client_id, client_secret, aiosession=None, loop=None):
         self.client_id = client_id
@@ -163,6 +202,17 @@ class Spotify:
         self.loop = loop if loop else asyncio.get_event_loop()
 
         self.token = None
+        self.token_lock = asyncio.Lock()
+
+        self.tracks = OrderedDict()  # track_id: (expires, track)
+        self.waiting = {}  # track_id: Future of a pending or sent batch
+        self.pending = []  # Track IDs for the next batch
+        self.flusher = None  # Handle sending the pending batch
+
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0  # Batch requests made
+        self.fetched = 0  # Tracks returned by batch requests
 
         self.loop.create_task(self.get_token())  # validate token
 
@@ -173,11 +223,124 @@ class Spotify:
         return {"Authorization": "Basic %s" % auth_header.decode("ascii")}
 
     async def get_tracks(self, track_ids):
-        return [await self.get_track(track_id) for track_id in track_ids]
+        return await asyncio.gather(*(self.get_track(uri) for uri in track_ids))
 
     async def get_track(self, uri):
         """Get a track's info from its URI"""
-        return await self.make_spotify_req(self.API_BASE + "tracks/{0}".format(uri))
+        cached = self.tracks.get(uri)
+        if cached is not None and cached[0] > time.monotonic():
+            self.tracks.move_to_end(uri)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        if not self.ID_REGEX.match(uri):
+            # One bad ID would fail the whole batch.
+            raise exceptions.SpotifyError(f"Invalid track ID {uri}")
+        future = self.waiting.get(uri)
+        if future is None:
+            future = self.waiting[uri] = self.loop.create_future()
+            self.pending.append(uri)
+            if len(self.pending) >= SPOTIFY_BATCH_SIZE:
+                self.flush()
+            elif self.flusher is None:
+                self.flusher = self.loop.call_later(SPOTIFY_BATCH_WINDOW, self.flush)
+        # Shielded so one cancelled caller doesn't fail the others.
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Sends the pending track IDs as one request."""
+        if self.flusher is not None:
+            self.flusher.cancel()
+            self.flusher = None
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.loop.create_task(self.fetch_tracks(batch))
+
+    async def fetch_tracks(self, batch):
+        """Fetches a batch of tracks and hands them to their callers."""
+        self.requests += 1
+        error = None
+        try:
+            data = await self.make_spotify_req(
+                self.API_BASE + "tracks?ids={0}".format(",".join(batch))
+            )
+            expires = time.monotonic() + SPOTIFY_TTL
+            for uri, track in zip(batch, data["tracks"]):
+                future = self.waiting[uri]
+                if track is None:
+                    if not future.done():
+                        future.set_exception(
+                            exceptions.SpotifyError(f"Unknown track ID {uri}")
+                        )
+                    continue
+                track = self.compact(track)
+                self.tracks[uri] = (expires, track)
+                self.tracks.move_to_end(uri)
+                self.fetched += 1
+                if not future.done():
+                    future.set_result(track)
+        except Exception as e:
+            error = e
+        finally:
+            # Fail anything still waiting, from an error or a short response.
+            for uri in batch:
+                future = self.waiting.pop(uri, None)
+                if future is not None and not future.done():
+                    future.set_exception(
+                        error or exceptions.SpotifyError(f"No data for track ID {uri}")
+                    )
+            while len(self.tracks) > SPOTIFY_CACHE_SIZE:
+                self.tracks.popitem(last=False)
+
+    @staticmethod
+    def compact(track):
+        """Keeps the parts of a track the bot uses."""
+
+        def link(item):
+            return {
+                "id": item.get("id"),
+                "name": item.get("name"),
+                "external_urls": item.get("external_urls", {}),
+            }
+
+        return {
+            **link(track),
+            "duration_ms": track.get("duration_ms"),
+            "album": link(track["album"]),
+            "artists": [link(artist) for artist in track["artists"]],
+        }
+
+    async def get_items(self, page, *, limit=None):
+        """
+        Get every item of a paging object. The pages after
+        the first are requested at once instead of following
+        the next links one at a time.
+        """
+        total = page["total"] if limit is None else min(page["total"], limit)
+        base = page["href"].split("?")[0]
+        step = page["limit"] or len(page["items"])
+        pages = await asyncio.gather(
+            *(
+                self.make_spotify_req(f"{base}?offset={offset}&limit={step}")
+                for offset in range(page["offset"] + step, total, step)
+            )
+        )
+        items = list(page["items"])
+        for page in pages:
+            items.extend(page["items"])
+        return items[:total]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "tracks": len(self.tracks),
+            "hit rate": f"{self.hits / lookups:.1%}" if lookups else "0.0%",
+            "batches": self.requests,
+            "tracks/batch": f"{self.fetched / self.requests:.1f}"
+            if self.requests
+            else "0.0",
+        }
 
     async def get_album(self, uri):
         """Get an album's info from its URI"""
@@ -232,17 +395,18 @@ class Spotify:
 
     async def get_token(self):
         """Gets the token or creates a new one if expired"""
-        if self.token and not await self.check_token(self.token):
-            return self.token["access_token"]
+        async with self.token_lock:  # Concurrent requests share one refresh
+            if self.token and not await self.check_token(self.token):
+                return self.token["access_token"]
 
-        token = await self.request_token()
-        if token is None:
-            raise exceptions.SpotifyError(
-                "Requested a token from Spotify, did not end up getting one"
-            )
-        token["expires_at"] = int(time.time()) + token["expires_in"]
-        self.token = token
-        return self.token["access_token"]
+            token = await self.request_token()
+            if token is None:
+                raise exceptions.SpotifyError(
+                    "Requested a token from Spotify, did not end up getting one"
+                )
+            token["expires_at"] = int(time.time()) + token["expires_in"]
+            self.token = token
+            return self.token["access_token"]
 
     async def check_token(self, token):
         """Checks a token is valid"""
@@ -271,19 +435,27 @@ class MusicUtils:
 
     def spotify(bot):
         """
-        Create utiliites.spotify.Spotify() instance
+        Get the shared Spotify() instance, created
         from credentials found in ./config.json
         """
         client_id = MusicUtils.get_key("spotify_client_id")
         client_secret = MusicUtils.get_key("spotify_client_secret")
 
         if client_id and client_secret:
-            return Spotify(
-                client_id=client_id,
-                client_secret=client_secret,
-                aiosession=bot.session,
-                loop=bot.loop,
-            )
+            shared = Spotify.shared
+            if (
+                shared is None
+                or shared.aiosession is not bot.session
+                or (shared.client_id, shared.client_secret)
+                != (client_id, client_secret)
+            ):
+                Spotify.shared = Spotify(
+                    client_id=client_id,
+                    client_secret=client_secret,
+                    aiosession=bot.session,
+                    loop=bot.loop,
+                )
+            return Spotify.shared
 
     def parse_duration(duration: int):
         """
@@ -628,17 +800,27 @@ class QueueEntry:
     """
     QueueEntry object for enqueueing tracks.
     All TrackQueue objects are type QueueEntry
+    Entries only keep what's needed to find the track again.
+    The ytdl data lives in the extraction cache until the
+    track is about to play. The context is shared with
+    every other entry queued by the same command.
     """
 
-    def __init__(self, ctx, title, search, *, data=None, uploader=None, link=None):
+    __slots__ = ("ctx", "requester_id", "title", "search", "uploader", "link", "url")
+
+    def __init__(self, ctx, title, search, *, uploader=None, link=None):
         self.ctx = ctx
-        self.requester = ctx.author
+        self.requester_id = ctx.author.id
         self.title = title
         self.search = search
 
-        self.data = data
         self.uploader = uploader
         self.link = link
+        self.url = None  # Youtube url found for a search
+
+    @classmethod
+    def from_source(cls, source):
+        return cls(source.ctx, source.title, source.url, uploader=source.uploader)
 
     def __str__(self):
         if self.uploader:
@@ -659,10 +841,22 @@ class QueueEntry:
         return f"**[{self.title}]({self.link or self.search})**"
 
     @property
-    def has_data(self):
-        if self.data:
-            return True
-        return False
+    def requester(self):
+        return self.ctx.author
+
+    @property
+    def query(self):
+        """What to extract to play the track."""
+        return self.url or self.search
+
+    @property
+    def needs_search(self):
+        return self.url is None and not self.search.startswith(("http:", "https:"))
+
+    @property
+    def spotify_id(self):
+        if self.link and "open.spotify.com/track/" in self.link:
+            return self.link.split("?")[0].rsplit("/", 1)[-1]
 
     @property
     def json(self):
@@ -694,6 +888,7 @@ class SavedTracks:
 
     @classmethod
     async def initialize_liked(cls, ctx, owner):
+        await HISTORY_WRITER.flush(ctx.bot.cxn)
         query = """
                 SELECT title, url, uploader
                 FROM saved WHERE requester_id = $1
@@ -739,6 +934,7 @@ class Playlist:
 
     @classmethod
     async def initialize(cls, ctx, owner, name: str):
+        await HISTORY_WRITER.flush(ctx.bot.cxn)  # Current uses and likes
         query = """
                 SELECT * FROM playlists
                 WHERE owner_id = $1
@@ -753,6 +949,7 @@ class Playlist:
 
     @classmethod
     async def get_playlists(cls, ctx, owner):
+        await HISTORY_WRITER.flush(ctx.bot.cxn)
         query = """
                 SELECT * FROM playlists
                 WHERE owner_id = $1
@@ -776,6 +973,8 @@ class Playlist:
         )
 
     async def delete(self):
+        # Pending counters would land on a new playlist with this name.
+        await HISTORY_WRITER.flush(self.bot.cxn)
         query = """
                 DELETE FROM playlists
                 WHERE owner_id = $1
@@ -793,13 +992,721 @@ class Playlist:
             )
 
     async def like(self):
+        HISTORY_WRITER.like_playlist(self.bot, self.owner.id, self.name.lower())
+
+
+class Histogram:
+    """
+    Counts durations in fixed buckets
+    to report rough percentiles cheaply.
+    """
+
+    BOUNDS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, percent):
+        if not self.total:
+            return "N/A"
+        target = self.total * percent / 100
+        count = 0
+        for bound, bucket in zip(self.BOUNDS, self.counts):
+            count += bucket
+            if count >= target:
+                return f"<={bound}s"
+        return f">{self.BOUNDS[-1]}s"
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+
+class ExtractionJob:
+    __slots__ = ("query", "process", "priority", "future", "queued_at", "started")
+
+    def __init__(self, query, process, priority):
+        self.query = query
+        self.process = process
+        self.priority = priority
+        self.future = asyncio.get_event_loop().create_future()
+        self.queued_at = time.monotonic()
+        self.started = False
+
+
+class ExtractionPool:
+    """
+    Runs youtube_dl on its own threads so big playlists
+    don't crowd the default executor out. YoutubeDL isn't
+    thread safe, so each thread gets its own instance.
+    Jobs wait in a priority queue, so the track about
+    to play skips ahead of background lookups, and
+    identical queries in flight share one job.
+    """
+
+    def __init__(self, workers=EXTRACTION_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.queue = None
+        self.tasks = []
+        self.inflight = {}  # cache key: ExtractionJob
+        self.local = threading.local()
+        self.counter = itertools.count()  # Keeps equal priorities in order
+        self.coalesced = 0
+        self.wait = Histogram()  # Time spent queued
+        self.latency = Histogram()  # Time spent extracting
+
+    def start(self):
+        if self.tasks:
+            return
+        self.executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="extractor"
+        )
+        self.queue = asyncio.PriorityQueue()
+        self.tasks = [
+            asyncio.ensure_future(self.worker()) for _ in range(self.workers)
+        ]
+
+    def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        for job in self.inflight.values():
+            job.future.cancel()
+        self.inflight.clear()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def extract_info(self, query, process):
+        """Runs on a pool thread."""
+        ytdl = getattr(self.local, "ytdl", None)
+        if ytdl is None:
+            ytdl = self.local.ytdl = youtube_dl.YoutubeDL(YTDL_OPTIONS)
+        info = ytdl.extract_info(query, download=False, process=process)
+        if info is None:
+            return None
+        # Flat playlists page in lazily, so compact here off the loop.
+        return ExtractionCache.compact(info)
+
+    async def submit(self, key, query, *, process=True, priority=PRIORITY_USER):
+        """
+        Returns the compacted extraction of a query.
+        Raises youtube_dl.DownloadError like extract_info.
+        """
+        self.start()
+        job = self.inflight.get(key)
+        if job is None:
+            job = self.inflight[key] = ExtractionJob(query, process, priority)
+            job.future.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.queue.put_nowait((priority, next(self.counter), job))
+        else:
+            self.coalesced += 1
+            if priority < job.priority and not job.started:
+                # Queue it again ahead, the worker skips the old entry.
+                job.priority = priority
+                self.queue.put_nowait((priority, next(self.counter), job))
+        return await asyncio.shield(job.future)
+
+    async def worker(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            if job.started or job.future.done():
+                continue
+            job.started = True
+            started = time.monotonic()
+            self.wait.add(started - job.queued_at)
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, self.extract_info, job.query, job.process
+                )
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.latency.add(time.monotonic() - started)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "in flight": len(self.inflight),
+            "coalesced": self.coalesced,
+            "wait p50": self.wait.percentile(50),
+            "wait p95": self.wait.percentile(95),
+            "latency p50": self.latency.percentile(50),
+            "latency p95": self.latency.percentile(95),
+            "latency avg": f"{self.latency.mean:.2f}s",
+        }
+
+
+EXTRACTION_POOL = ExtractionPool()
+
+
+class ExtractionCache:
+    """
+    Two tier cache of youtube_dl extractions.
+    Extractions are kept in an in memory LRU and in the
+    extractions table, keyed by the normalized query,
+    so popular tracks are extracted once across servers
+    and restarts. Only the fields the player uses are kept.
+    Stream urls expire, so extractions holding them are
+    stale once their url can't outlast the track (or half
+    its remaining life, for tracks longer than any url
+    lasts), and are extracted again before they fail.
+    """
+
+    KEEP = (
+        "_type",
+        "id",
+        "title",
+        "uploader",
+        "uploader_url",
+        "upload_date",
+        "thumbnail",
+        "description",
+        "duration",
+        "tags",
+        "webpage_url",
+        "view_count",
+        "like_count",
+        "dislike_count",
+        "url",
+    )
+    EXPIRE_REGEX = re.compile(r"[?&/]expire[=/](\d+)")
+    YOUTUBE_REGEX = re.compile(
+        r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/)|youtu\.be/)([\w-]{11})"
+    )
+
+    def __init__(self, maxsize=EXTRACTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()  # key: (fresh_until, data)
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.refreshes = 0  # Misses on stale extractions
+
+    def __len__(self):
+        return len(self.data)
+
+    @classmethod
+    def get_key(cls, query, process):
+        query = " ".join(query.split())
+        match = cls.YOUTUBE_REGEX.search(query)
+        if match:
+            query = "youtube:" + match.group(1)
+        elif not query.startswith(("http://", "https://")):
+            query = query.casefold()
+        return ("full:" if process else "flat:") + query
+
+    @classmethod
+    def compact(cls, data):
+        compact = {key: data[key] for key in cls.KEEP if data.get(key) is not None}
+        if data.get("entries") is not None:
+            compact["entries"] = [
+                cls.compact(entry) for entry in data["entries"] if entry
+            ]
+        return compact
+
+    @staticmethod
+    def hold(expires, duration, now):
+        """
+        Returns how long a stream url must stay valid to play
+        a track. No url can cover a track that outlasts it, so
+        the wait is capped at half of the url's remaining life.
+        """
+        return min(duration or 0, max(expires - now, 0) / 2)
+
+    @classmethod
+    def fresh_until(cls, data, process=True):
+        """
+        Returns the unix time an extraction stops being
+        usable. Stream urls must outlast the track they play.
+        """
+        now = time.time()
+        until = now + METADATA_TTL
+        if not process:
+            return until  # No stream urls were resolved
+        for info in [data] + data.get("entries", []):
+            if "webpage_url" not in info:
+                continue  # Flat entries, the url is a video ID
+            url = info.get("url")
+            if not url:
+                continue
+            match = cls.EXPIRE_REGEX.search(url)
+            if match is None:  # No real expiry to plan the track around
+                until = min(until, now + STREAM_TTL)
+                continue
+            expires = int(match.group(1))
+            hold = cls.hold(expires, info.get("duration"), now)
+            until = min(until, expires - hold - REFRESH_MARGIN)
+        return until
+
+    @classmethod
+    def is_fresh(cls, data):
+        return cls.fresh_until(data) > time.time()
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self.data[key]
+            self.refreshes += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, data, fresh_until):
+        self.data[key] = (fresh_until, data)
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    async def fetch(self, cxn, key):
+        query = """
+                SELECT data, expires
+                FROM extractions
+                WHERE key = $1
+                AND expires > $2
+                """
+        record = await cxn.fetchrow(query, key, time.time())
+        if record:
+            data = json.loads(record["data"])
+            self.set(key, data, record["expires"])
+            self.db_hits += 1
+            return data
+
+    async def store(self, cxn, key, data, fresh_until):
+        query = """
+                INSERT INTO extractions (key, data, expires)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (key)
+                DO UPDATE SET data = $2, expires = $3,
+                insertion = (NOW() AT TIME ZONE 'UTC')
+                """
+        try:
+            await cxn.execute(query, key, json.dumps(data), fresh_until)
+        except Exception as e:
+            log.warning(f"Unable to store extraction {key}: {e}")
+
+    async def invalidate(self, bot, query):
+        """Forgets a full extraction, like one with a forbidden url."""
+        key = self.get_key(query, True)
+        self.data.pop(key, None)
+        if bot.cxn:
+            query = """
+                    DELETE FROM extractions
+                    WHERE key = $1
+                    """
+            await bot.cxn.execute(query, key)
+
+    async def prune(self, cxn):
+        query = """
+                DELETE FROM extractions
+                WHERE expires <= $1
+                """
+        await cxn.execute(query, time.time())
+
+    async def extract(self, bot, query, *, process=True, priority=PRIORITY_USER):
+        """
+        Returns the compacted extraction of a query,
+        extracting it only when neither tier has it.
+        Raises youtube_dl.DownloadError like extract_info.
+        """
+        key = self.get_key(query, process)
+        data = self.get(key)
+        if data is not None:
+            return data
+        if bot.cxn:
+            data = await self.fetch(bot.cxn, key)
+            if data is not None:
+                return data
+
+        self.misses += 1
+        data = await EXTRACTION_POOL.submit(
+            key, query, process=process, priority=priority
+        )
+        if data is not None:
+            self.remember(bot, key, data, process)
+        return data
+
+    def remember(self, bot, key, data, process=True):
+        fresh_until = self.fresh_until(data, process)
+        if fresh_until <= time.time():
+            return  # Already stale, caching it would only cost a lookup
+        self.set(key, data, fresh_until)
+        if bot.cxn:  # Keep the write off the playback path
+            bot.loop.create_task(self.store(bot.cxn, key, data, fresh_until))
+
+    def add(self, bot, query, data):
+        """Caches a full extraction found through another query."""
+        self.remember(bot, self.get_key(query, True), data)
+
+    def stats(self):
+        total = self.hits + self.db_hits + self.misses
+        rate = (self.hits + self.db_hits) / total if total else 0.0
+        return {
+            "hits": self.hits,
+            "db hits": self.db_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit rate": f"{rate:.2%}",
+            "size": len(self),
+        }
+
+
+EXTRACTION_CACHE = ExtractionCache()
+
+
+class StreamValidator:
+    """
+    Checks stream urls before they're handed to FFmpeg.
+    Urls that would expire before the track ends (see
+    ExtractionCache.hold) fail without a request, and
+    urls checked recently pass without one.
+    Everything else gets a HEAD request,
+    or a one byte ranged GET when the server doesn't
+    allow HEAD, instead of opening the whole stream.
+    """
+
+    def __init__(self, ttl=VALIDATION_TTL, maxsize=VALIDATION_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.recent = OrderedDict()  # url: checked at
+        self.expired = 0
+        self.cached = 0
+        self.requests = 0
+        self.forbidden = 0
+
+    @staticmethod
+    def is_expired(url, duration=0):
+        match = ExtractionCache.EXPIRE_REGEX.search(url)
+        if match is None:
+            return False
+        # Tracks longer than a url lasts only need it to be live
+        # for a while, which any fresh url will be.
+        now = time.time()
+        expires = int(match.group(1))
+        hold = max(ExtractionCache.hold(expires, duration, now), REFRESH_MARGIN)
+        return expires - hold <= now
+
+    def remember(self, url):
+        self.recent[url] = time.monotonic()
+        self.recent.move_to_end(url)
+        if len(self.recent) > self.maxsize:
+            self.recent.popitem(last=False)
+
+    async def check(self, session, url, *, duration=0):
+        """Returns False if the url is expired or forbidden."""
+        if self.is_expired(url, duration):
+            self.expired += 1
+            return False
+
+        checked = self.recent.get(url)
+        if checked is not None and time.monotonic() - checked < self.ttl:
+            self.cached += 1
+            return True
+
+        self.requests += 1
+        async with session.head(url, allow_redirects=True) as r:
+            status = r.status
+        if status in (405, 501):  # HEAD isn't supported
+            headers = {"Range": "bytes=0-0"}
+            async with session.get(url, headers=headers) as r:
+                status = r.status
+
+        if status == 403:  # Forbidden stream url.
+            self.forbidden += 1
+            self.recent.pop(url, None)
+            return False
+        self.remember(url)
+        return True
+
+    def stats(self):
+        return {
+            "expired": self.expired,
+            "cached": self.cached,
+            "requests": self.requests,
+            "forbidden": self.forbidden,
+            "size": len(self.recent),
+        }
+
+
+STREAM_VALIDATOR = StreamValidator()
+
+
+class SearchResolver:
+    """
+    Finds the youtube videos for queued searches, like the
+    tracks of a Spotify album or playlist, before they reach
+    the front of the queue. The video found for a Spotify
+    track is remembered in memory and in postgres, so each
+    track is only ever searched for once.
+    """
+
+    def __init__(self, size=SPOTIFY_CACHE_SIZE):
+        self.size = size
+        self.videos = OrderedDict()  # spotify track_id: youtube video_id
+        self.missed = set()  # Searches without results, left to the player
+        self.searches = 0
+        self.known = 0  # Tracks that didn't need a search
+
+    @staticmethod
+    def get_url(video_id):
+        return "https://www.youtube.com/watch?v=" + video_id
+
+    def wants(self, entry):
+        """Returns True if an entry should be searched for."""
+        return entry.needs_search and entry.search not in self.missed
+
+    def remember(self, track_id, video_id):
+        self.videos[track_id] = video_id
+        self.videos.move_to_end(track_id)
+        while len(self.videos) > self.size:
+            self.videos.popitem(last=False)
+
+    async def lookup(self, cxn, track_ids):
+        """Returns the known videos of spotify tracks."""
+        found = {}
+        missing = []
+        for track_id in track_ids:
+            video_id = self.videos.get(track_id)
+            if video_id is None:
+                missing.append(track_id)
+            else:
+                self.videos.move_to_end(track_id)
+                found[track_id] = video_id
+
+        if missing and cxn:
+            query = """
+                    SELECT track_id, video_id
+                    FROM spotify_videos
+                    WHERE track_id = ANY($1::TEXT[])
+                    """
+            for record in await cxn.fetch(query, missing):
+                self.remember(record["track_id"], record["video_id"])
+                found[record["track_id"]] = record["video_id"]
+        self.known += len(found)
+        return found
+
+    async def search(self, bot, query):
+        """Returns the ID of the first youtube video for a search."""
+        self.searches += 1
+        try:
+            info = await EXTRACTION_CACHE.extract(
+                bot, "ytsearch1:" + query, process=False, priority=PRIORITY_SEARCH
+            )
+        except Exception as e:
+            log.warning(f"Unable to search for {query}: {e}")
+            info = None
+        entry = next(iter(info.get("entries") or []), None) if info else None
+        if entry is None or not entry.get("id"):
+            if len(self.missed) >= self.size:
+                self.missed.clear()
+            self.missed.add(query)
+            return None
+        return entry["id"]
+
+    async def store(self, cxn, videos):
+        """Saves spotify track to video mappings with one statement."""
+        for track_id, video_id in videos.items():
+            self.remember(track_id, video_id)
+        if not videos or not cxn:
+            return
+        query = """
+                INSERT INTO spotify_videos (track_id, video_id)
+                SELECT x.track_id, x.video_id
+                FROM JSONB_TO_RECORDSET($1::JSONB)
+                AS x(track_id TEXT, video_id TEXT)
+                ON CONFLICT (track_id)
+                DO UPDATE SET video_id = EXCLUDED.video_id
+                """
+        data = json.dumps(
+            [
+                {"track_id": track_id, "video_id": video_id}
+                for track_id, video_id in videos.items()
+            ]
+        )
+        try:
+            await cxn.execute(query, data)
+        except Exception as e:
+            log.warning(f"Unable to store spotify videos: {e}")
+
+    async def forget(self, cxn, track_id):
+        """Drops the video of a spotify track that can't be played anymore."""
+        self.videos.pop(track_id, None)
+        if not cxn:
+            return
+        query = """
+                DELETE FROM spotify_videos
+                WHERE track_id = $1
+                """
+        try:
+            await cxn.execute(query, track_id)
+        except Exception as e:
+            log.warning(f"Unable to forget spotify video: {e}")
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "failures": len(self.missed),
+            "known tracks": self.known,
+            "size": len(self.videos),
+        }
+
+
+SEARCH_RESOLVER = SearchResolver()
+
+
+class HistoryWriter:
+    """
+    Collects played tracks, saved tracks and playlist
+    counters in memory and writes them all with one
+    statement, so playback never waits on postgres.
+    Rows that fail to write are kept for the next try.
+    Commands that read these tables flush it first.
+    """
+
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.limit = limit
+        self.tracks = []  # Rows for the tracks table
+        self.saved = []  # Rows for the saved table
+        self.uses = Counter()  # (owner_id, name): Playlist uses
+        self.likes = Counter()  # (owner_id, name): Playlist likes
+        self.lock = asyncio.Lock()  # Readers wait on a flush in progress
+
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0  # Rows over the limit while failing
+
+    def __len__(self):
+        return len(self.tracks) + len(self.saved) + len(self.uses) + len(self.likes)
+
+    @staticmethod
+    def get_row(ytdl, requester_id):
+        return {
+            "requester_id": requester_id,
+            "title": ytdl.title,
+            "url": ytdl.url,
+            "uploader": ytdl.uploader,
+            "insertion": str(datetime.utcnow()),
+        }
+
+    def add_track(self, bot, ytdl):
+        """Records a played track."""
+        self.tracks.append(self.get_row(ytdl, ytdl.requester.id))
+        self.check(bot)
+
+    def add_saved(self, bot, ytdl, requester_id):
+        """Records a track saved to someone's liked songs."""
+        self.saved.append(self.get_row(ytdl, requester_id))
+        self.check(bot)
+
+    def use_playlist(self, bot, owner_id, name):
+        self.uses[(owner_id, name)] += 1
+        self.check(bot)
+
+    def like_playlist(self, bot, owner_id, name):
+        self.likes[(owner_id, name)] += 1
+        self.check(bot)
+
+    def check(self, bot):
+        if len(self) >= HISTORY_BATCH and bot.cxn:
+            bot.loop.create_task(self.flush(bot.cxn))
+
+    async def flush(self, cxn):
+        """
+        Writes everything collected so far.
+        Flushes run one at a time, so once this returns,
+        rows taken by an earlier flush are written too.
+        """
+        async with self.lock:
+            await self.write(cxn)
+
+    async def write(self, cxn):
+        if not len(self) or not cxn:
+            return
+
+        tracks, self.tracks = self.tracks, []
+        saved, self.saved = self.saved, []
+        uses, self.uses = self.uses, Counter()
+        likes, self.likes = self.likes, Counter()
+        counters = [
+            {"owner_id": key[0], "name": key[1], "uses": uses[key], "likes": likes[key]}
+            for key in uses.keys() | likes.keys()
+        ]
+
         query = """
+                WITH played AS (
+                    INSERT INTO tracks (requester_id, title, url, uploader, insertion)
+                    SELECT x.requester_id, x.title, x.url, x.uploader, x.insertion
+                    FROM JSONB_TO_RECORDSET($1::JSONB)
+                    AS x(
+                        requester_id BIGINT, title TEXT, url TEXT,
+                        uploader TEXT, insertion TIMESTAMP
+                    )
+                ), liked AS (
+                    INSERT INTO saved (requester_id, title, url, uploader, insertion)
+                    SELECT x.requester_id, x.title, x.url, x.uploader, x.insertion
+                    FROM JSONB_TO_RECORDSET($2::JSONB)
+                    AS x(
+                        requester_id BIGINT, title TEXT, url TEXT,
+                        uploader TEXT, insertion TIMESTAMP
+                    )
+                )
                 UPDATE playlists
-                SET likes = likes + 1
-                WHERE owner_id = $1
-                AND name = $2
+                SET uses = playlists.uses + x.uses,
+                likes = playlists.likes + x.likes
+                FROM JSONB_TO_RECORDSET($3::JSONB)
+                AS x(owner_id BIGINT, name TEXT, uses BIGINT, likes BIGINT)
+                WHERE playlists.owner_id = x.owner_id
+                AND playlists.name = x.name
                 """
-        await self.bot.cxn.execute(query, self.owner.id, self.name.lower())
+        try:
+            await cxn.execute(
+                query, json.dumps(tracks), json.dumps(saved), json.dumps(counters)
+            )
+        except Exception as e:
+            log.warning(f"Unable to write track history: {e}")
+            self.failures += 1
+            # Put the rows back in front of anything added since.
+            self.tracks[:0] = tracks
+            self.saved[:0] = saved
+            self.uses.update(uses)
+            self.likes.update(likes)
+            overflow = len(self.tracks) - self.limit
+            if overflow > 0:  # Lose the oldest history before anything else
+                del self.tracks[:overflow]
+                self.dropped += overflow
+            return
+
+        self.flushes += 1
+        self.written += len(tracks) + len(saved) + len(counters)
+
+    def stats(self):
+        return {
+            "pending": len(self),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+
+HISTORY_WRITER = HistoryWriter()
 
 
 class YTDLSource:
@@ -829,6 +1736,7 @@ class YTDLSource:
         self.likes = data.get("like_count", 0)
         self.dislikes = data.get("dislike_count", 0)
         self.stream_url = data.get("url")
+        self.validated = False  # Stream url was checked for a 403
 
     @property
     def hyperlink(self):
@@ -844,27 +1752,25 @@ class YTDLSource:
         return "**{0.title}** by **{0.uploader}**".format(self)
 
     @classmethod
-    async def get_source(cls, ctx, url, *, loop=None):
+    async def get_source(cls, ctx, url, *, loop=None, priority=PRIORITY_NEXT):
         """
         Takes a search query and returns the first result.
         """
-        loop = loop or asyncio.get_event_loop()
-
-        partial = functools.partial(YOUTUBE_DL.extract_info, url, download=False)
         processed_info = None  # TODO fix this system
         try:
-            processed_info = await loop.run_in_executor(None, partial)
+            processed_info = await EXTRACTION_CACHE.extract(
+                ctx.bot, url, priority=priority
+            )
         except youtube_dl.DownloadError as e:
             if "urlopen error unknown url type" in str(e):
                 log.warning("Suspected error caused by colon in search query.")
                 try:
-                    partial = functools.partial(
-                        YOUTUBE_DL.extract_info,
+                    processed_info = await EXTRACTION_CACHE.extract(
+                        ctx.bot,
                         url.replace(":", ""),
-                        download=False,
                         process=False,
+                        priority=priority,
                     )
-                    processed_info = await loop.run_in_executor(None, partial)
                     log.info("Attempting re-searching with altered url.")
                 except Exception as e:
                     log.error(f"Re-searching failed: {e}")
@@ -877,19 +1783,15 @@ class YTDLSource:
         if "entries" not in processed_info:
             data = processed_info
         else:
-            data = None
-            while data is None:
-                try:
-                    data = processed_info["entries"].pop(0)
-                except IndexError:
-                    raise exceptions.YTDLError(
-                        f"Unable to retrieve matches for `{url}`"
-                    )
+            # Cached extractions are shared, so don't pop the entries.
+            data = next(iter(processed_info["entries"]), None)
+            if data is None:
+                raise exceptions.YTDLError(f"Unable to retrieve matches for `{url}`")
 
         return cls(ctx, data)
 
     @staticmethod
-    async def get_song(ctx, search, *, loop=None):
+    async def get_song(ctx, search, *, loop=None, priority=PRIORITY_USER):
         """
         Get the song url and title from a search query.
         If the search query is a youtube video url,
@@ -898,28 +1800,21 @@ class YTDLSource:
         A QueueEntry will be returned with the data
         parameter including the full webpage data.
         """
-        loop = loop or asyncio.get_event_loop()
-
-        partial = functools.partial(
-            YOUTUBE_DL.extract_info,
-            search,
-            download=False,
-            process=False,
-        )
         info = None  # TODO fix this system
         try:
-            info = await loop.run_in_executor(None, partial)
+            info = await EXTRACTION_CACHE.extract(
+                ctx.bot, search, process=False, priority=priority
+            )
         except youtube_dl.DownloadError as e:
             if "urlopen error unknown url type" in str(e):
                 log.warning("Suspected error caused by colon in search query.")
                 try:
-                    partial = functools.partial(
-                        YOUTUBE_DL.extract_info,
+                    info = await EXTRACTION_CACHE.extract(
+                        ctx.bot,
                         search.replace(":", ""),
-                        download=False,
                         process=False,
+                        priority=priority,
                     )
-                    info = await loop.run_in_executor(None, partial)
                     log.info("Attempting re-searching with altered url.")
                 except Exception as e:
                     log.error(f"Re-searching failed: {e}")
@@ -935,11 +1830,10 @@ class YTDLSource:
         uploader = info.get("uploader")
 
         if not title:  # Was probably not a url
-            partial = functools.partial(
-                YOUTUBE_DL.extract_info, info["webpage_url"], download=False
-            )
             try:
-                processed_info = await loop.run_in_executor(None, partial)
+                processed_info = await EXTRACTION_CACHE.extract(
+                    ctx.bot, info["webpage_url"], priority=priority
+                )
             except youtube_dl.DownloadError as e:
                 if "This video may be inappropriate for some users." in str(e):
                     raise exceptions.YTDLError("Unable to play age restricted videos.")
@@ -954,14 +1848,11 @@ class YTDLSource:
             if "entries" not in processed_info:
                 data = processed_info
             else:
-                data = None
-                while data is None:
-                    try:
-                        data = processed_info["entries"].pop(0)
-                    except IndexError as e:
-                        raise exceptions.YTDLError(
-                            f"Unable to retrieve matches for `{processed_info['webpage_url']}`"
-                        )
+                data = next(iter(processed_info["entries"]), None)
+                if data is None:
+                    raise exceptions.YTDLError(
+                        f"Unable to retrieve matches for `{processed_info['webpage_url']}`"
+                    )
 
             url = data.get("webpage_url")
             title = data.get("title")
@@ -970,20 +1861,19 @@ class YTDLSource:
             if title is None or url is None:
                 raise exceptions.YTDLError(f"Unable to fetch `{search}`")
 
-        return QueueEntry(ctx, title, url, data=data, uploader=uploader)
+        if data is not None:  # Play it without searching again
+            EXTRACTION_CACHE.add(ctx.bot, url, data)
+        return QueueEntry(ctx, title, url, uploader=uploader)
 
     @staticmethod
-    async def get_playlist_tracks(ctx, search, *, loop=None):
+    async def get_playlist_tracks(ctx, search, *, loop=None, priority=PRIORITY_USER):
         """
         Takes a youtube playlist url and returns a list of
         QueueEntry(track) for each track in the playlist.
         """
-        loop = loop or asyncio.get_event_loop()
-
-        partial = functools.partial(
-            YOUTUBE_DL.extract_info, search, download=False, process=False
+        info = await EXTRACTION_CACHE.extract(
+            ctx.bot, search, process=False, priority=priority
         )
-        info = await loop.run_in_executor(None, partial)
 
         if info is None:
             raise exceptions.YTDLError(f"No matches found for `{search}`")
@@ -1024,14 +1914,9 @@ class YTDLSource:
         with up to ten youtube videos to choose from.
         If a selection is made, QueueEntry is returned.
         """
-        loop = loop or asyncio.get_event_loop()
-
         search_query = "%s%s:%s" % ("ytsearch", 10, "".join(search))
 
-        partial = functools.partial(
-            YOUTUBE_DL.extract_info, search_query, download=False, process=False
-        )
-        info = await loop.run_in_executor(None, partial)
+        info = await EXTRACTION_CACHE.extract(ctx.bot, search_query, process=False)
 
         lst = []
         count = 0
@@ -1081,16 +1966,12 @@ class YTDLSource:
                         if key == "entries":
                             VId = e_list[sel - 1]["id"]
                             VUrl = "https://www.youtube.com/watch?v=%s" % (VId)
-                            partial = functools.partial(
-                                YOUTUBE_DL.extract_info, VUrl, download=False
-                            )
-                            data = await loop.run_in_executor(None, partial)
+                            data = await EXTRACTION_CACHE.extract(ctx.bot, VUrl)
 
                     rtrn = QueueEntry(
                         ctx,
                         data["title"],
                         data["webpage_url"],
-                        data=data,
                         uploader=data["uploader"],
                     )
                 else:
@@ -1107,8 +1988,13 @@ class TrackQueue(asyncio.Queue):
     Queue for all tracks to be played.
     All items within the queue will be of type QueueEntry.
     Supports both asyncio.Queue and collections.deque operations.
+    Calls on_edit whenever tracks are added, moved or removed.
     """
 
+    def __init__(self, *args, on_edit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_edit = on_edit
+
     def __getitem__(self, item):
         if isinstance(item, slice):
             return deque(
@@ -1123,18 +2009,30 @@ class TrackQueue(asyncio.Queue):
     def __len__(self):
         return self.qsize()
 
+    def _put(self, item):
+        super()._put(item)
+        self.edited()
+
+    def edited(self):
+        if self.on_edit is not None:
+            self.on_edit()
+
     def clear(self):
         self._queue.clear()
+        self.edited()
 
     def shuffle(self):
         random.shuffle(self._queue)
+        self.edited()
 
     def remove(self, index: int):
         del self._queue[index]
+        self.edited()
 
     def pop(self, index: int):
         song = self._queue[index]
         del self._queue[index]
+        self.edited()
         return song
 
     def insert(self, index: int, item):
@@ -1142,12 +2040,14 @@ class TrackQueue(asyncio.Queue):
             self.put_nowait(item)
         else:
             self._queue.insert(index, item)
+            self.edited()
 
     def append_left(self, item):
         if len(self) == 0:
             self.put_nowait(item)
         else:
             self._queue.appendleft(item)
+            self.edited()
 
     def extend(self, items):
         if len(self) == 0:
@@ -1155,6 +2055,7 @@ class TrackQueue(asyncio.Queue):
             self._queue.extend(items)
         else:
             self._queue.extend(items)
+        self.edited()
 
     def extend_left(self, items):
         if len(self) == 0:
@@ -1164,32 +2065,40 @@ class TrackQueue(asyncio.Queue):
         else:
             items.reverse()
             self._queue.extendleft(items)
+            self.edited()
 
     def reverse(self):
         self._queue.reverse()
+        self.edited()
 
     def skipto(self, place):
         entry = self._queue[place]
         self._queue = self[place + 1 :]
+        self.edited()
         return entry
 
     def deduplicate(self):
         self._queue = deque(set(self))
+        self.edited()
 
     def leave_cleanup(self, users):
+        user_ids = {user.id for user in users}
         for entry in list(self._queue):
-            if entry.requester not in users:
+            if entry.requester_id not in user_ids:
                 self._queue.remove(entry)
+        self.edited()
 
     def dequeue(self, user):
         for entry in list(self._queue):
-            if entry.requester == user:
+            if entry.requester_id == user.id:
                 self._queue.remove(entry)
+        self.edited()
 
     def clear_range(self, start, end):
         queue = list(self._queue)
         del queue[start - 1 : end]
         self._queue = deque(queue)
+        self.edited()
 
     def shuffle_range(self, start, end):
         queue = list(self._queue)
@@ -1197,6 +2106,7 @@ class TrackQueue(asyncio.Queue):
         random.shuffle(to_shuffle)
         queue[start - 1 : end] = to_shuffle
         self._queue = deque(queue)
+        self.edited()
 
     def reverse_range(self, start, end):
         queue = list(self._queue)
@@ -1204,6 +2114,7 @@ class TrackQueue(asyncio.Queue):
         to_reverse.reverse()
         queue[start - 1 : end] = to_reverse
         self._queue = deque(queue)
+        self.edited()
 
 
 class VoiceClient(discord.VoiceClient):
@@ -1220,7 +2131,9 @@ class VoiceClient(discord.VoiceClient):
             # a channel move and an actual force disconnect
             if channel_id is None:
                 # We're being disconnected so cleanup
-                await VOICE_STATES[self.guild.id].stop()
+                state = VOICE_STATES.get(self.guild.id)
+                if state:  # Not already stopped or reaped
+                    await state.stop()
             else:
                 guild = self.guild
                 self.channel = channel_id and guild and guild.get_channel(int(channel_id))  # type: ignore
@@ -1232,12 +2145,35 @@ class AudioSource(discord.PCMVolumeTransformer):
     """
     Takes a ytdl source and player settings
     and returns a FFmpegPCMAudio source.
+    The position is worked out from the frames
+    the voice client has read, so it stops while
+    paused and never drifts from what was played.
     """
 
     def __init__(self, ytdl, volume, position: float = 0.0, **kwargs):
         self.ytdl = ytdl
-        self.position = position
-        self.rate = speed = kwargs.get("speed", 1)
+        self.offset = position  # Where in the track this source started
+        self.frames = 0  # Frames read by the voice client
+        speed = kwargs.get("speed", 1)
+        pitch = kwargs.get("pitch", 1)
+        # Seconds of the track played per second of audio. Pitch keeps
+        # the speed, nightcore's asetrate speeds the track up.
+        self.rate = speed * 1.1 if kwargs.get("nightcore") else speed
+        self.filters = self.get_filters(**kwargs)
+
+        ffmpeg_options = {
+            "before_options": FFMPEG_OPTION_BASE + f" -ss {position}",
+            "options": f'-vn -af:a "{self.filters}"',
+        }
+
+        self.original = discord.FFmpegPCMAudio(ytdl.stream_url, **ffmpeg_options)
+        super().__init__(self.original, volume=volume)
+        PLAYBACK_STATS.spawns += 1
+
+    @staticmethod
+    def get_filters(**kwargs):
+        """Returns the FFmpeg filter graph for a set of effects."""
+        speed = kwargs.get("speed", 1)
         pitch = kwargs.get("pitch", 1)
 
         s_filter = f"atempo=sqrt({speed}/{pitch}),atempo=sqrt({speed}/{pitch})"
@@ -1261,47 +2197,173 @@ class AudioSource(discord.PCMVolumeTransformer):
         }
 
         effects = "".join([y for x, y in filters.items() if kwargs.get(x)])
-        ffmpeg_options = {
-            "before_options": FFMPEG_OPTION_BASE + f" -ss {position}",
-            "options": f'-vn -af:a "{base + effects}"',
-        }
+        return base + effects
 
-        self.original = discord.FFmpegPCMAudio(ytdl.stream_url, **ffmpeg_options)
-        super().__init__(self.original, volume=volume)
+    @property
+    def position(self):
+        return self.offset + self.frames * FRAME_SECONDS * self.rate
+
+    def read(self):
+        data = super().read()
+        if data:
+            self.frames += 1
+        return data
 
     @staticmethod
     async def save(ytdl, volume, position=0, **kwargs):
         """Returns a class instance and saves track."""
-        cxn = ytdl.ctx.bot.cxn
-        if cxn:
-            query = """
-                    INSERT INTO tracks (requester_id, title, url, uploader)
-                    VALUES ($1, $2, $3, $4)
-                    """
-            await cxn.execute(
-                query, ytdl.requester.id, ytdl.title, ytdl.url, ytdl.uploader
-            )
+        HISTORY_WRITER.add_track(ytdl.ctx.bot, ytdl)  # Written in the background
         return await AudioSource.check_source(ytdl, volume, position, **kwargs)
 
     @classmethod
     async def check_source(cls, ytdl, volume, position, **kwargs):
-        asession = ytdl.ctx.bot.session
-        async with asession.get(str(ytdl.stream_url)) as r:
-            if r.status == 403:  # Forbidden stream url.
-                log.info("Forbidden Stream URL. Redownloading...")
-
-                ctx = ytdl.ctx
-                url = ytdl.url
-                loop = ytdl.ctx.bot.loop
-                try:
-                    ytdl = await YTDLSource.get_source(ctx, url, loop=loop)
-                except exceptions.YTDLError as e:
-                    log.error(f"Redownload failed: {e}")
-                    return
-                else:
-                    log.info("Redownload successful")
+        if not ytdl.validated or not EXTRACTION_CACHE.is_fresh(ytdl.data):
+            ytdl = await cls.validate(ytdl)
+            if ytdl is None:
+                return
         return cls(ytdl, volume, position, **kwargs)
 
+    @staticmethod
+    async def validate(ytdl):
+        """
+        Returns a source with a playable stream url,
+        or None if a forbidden url can't be replaced.
+        """
+        valid = await STREAM_VALIDATOR.check(
+            ytdl.ctx.bot.session,
+            str(ytdl.stream_url),
+            duration=ytdl.raw_duration or 0,
+        )
+        if not valid:
+            log.info("Expired or forbidden stream url. Redownloading...")
+
+            ctx = ytdl.ctx
+            url = ytdl.url
+            loop = ytdl.ctx.bot.loop
+            # Don't get the same url back from the cache.
+            await EXTRACTION_CACHE.invalidate(ctx.bot, url)
+            try:
+                ytdl = await YTDLSource.get_source(ctx, url, loop=loop)
+            except exceptions.YTDLError as e:
+                log.error(f"Redownload failed: {e}")
+                return
+            else:
+                log.info("Redownload successful")
+        ytdl.validated = True
+        return ytdl
+
+
+class PlaybackStats:
+    """
+    Counts the FFmpeg processes and player threads
+    started for playback, and the ones avoided by
+    switching tracks inside a running pipeline.
+    """
+
+    def __init__(self):
+        self.spawns = 0  # FFmpeg processes started
+        self.players = 0  # Player threads started
+        self.switches = 0  # Tracks started without a new player
+        self.skipped = 0  # Respawns avoided because nothing changed
+        self.frames = 0  # Frames played
+
+    @property
+    def hours(self):
+        return self.frames * FRAME_SECONDS / 3600
+
+    def stats(self):
+        hours = self.hours
+        return {
+            "hours played": f"{hours:.2f}",
+            "ffmpeg spawns": self.spawns,
+            "spawns/hour": f"{self.spawns / hours:.1f}" if hours else "0.0",
+            "player threads": self.players,
+            "gapless switches": self.switches,
+            "respawns avoided": self.skipped,
+        }
+
+
+PLAYBACK_STATS = PlaybackStats()
+
+
+class Pipeline(discord.AudioSource):
+    """
+    The audio a voice client plays for a whole session.
+    The playing source can be swapped without stopping
+    the player thread, and the next track can be queued
+    up ahead of time so it starts on the very next frame.
+    Only the playing source is cleaned up with the
+    pipeline, the voice state owns the queued one.
+    """
+
+    def __init__(self, source, *, on_switch=None):
+        self.source = source
+        self.upcoming = None
+        self.on_switch = on_switch  # Called from the player thread
+        self.lock = threading.Lock()  # Only held to swap references
+        self.reading = None  # Source the player thread is reading
+        self.retired = None  # Swapped out mid read, cleaned up after it
+
+    def read(self):
+        with self.lock:
+            source = self.reading = self.source
+        data = source.read()
+
+        switched = None
+        with self.lock:
+            self.reading = None
+            retired, self.retired = self.retired, None
+            if not data and self.source is source and self.upcoming is not None:
+                retired = source
+                self.source, self.upcoming = self.upcoming, None
+                switched = self.source
+            current = self.source
+
+        if retired is not None:
+            retired.cleanup()
+        if switched is not None:
+            PLAYBACK_STATS.switches += 1
+            if self.on_switch is not None:
+                self.on_switch(switched)
+        if not data and current is not source:
+            return self.read()  # Start on the new source right away
+        if data:
+            PLAYBACK_STATS.frames += 1
+        return data
+
+    def is_opus(self):
+        return False
+
+    def swap(self, source):
+        """Replaces the playing source."""
+        with self.lock:
+            old, self.source = self.source, source
+            if old is self.reading:
+                self.retired, old = old, None  # The reader cleans it up
+        if old is not None:
+            old.cleanup()
+
+    def queue(self, source):
+        """Sets the source to switch to when this one ends."""
+        with self.lock:
+            self.upcoming = source
+
+    def dequeue(self):
+        """
+        Takes back the queued source.
+        Returns None if it already started playing.
+        """
+        with self.lock:
+            source, self.upcoming = self.upcoming, None
+        return source
+
+    def cleanup(self):
+        self.source.cleanup()
+
+
+# Silence between queued tracks
+TRACK_GAPS = Histogram()
+
 
 class VoiceState:
     """
@@ -1327,7 +2389,16 @@ class VoiceState:
 
         self.skip_votes = set()  # Stored skip votes.
 
-        self.tracks = TrackQueue()
+        self.prefetched = {}  # QueueEntry: Task resolving a YTDLSource
+        self.pipeline = None  # What the voice client is playing
+        self.preloaded = None  # (QueueEntry, AudioSource) queued in the pipeline
+        self.preloader = None  # Task preloading the next track
+        self.searcher = None  # Task finding the videos of queued searches
+        self.active_at = time.monotonic()  # Last track end or command
+        self.ended_at = None  # When the last track finished
+        self.idle = False  # The queue ran dry before the next track
+
+        self.tracks = TrackQueue(on_edit=self.prefetch)
         self.next = asyncio.Event()
 
         self.bind = bind
@@ -1335,11 +2406,9 @@ class VoiceState:
         self.djlock = djlock
 
         self.audio_player = bot.loop.create_task(self.audio_player_task())
-        self.incrementer = bot.loop.create_task(self.increment_position())
 
     def __del__(self):
         self.audio_player.cancel()
-        self.incrementer.cancel()
 
     def __setitem__(self, key, value):
         if key == "speed":  # Assert valid speed range
@@ -1363,12 +2432,17 @@ class VoiceState:
 
     async def stop(self):
         self.tracks.clear()
+        for task in self.prefetched.values():
+            task.cancel()
+        self.prefetched.clear()
+        self.discard_preload()
+        if self.searcher is not None:
+            self.searcher.cancel()
         if self._ctx.guild.voice_client:
             await self._ctx.guild.voice_client.disconnect(force=True)
         self.audio_player.cancel()
-        self.incrementer.cancel()
 
-        del VOICE_STATES[self._ctx.guild.id]
+        VOICE_STATES.pop(self._ctx.guild.id, None)
 
     def clear_effects(self):
         self.effects.clear()
@@ -1412,6 +2486,8 @@ class VoiceState:
             raise commands.BadArgument("Volume must be between `0.0` and `100.0`")
         self._volume = value
         self.source.volume = value
+        if self.preloaded is not None:
+            self.preloaded[1].volume = value
 
     async def connect(self, channel, *, timeout=None):
         try:
@@ -1460,37 +2536,219 @@ class VoiceState:
         now = discord.FFmpegPCMAudio(fname)
         self.voice.play(now, after=self.play_next_track)
 
+    def play(self, source):
+        """Starts a player thread with a new pipeline."""
+        self.pipeline = Pipeline(source, on_switch=self.switched)
+        self.voice.play(self.pipeline, after=self.play_next_track)
+        PLAYBACK_STATS.players += 1
+
+    def switched(self, source):
+        # The pipeline moved on to the preloaded track by itself.
+        self.bot.loop.call_soon_threadsafe(self.play_next_track)
+
+    def is_live(self, source):
+        """Returns True if the running pipeline is playing a source."""
+        return (
+            self.pipeline is not None
+            and self.pipeline.source is source
+            and self.voice is not None
+            and self.voice.source is self.pipeline
+            and (self.voice.is_playing() or self.voice.is_paused())
+        )
+
     def alter_audio(self, *, position=None):
         if position is None:
+            filters = AudioSource.get_filters(**self.effects)
+            if filters == self.source.filters:
+                PLAYBACK_STATS.skipped += 1
+                return  # Nothing audible changed
             position = self.source.position
 
-        self.voice.pause()  # Pause the audio before altering
+        self.discard_preload()  # It has the old effects
+        if self.preloaded is not None:
+            return  # The next track just started
+        old = self.source
         self.source = AudioSource(self.current, self.volume, position, **self.effects)
-        self.voice.play(self.source, after=self.play_next_track)
-
-    async def get_next_track(self):
-        self.entry = await self.tracks.get()
-        if self.entry.has_data:
-            current = YTDLSource(self.entry.ctx, self.entry.data)
+        if self.is_live(old):
+            self.pipeline.swap(self.source)  # Keep the player, paused or not
         else:
+            self.play(self.source)
+        self.prefetch()
+
+    def prefetch(self):
+        """
+        Resolves and validates the next few tracks in the
+        background while the current track plays.
+        Tracks edited out of the window are dropped.
+        """
+        if self.preloaded is not None and self.preloaded[0] is not self.next_entry():
+            self.discard_preload()  # The queue or loop changed
+        if not self.is_playing:
+            return  # The player resolves the next track itself
+        upcoming = set(self.tracks[:PREFETCH_TRACKS])
+        for entry in list(self.prefetched):
+            if entry not in upcoming:
+                self.prefetched.pop(entry).cancel()
+        for entry in upcoming:
+            if entry not in self.prefetched:
+                self.prefetched[entry] = self.bot.loop.create_task(
+                    self.resolve(entry, priority=PRIORITY_PREFETCH)
+                )
+        if self.preloaded is None and self.preloader is None:
+            self.preloader = self.bot.loop.create_task(self.preload())
+        if self.searcher is None or self.searcher.done():
+            if any(SEARCH_RESOLVER.wants(entry) for entry in self.tracks):
+                self.searcher = self.bot.loop.create_task(self.search_queue())
+
+    async def search_queue(self):
+        """
+        Finds the videos of queued searches front to back,
+        a few at a time, until none are left or the state
+        stops. Spotify tracks that were found before are
+        looked up all at once first.
+        """
+        entries = [entry for entry in self.tracks if SEARCH_RESOLVER.wants(entry)]
+        track_ids = {entry.spotify_id for entry in entries} - {None}
+        if track_ids:
+            known = await SEARCH_RESOLVER.lookup(self.bot.cxn, track_ids)
+            for entry in entries:
+                if entry.spotify_id in known:
+                    entry.url = SEARCH_RESOLVER.get_url(known[entry.spotify_id])
+
+        searched = set()  # IDs of the entries taken by a worker
+        found = {}  # spotify track_id: video_id
+
+        async def worker():
             while True:
-                try:
-                    current = await YTDLSource.get_source(
-                        self.entry.ctx, self.entry.search
-                    )
-                except exceptions.YTDLError:
-                    self.entry = await self.tracks.get()
-                else:
+                entry = discord.utils.find(
+                    lambda e: id(e) not in searched and SEARCH_RESOLVER.wants(e),
+                    self.tracks,
+                )
+                if entry is None:
+                    return
+                searched.add(id(entry))
+                video_id = await SEARCH_RESOLVER.search(self.bot, entry.search)
+                if video_id is not None:
+                    entry.url = SEARCH_RESOLVER.get_url(video_id)
+                    if entry.spotify_id:
+                        found[entry.spotify_id] = video_id
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(SEARCH_WORKERS)))
+        finally:
+            await SEARCH_RESOLVER.store(self.bot.cxn, found)
+
+    def next_entry(self):
+        """Returns the entry that plays after the current one, if known."""
+        if self.track_is_looped:
+            return self.entry
+        if self.tracks:
+            return self.tracks[0]
+        if self.queue_is_looped:
+            return self.entry
+
+    def remaining(self):
+        """Returns the seconds left in the current track, or None if unknown."""
+        source = self.source
+        if source is None or not source.ytdl.raw_duration:
+            return None
+        return (source.ytdl.raw_duration - source.position) / source.rate
+
+    async def preload(self):
+        """
+        Starts the next track's FFmpeg process shortly before
+        the current track ends and queues it in the pipeline,
+        so the player switches to it without a gap.
+        """
+        try:
+            while True:
+                remaining = self.remaining()
+                if remaining is None:
+                    return  # Live or already over
+                if remaining <= PRELOAD_SECONDS:
                     break
-        return current
+                await asyncio.sleep(remaining - PRELOAD_SECONDS)
+
+            entry = self.next_entry()
+            if entry is None:
+                return
+            if self.track_is_looped:
+                current = self.current
+            elif entry in self.prefetched:
+                # Shielded so a cancelled preload leaves the prefetch running.
+                current = await asyncio.shield(self.prefetched[entry])
+            else:
+                current = await self.resolve(entry)
+            if current is None:
+                return  # The player skips it as usual
+            source = await AudioSource.check_source(
+                current, self.volume, 0, **self.effects
+            )
+            if source is None:
+                return
+
+            if entry is not self.next_entry() or not self.is_live(self.source):
+                source.cleanup()  # Changed while we were busy
+                return
+            self.preloaded = (entry, source)
+            self.pipeline.queue(source)
+        finally:
+            if self.preloader is asyncio.current_task():
+                self.preloader = None
+
+    def discard_preload(self):
+        """Drops the preloaded track, if it hasn't started yet."""
+        if self.preloader is not None:
+            self.preloader.cancel()
+            self.preloader = None
+        if self.preloaded is None:
+            return
+        if self.pipeline is not None and self.pipeline.dequeue() is None:
+            return  # Already playing, the player takes it from here
+        self.preloaded[1].cleanup()
+        self.preloaded = None
+
+    async def resolve(self, entry, *, priority=PRIORITY_NEXT):
+        """
+        Returns a validated YTDLSource for an entry,
+        or None if the entry can't be played.
+        """
+        try:
+            current = await YTDLSource.get_source(
+                entry.ctx, entry.query, priority=priority
+            )
+        except exceptions.YTDLError:
+            if entry.url is None:
+                return None
+            # The video found for the search is gone, search again.
+            if entry.spotify_id:
+                await SEARCH_RESOLVER.forget(self.bot.cxn, entry.spotify_id)
+            entry.url = None
+            try:
+                current = await YTDLSource.get_source(
+                    entry.ctx, entry.search, priority=priority
+                )
+            except exceptions.YTDLError:
+                return None
+        return await AudioSource.validate(current)
+
+    async def get_next_track(self):
+        self.idle = self.tracks.empty()
+        while True:
+            self.entry = await self.tracks.get()
+            task = self.prefetched.pop(self.entry, None)
+            if task is None:
+                current = await self.resolve(self.entry)
+            else:
+                current = await task
+            if current is not None:
+                return current
 
     def requeue(self, source: YTDLSource):
-        self.entry.data = source.data
-        self.tracks.put_nowait(self.entry)
+        self.tracks.put_nowait(QueueEntry.from_source(source))
 
     def replay(self, source: YTDLSource):
-        self.entry.data = source.data
-        self.tracks.append_left(self.entry)
+        self.tracks.append_left(QueueEntry.from_source(source))
 
     async def audio_player_task(self):
         run = True
@@ -1498,23 +2756,46 @@ class VoiceState:
             try:
                 self.next.clear()
 
-                if self.track_is_looped:  # Single song is looped.
+                preloaded, self.preloaded = self.preloaded, None
+                if preloaded is not None:  # Got ready during the last track
+                    entry, self.source = preloaded
+                    self.current = self.source.ytdl
+                    if not self.track_is_looped:
+                        if self.queue_is_looped:
+                            self.tracks.put_nowait(self.entry)  # Put it back.
+                        if self.tracks and self.tracks[0] is entry:
+                            self.tracks.get_nowait()
+                    self.prefetched.pop(entry, None)
+                    self.entry = entry
+                    self.idle = False
+                    HISTORY_WRITER.add_track(self.bot, self.current)
+
+                elif self.track_is_looped:  # Single song is looped.
                     self.current = self.previous
 
                 elif self.queue_is_looped:  # Entire queue is looped
-                    self.requeue(self.previous)  # Put old track back in the queue.
+                    self.tracks.put_nowait(self.entry)  # Put the old track back.
                     self.current = await self.get_next_track()  # Get song from queue
 
                 else:  # Not looping track or queue.
                     self.current = await self.get_next_track()
-                self.source = await AudioSource.save(
-                    self.current,
-                    self.volume,
-                    **self.effects,
-                )
+                if preloaded is None:
+                    self.source = await AudioSource.save(
+                        self.current,
+                        self.volume,
+                        **self.effects,
+                    )
                 if self.source:
                     self.voice = await self.check_voice_client()
-                    self.voice.play(self.source, after=self.play_next_track)
+                    if self.is_live(self.source):  # Switched without a gap
+                        TRACK_GAPS.add(0)
+                    else:
+                        self.play(self.source)
+                        if self.ended_at is not None and not self.idle:
+                            TRACK_GAPS.add(time.monotonic() - self.ended_at)
+                    self.ended_at = None
+                    self.idle = False
+                    self.prefetch()  # Get the next tracks ready
                     await MusicUtils.create_embed(self.current.ctx, self.source)
                     await self.next.wait()  # Wait until the track finishes
                 else:  # Something went wrong, get next track
@@ -1529,28 +2810,18 @@ class VoiceState:
                 self.bot.dispatch("error", "MUSIC_ERROR", tb=tb)
                 # run = False
 
-    async def increment_position(self):
-        """Keeps track of the position in the song"""
-
-        def condition():
-            if not self.voice:
-                return False
-            if not self.voice.is_playing():
-                return False
-            if not self.source:
-                return False
-            return True
-
-        while True:
-            if condition():
-                self.source.position += self.source.rate
-            await asyncio.sleep(1.0)
-
     def play_next_track(self, error=None):
         if error:
             log.warning(error)
+        self.ended_at = self.active_at = time.monotonic()
         self.next.set()
 
+    def inactive_for(self):
+        """Returns how many seconds nothing has been played or asked for."""
+        if self.voice and self.voice.is_playing():
+            return 0
+        return time.monotonic() - self.active_at
+
     def skip(self):
         self.skip_votes.clear()
 
@@ -1559,27 +2830,42 @@ class VoiceState:
 
     def track_loop(self):
         self.track_is_looped = True
+        self.prefetch()
 
     def queue_loop(self):
         self.queue_is_looped = True
         self.track_is_looped = False
+        self.prefetch()
 
     def unloop(self):
         self.queue_is_looped = False
         self.track_is_looped = False
+        self.prefetch()
 
 
 class VoiceStates(dict):
     def __init__(self):
-        pass
+        self.reaped = 0  # Idle states stopped by the reaper
 
     async def get_state(self, ctx):
         state = self.get(ctx.guild.id)
         if not state:
             state = await VoiceState.create(ctx.bot, ctx)
             self[ctx.guild.id] = state
+        state.active_at = time.monotonic()
         return state
 
+    async def reap(self, timeout=IDLE_TIMEOUT):
+        """Disconnects and frees states that sat idle too long."""
+        for state in list(self.values()):
+            if state.inactive_for() > timeout:
+                try:
+                    await state.stop()
+                except Exception as e:
+                    log.warning(f"Unable to reap voice state: {e}")
+                    self.pop(state._ctx.guild.id, None)
+                self.reaped += 1
+
     def destroy(self, loop=None):
         loop = loop or asyncio.get_event_loop()
         for state in self.values():
@@ -1597,9 +2883,53 @@ class Player(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.spotify = MusicUtils.spotify(bot)
+        self.extraction_pruner.start()
+        self.voice_reaper.start()
+        self.history_writer.start()
 
     def cog_unload(self):
         VOICE_STATES.destroy(loop=self.bot.loop)
+        self.extraction_pruner.stop()
+        self.voice_reaper.stop()
+        self.history_writer.stop()
+        self.bot.loop.create_task(HISTORY_WRITER.flush(self.bot.cxn))
+        EXTRACTION_POOL.stop()
+
+    def cache_stats(self):
+        stats = {
+            "Extraction Cache": EXTRACTION_CACHE.stats(),
+            "Extraction Pool": EXTRACTION_POOL.stats(),
+            "Stream Validation": STREAM_VALIDATOR.stats(),
+            "Search Resolver": SEARCH_RESOLVER.stats(),
+            "Track History": HISTORY_WRITER.stats(),
+            "Voice States": {
+                "active": len(VOICE_STATES),
+                "reaped": VOICE_STATES.reaped,
+            },
+            "Playback": PLAYBACK_STATS.stats(),
+            "Track Gaps": {
+                "tracks": TRACK_GAPS.total,
+                "gap p50": TRACK_GAPS.percentile(50),
+                "gap p95": TRACK_GAPS.percentile(95),
+                "gap avg": f"{TRACK_GAPS.mean:.2f}s",
+            },
+        }
+        if self.spotify:
+            stats["Spotify"] = self.spotify.stats()
+        return stats
+
+    @tasks.loop(hours=1.0)
+    async def extraction_pruner(self):
+        if self.bot.cxn:
+            await EXTRACTION_CACHE.prune(self.bot.cxn)
+
+    @tasks.loop(minutes=1.0)
+    async def voice_reaper(self):
+        await VOICE_STATES.reap()
+
+    @tasks.loop(seconds=HISTORY_INTERVAL)
+    async def history_writer(self):
+        await HISTORY_WRITER.flush(self.bot.cxn)
 
     async def cog_check(self, ctx):
         if not ctx.guild:
@@ -1838,7 +3168,7 @@ class Player(commands.Cog):
             Checks.assert_is_dj(ctx)
 
         src = player.current
-        current_position = player.source.position
+        current_position = int(player.source.position)
 
         if seconds < 0:
             await ctx.invoke(self._rewind, abs(seconds))
@@ -1878,7 +3208,7 @@ class Player(commands.Cog):
         if not Checks.is_requester(ctx):
             Checks.assert_is_dj(ctx)
 
-        current_position = player.source.position
+        current_position = int(player.source.position)
 
         if seconds < 0:
             await ctx.invoke(self._fastforward, abs(seconds))
@@ -1957,17 +3287,7 @@ class Player(commands.Cog):
             which can be played using the playliked command.
         """
         player = ctx.voice_state.validate
-        query = """
-                INSERT INTO saved (requester_id, title, url, uploader)
-                VALUES ($1, $2, $3, $4)
-                """
-        await self.bot.cxn.execute(
-            query,
-            player.current.requester.id,
-            player.current.title,
-            player.current.url,
-            player.current.uploader,
-        )
+        HISTORY_WRITER.add_saved(self.bot, player.current, player.current.requester.id)
         await MusicUtils.save_embed(ctx, player.current)
 
     @decorators.command(
@@ -2014,7 +3334,7 @@ class Player(commands.Cog):
 
         dur = player.current.duration
         raw = player.current.raw_duration
-        pos = player.source.position
+        pos = int(player.source.position)
         await ctx.success(f"Current position: {dur} `({pos}/{raw}) seconds`")
 
     @decorators.command(
@@ -2111,10 +3431,11 @@ class Player(commands.Cog):
 
                 elif "album" in parts:
                     res = await self.spotify.get_album(parts[-1])
-                    tracks = MusicUtils.put_spotify_tracks(ctx, res["tracks"]["items"])
+                    items = await self.spotify.get_items(res["tracks"])
+                    tracks = MusicUtils.put_spotify_tracks(ctx, items)
                     player.tracks.extend_left(tracks)
                     await ctx.music(
-                        f"Front Queued {len(res['tracks']['items'])} spotify tracks."
+                        f"Front Queued {len(items)} spotify tracks."
                     )
                     return
 
@@ -2128,17 +3449,8 @@ class Player(commands.Cog):
                     return
 
                 elif "playlist" in parts:
-                    res = []
                     r = await self.spotify.get_playlist_tracks(parts[-1])
-                    iterations = 0
-                    while iterations < 5:  # Max playlist length 500
-                        res.extend(r["items"])
-                        if r["next"] is not None:
-                            r = await self.spotify.make_spotify_req(r["next"])
-                            iterations += 1
-                            continue
-                        else:
-                            break
+                    res = await self.spotify.get_items(r, limit=SPOTIFY_PLAYLIST_LIMIT)
 
                     tracks = MusicUtils.put_spotify_playlist(ctx, res)
                     player.tracks.extend_left(tracks)
@@ -2225,10 +3537,11 @@ class Player(commands.Cog):
 
                 elif "album" in parts:
                     res = await self.spotify.get_album(parts[-1])
-                    tracks = MusicUtils.put_spotify_tracks(ctx, res["tracks"]["items"])
+                    items = await self.spotify.get_items(res["tracks"])
+                    tracks = MusicUtils.put_spotify_tracks(ctx, items)
                     player.tracks.extend(tracks)
                     await ctx.music(
-                        f"Queued {len(res['tracks']['items'])} spotify tracks."
+                        f"Queued {len(items)} spotify tracks."
                     )
                     return
 
@@ -2240,17 +3553,8 @@ class Player(commands.Cog):
                     return
 
                 elif "playlist" in parts:
-                    res = []
                     r = await self.spotify.get_playlist_tracks(parts[-1])
-                    iterations = 0
-                    while iterations < 5:  # Max playlist length 500
-                        res.extend(r["items"])
-                        if r["next"] is not None:
-                            r = await self.spotify.make_spotify_req(r["next"])
-                            iterations += 1
-                            continue
-                        else:
-                            break
+                    res = await self.spotify.get_items(r, limit=SPOTIFY_PLAYLIST_LIMIT)
 
                     tracks = MusicUtils.put_spotify_playlist(ctx, res)
                     player.tracks.extend(tracks)
@@ -2444,12 +3748,11 @@ class Queue(commands.Cog):
 
         if option == "track":
             setting = "already" if player.track_is_looped else "now"
-            player.track_is_looped = True
+            player.track_loop()
             await ctx.success(f"The current track is {setting} looped.")
         elif option == "queue":
             setting = "already" if player.queue_is_looped else "now"
-            player.queue_is_looped = True
-            player.track_is_looped = False  # In case we were looping a track.
+            player.queue_loop()  # Also stops looping a track.
             await ctx.success(f"The current queue is {setting} looped.")
         elif option == "off":
             return await ctx.invoke(self._unloop)
@@ -2470,8 +3773,7 @@ class Queue(commands.Cog):
         """
         player = ctx.voice_state.validate
         Checks.assert_is_dj(ctx)
-        player.track_is_looped = False
-        player.queue_is_looped = False
+        player.unloop()
 
         await ctx.react(self.bot.emote_dict["success"])
 
@@ -3155,6 +4457,7 @@ class Playlists(commands.Cog):
         Output:
             Deletes a saved playlist by name.
         """
+        await HISTORY_WRITER.flush(self.bot.cxn)
         query = """
                 DELETE FROM playlists
                 WHERE owner_id = $1
@@ -3297,13 +4600,7 @@ class Playlists(commands.Cog):
         )
 
         await ctx.music(f"Enqueued saved playlist: {name} `({len(queue)} tracks)`")
-        query = """
-                UPDATE playlists
-                SET uses = uses + 1
-                WHERE owner_id = $1
-                AND name = $2
-                """
-        await self.bot.cxn.execute(query, ctx.author.id, name.lower())
+        HISTORY_WRITER.use_playlist(self.bot, ctx.author.id, name.lower())
 
     @_playlist.command(name="view", aliases=["info"], brief="Show info on a playlist.")
     async def playlist_view(
@@ -3402,6 +4699,7 @@ class Playlists(commands.Cog):
         """
         await ctx.trigger_typing()
         player = await ctx.voice_state.ensure_voice_state(ctx)
+        await HISTORY_WRITER.flush(self.bot.cxn)
         query = """
                 SELECT title, url, uploader
                 FROM saved
@@ -3444,6 +4742,7 @@ class Playlists(commands.Cog):
             )
             return
         player = await ctx.voice_state.ensure_voice_state(ctx)
+        await HISTORY_WRITER.flush(self.bot.cxn)
         query = f"""
                 SELECT title, url, uploader, count(url) as c
                 FROM tracks
@@ -3891,31 +5190,33 @@ class SpotifyTracker(commands.Cog):
     @commands.Cog.listener()
     @decorators.event_check(lambda s, b, a: a.activities)
     async def on_presence_update(self, before, after):
+        activity = discord.utils.find(
+            lambda x: type(x) is discord.activity.Spotify, after.activities
+        )
+        if activity is None or activity in before.activities:
+            return
 
-        lowest = discord.utils.find(
-            lambda x: x.get_member(after.id) is not None,
-            sorted(self.bot.guilds, key=lambda x: x.id),
+        # Every shared server sends the update, only handle it once.
+        lowest = min(
+            (guild.id for guild in self.bot.guilds if guild.get_member(after.id)),
+            default=None,
         )
-        if after.guild.id == lowest.id:
-            for activity in after.activities:
-                if type(activity) is discord.activity.Spotify:
-                    print(activity.start)
-                    print(activity.end - activity.start)
-                    print(activity.duration)
-                    if activity not in before.activities:
-                        async with self.batch_lock:
-                            try:
-                                track = await self.spotify.get_track(activity.track_id)
-                            except Exception:
-                                return
-                            self.spotify_data[after.id].update(
-                                {
-                                    "album_id": track["album"]["id"],
-                                    "artist_id": track["artists"][0]["id"],
-                                    "track_id": activity.track_id,
-                                    "updated": str(datetime.utcnow()),
-                                }
-                            )
+        if after.guild.id != lowest:
+            return
+
+        try:  # Batched with other listeners, not under the lock
+            track = await self.spotify.get_track(activity.track_id)
+        except Exception:
+            return
+        async with self.batch_lock:
+            self.spotify_data[after.id].update(
+                {
+                    "album_id": track["album"]["id"],
+                    "artist_id": track["artists"][0]["id"],
+                    "track_id": activity.track_id,
+                    "updated": str(datetime.utcnow()),
+                }
+            )
 
     # @decorators.command()
     # async def _track(self, ctx, *, user: converters.DiscordUser = None):
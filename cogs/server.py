@@ -8,6 +8,7 @@ from utilities import decorators
 from utilities import converters
 from utilities import checks
 from utilities import helpers
+from utilities import history
 
 
 def setup(bot):
@@ -109,15 +110,10 @@ class Server(commands.Cog):
         if after:
             after = discord.Object(id=after)
 
-        if predicate:
-            coro = ctx.channel.purge(
-                limit=limit, before=before, after=after, check=predicate
-            )
-        else:
-            coro = ctx.channel.purge(limit=limit, before=before, after=after)
-
         try:
-            deleted = await coro
+            deleted = await history.purge(
+                ctx.channel, limit=limit, before=before, after=after, check=predicate
+            )
         except discord.Forbidden:
             return await ctx.fail(
                 "I do not have permissions to delete messages.", refer=False
@@ -131,8 +127,7 @@ class Server(commands.Cog):
                 f"{self.bot.emote_dict['trash']} Deleted {deleted} message{'' if deleted == 1 else 's'}",
             )
             await asyncio.sleep(5)
-            to_delete = [msg.id, ctx.message.id]
-            await ctx.channel.purge(check=lambda m: m.id in to_delete)
+            await history.delete_messages(ctx.channel, [msg, ctx.message])
 
     @purge.command(brief="Purge messages with embeds.")
     async def embeds(self, ctx, search=100):
@@ -427,15 +422,15 @@ class Server(commands.Cog):
             )
 
         total_reactions = 0
-        async for message in ctx.history(limit=search, before=ctx.message):
-            if len(message.reactions):
-                total_reactions += sum(r.count for r in message.reactions)
-                await message.clear_reactions()
+        async for message in history.scan(
+            ctx, limit=search, before=ctx.message, check=lambda m: m.reactions
+        ):
+            total_reactions += sum(r.count for r in message.reactions)
+            await message.clear_reactions()
         msg = await ctx.send_or_reply(
             f'{self.bot.emote_dict["trash"]} Successfully removed {total_reactions} reactions.'
         )
-        to_delete = [msg.id, ctx.message.id]
-        await ctx.channel.purge(check=lambda m: m.id in to_delete)
+        await history.delete_messages(ctx.channel, [msg, ctx.message])
 
     @purge.command(
         name="until", aliases=["after"], brief="Purge messages after a message."
@@ -471,11 +466,15 @@ class Server(commands.Cog):
         await self.do_removal(ctx, 100, None, before=message2.id, after=message1.id)
 
     async def _basic_cleanup_strategy(self, ctx, search):
+        def check(m):
+            return m.author == ctx.me and not (m.mentions or m.role_mentions)
+
         count = 0
-        async for msg in ctx.history(limit=search, before=ctx.message):
-            if msg.author == ctx.me and not (msg.mentions or msg.role_mentions):
-                await msg.delete()
-                count += 1
+        async for msg in history.scan(
+            ctx, limit=search, before=ctx.message, check=check
+        ):
+            await msg.delete()
+            count += 1
         return {"Bot": count}
 
     async def _complex_cleanup_strategy(self, ctx, search):
@@ -484,7 +483,9 @@ class Server(commands.Cog):
         def check(m):
             return m.author == ctx.me or m.content.startswith(prefixes)
 
-        deleted = await ctx.channel.purge(limit=search, check=check, before=ctx.message)
+        deleted = await history.purge(
+            ctx.channel, limit=search, check=check, before=ctx.message
+        )
         return Counter(m.author.display_name for m in deleted)
 
     async def _regular_user_cleanup_strategy(self, ctx, search):
@@ -495,7 +496,9 @@ class Server(commands.Cog):
                 m.mentions or m.role_mentions
             )
 
-        deleted = await ctx.channel.purge(limit=search, check=check, before=ctx.message)
+        deleted = await history.purge(
+            ctx.channel, limit=search, check=check, before=ctx.message
+        )
         return Counter(m.author.display_name for m in deleted)
 
     @decorators.command(
@@ -547,8 +550,7 @@ class Server(commands.Cog):
 
         msg = await ctx.send_or_reply(embed=em)
         await asyncio.sleep(5)
-        to_delete = [msg.id, ctx.message.id]
-        await ctx.channel.purge(check=lambda m: m.id in to_delete)
+        await history.delete_messages(ctx.channel, [msg, ctx.message])
 
     @commands.group(name="emoji", aliases=["emote"], brief="Manage server emojis.")
     @checks.guild_only()
@@ -362,6 +362,22 @@ class Stats(commands.Cog):
 
         await self.rolelist_paginate(ctx, sorted_list, title="Empty Roles")
 
+    def join_entry(self, guild, index, member_id):
+        """
+        Formats one member of a join order for pagination.
+        """
+        member = guild.get_member(member_id)
+        if member is None:  # Left while the menu was open
+            return ("{}. {}".format(index + 1, member_id), "Unknown UTC")
+        return (
+            "{}. {}".format(index + 1, member.display_name),
+            "{} UTC".format(
+                member.joined_at.strftime("%Y-%m-%d %I:%M %p")
+                if member.joined_at != None
+                else "Unknown"
+            ),
+        )
+
     @decorators.command(
         aliases=["earlyjoins"],
         brief="Show the first users to join.",
@@ -385,30 +401,17 @@ class Stats(commands.Cog):
             Embed of all users ordered by their
             join date earliest to latest.
         """
-        our_list = []
-        for member in ctx.guild.members:
-            our_list.append(
-                {
-                    "name": member.display_name,
-                    "value": "{} UTC".format(
-                        member.joined_at.strftime("%Y-%m-%d %I:%M %p")
-                        if member.joined_at != None
-                        else "Unknown"
-                    ),
-                    "date": member.joined_at,
-                }
-            )
-        our_list = sorted(
-            our_list, key=lambda x: x["date"].timestamp() if x["date"] != None else -1
-        )
+        order = await self.bot.get_join_order(ctx.guild)
+        # Snapshot the IDs so joins and leaves don't shift the pages
+        member_ids = order.slice()
         p = pagination.MainMenu(
             pagination.FieldPageSource(
-                entries=[
-                    ("{}. {}".format(y + 1, x["name"]), x["value"])
-                    for y, x in enumerate(our_list)
-                ],
+                entries=pagination.LazyEntries(
+                    len(member_ids),
+                    lambda y: self.join_entry(ctx.guild, y, member_ids[y]),
+                ),
                 title="First Members to Join {} ({:,} total)".format(
-                    ctx.guild.name, len(ctx.guild.members)
+                    ctx.guild.name, len(member_ids)
                 ),
                 per_page=15,
             )
@@ -486,26 +489,17 @@ class Stats(commands.Cog):
         Output:
             Shows the user that joined at the passed position.
         """
+        order = await self.bot.get_join_order(ctx.guild)
         try:
             position = int(position) - 1
-            assert -1 < position < len(ctx.guild.members)
+            assert -1 < position < len(order)
         except Exception:
             return await ctx.fail(
-                "Position must be an integer between 1 and {:,}".format(
-                    len(ctx.guild.members)
-                )
+                "Position must be an integer between 1 and {:,}".format(len(order))
             )
-        joinedList = [
-            {"member": mem, "joined": mem.joined_at} for mem in ctx.guild.members
-        ]
-        # sort the users by join date
-        joinedList = sorted(
-            joinedList,
-            key=lambda x: x["joined"].timestamp() if x["joined"] != None else -1,
-        )
-        join = joinedList[position]
+        member = ctx.guild.get_member(order.nth(position))
         msg = "**{}** joined at position **{:,}**.".format(
-            join["member"].display_name, position + 1
+            member.display_name if member else "Unknown", position + 1
         )
         await ctx.send_or_reply(msg)
 
@@ -545,20 +539,11 @@ class Stats(commands.Cog):
 
         user = user or ctx.author
 
-        joinedList = []
-        for mem in ctx.message.guild.members:
-            joinedList.append({"ID": mem.id, "Joined": mem.joined_at})
-
-        # sort the users by join date
-        joinedList = sorted(
-            joinedList,
-            key=lambda x: x["Joined"].timestamp() if x["Joined"] != None else -1,
-        )
-
-        check_item = {"ID": user.id, "Joined": user.joined_at}
-
-        total = len(joinedList)
-        position = joinedList.index(check_item) + 1
+        order = await self.bot.get_join_order(ctx.guild)
+        total = len(order)
+        position = order.rank(user)
+        if position is None:
+            return await ctx.fail(f"Unable to find `{user}'s` join position.")
 
         before = ""
         after = ""
@@ -610,32 +595,17 @@ class Stats(commands.Cog):
             Embed of all users ordered by their
             join date latest to earliest.
         """
-        our_list = []
-        for member in ctx.guild.members:
-            our_list.append(
-                {
-                    "name": member.display_name,
-                    "value": "{} UTC".format(
-                        member.joined_at.strftime("%Y-%m-%d %I:%M %p")
-                        if member.joined_at != None
-                        else "Unknown"
-                    ),
-                    "date": member.joined_at,
-                }
-            )
-        our_list = sorted(
-            our_list,
-            key=lambda x: x["date"].timestamp() if x["date"] != None else -1,
-            reverse=True,
-        )
+        order = await self.bot.get_join_order(ctx.guild)
+        # Snapshot the IDs so joins and leaves don't shift the pages
+        member_ids = order.slice(reverse=True)
         p = pagination.MainMenu(
             pagination.FieldPageSource(
-                entries=[
-                    ("{}. {}".format(y + 1, x["name"]), x["value"])
-                    for y, x in enumerate(our_list)
-                ],
+                entries=pagination.LazyEntries(
+                    len(member_ids),
+                    lambda y: self.join_entry(ctx.guild, y, member_ids[y]),
+                ),
                 title="First Members to Join {} ({:,} total)".format(
-                    ctx.guild.name, len(ctx.guild.members)
+                    ctx.guild.name, len(member_ids)
                 ),
                 per_page=15,
             )
@@ -1228,21 +1198,8 @@ class Stats(commands.Cog):
         if user is None:
             user = ctx.author
 
-        joinedList = []
-        for mem in ctx.guild.members:
-            joinedList.append({"ID": mem.id, "Joined": mem.joined_at})
-
-        # sort the users by join date
-        joinedList = sorted(
-            joinedList,
-            key=lambda x: x["Joined"].timestamp() if x["Joined"] is not None else -1,
-        )
-
-        check_item = {"ID": user.id, "Joined": user.joined_at}
-
-        position = joinedList.index(check_item) + 1
-
-        msg = "{:,}".format(position)
+        order = await self.bot.get_join_order(ctx.guild)
+        msg = "{:,}".format(order.rank(user) or 0)
 
         query = """
                 SELECT COUNT(*)
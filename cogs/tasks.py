@@ -87,7 +87,24 @@ class Tasks(commands.Cog):
         query = "SELECT * FROM tasks WHERE expires < (CURRENT_DATE + $1::interval) ORDER BY expires LIMIT 1;"
         con = connection or self.bot.cxn
 
-        record = await con.fetchrow(query, timedelta(days=days))
+        cluster = self.bot.cluster
+        if cluster.clustered:  # Only pick up timers for our own guilds
+            query = """
+                    SELECT * FROM tasks
+                    WHERE expires < (CURRENT_DATE + $1::interval)
+                    AND CASE WHEN guild_id IS NULL THEN $2
+                    ELSE (guild_id >> 22) % $3 = ANY($4::INT[]) END
+                    ORDER BY expires LIMIT 1;
+                    """
+            record = await con.fetchrow(
+                query,
+                timedelta(days=days),
+                cluster.owns(None),
+                cluster.shard_count,
+                cluster.shard_ids,
+            )
+        else:
+            record = await con.fetchrow(query, timedelta(days=days))
         if record:
             if type(record["extra"]) is dict:
                 extra = record["extra"]
@@ -164,6 +181,10 @@ class Tasks(commands.Cog):
         connection: asyncpg.Connection
             Special keyword-only argument to use a specific connection
             for the DB request.
+        guild_id: int
+            Special keyword-only argument for the guild the timer
+            belongs to. Only the cluster running that guild's shard
+            will dispatch it. Omit for DM timers.
         created: datetime.datetime
             Special keyword-only argument to use as the creation time.
             Should make the timedeltas a bit more consistent.
@@ -181,6 +202,8 @@ class Tasks(commands.Cog):
         except KeyError:
             connection = self.bot.cxn
 
+        guild_id = kwargs.pop("guild_id", None)
+
         try:
             now = kwargs.pop("created")
         except KeyError:
@@ -196,8 +219,8 @@ class Tasks(commands.Cog):
                 self.bot.loop.create_task(self.short_timer_optimisation(delta, timer))
                 return timer
 
-        query = """INSERT INTO tasks (event, extra, expires, created)
-                   VALUES ($1, $2::jsonb, $3, $4)
+        query = """INSERT INTO tasks (event, extra, expires, created, guild_id)
+                   VALUES ($1, $2::jsonb, $3, $4, $5)
                    RETURNING id;
                 """
 
@@ -208,6 +231,7 @@ class Tasks(commands.Cog):
             jsonb,
             when,
             now,
+            guild_id,
         )
         timer.id = row[0]
 
@@ -260,6 +284,7 @@ class Tasks(commands.Cog):
             when.arg,
             connection=self.bot.cxn,
             created=ctx.message.created_at.replace(tzinfo=None),
+            guild_id=ctx.guild.id if ctx.guild else None,
             message_id=ctx.message.id,
         )
 
@@ -158,6 +158,10 @@ class Tracking(commands.Cog):
 
         batch = self.bot.get_cog("Batch")
 
+        if ctx.guild and not isinstance(user, discord.Member):
+            # Might not be cached in low memory mode.
+            user = await self.bot.get_or_fetch_member(ctx.guild, user.id) or user
+
         if isinstance(user, discord.Member):  # Member obj, get all data.
             usernames = await batch.get_names(user)
             nicknames = await batch.get_nicks(user)
@@ -196,9 +200,9 @@ class Tracking(commands.Cog):
         if joined_at:
             msg += f"Joined         : {joined_at}\n"
             # Next get the position that the user joined in.
-            joined_list = sorted(user.guild.members, key=lambda m: m.joined_at)
-            position = joined_list.index(user) + 1
-            msg += f"Join Position  : {position:,}/{len(user.guild.members)}\n"
+            order = await self.bot.get_join_order(user.guild)
+            position = order.rank(user) or 0
+            msg += f"Join Position  : {position:,}/{len(order)}\n"
 
         if last_seen:
             msg += f"Last Seen      : {last_seen}\n"
@@ -26,6 +26,7 @@ from utilities import utils
 from utilities import checks
 from utilities import cleaner
 from utilities import helpers
+from utilities import history
 from utilities import humantime
 from utilities import converters
 from utilities import decorators
@@ -1652,10 +1653,8 @@ class Utility(commands.Cog):
                     f"{self.bot.emote_dict['loading']} Deleting {len(self.msg_collection)} messages..."
                 )
 
-                def purge_checker(m):
-                    return m.id in self.msg_collection
-
-                deleted = await ctx.channel.purge(limit=200, check=purge_checker)
+                messages = [discord.Object(id=x) for x in set(self.msg_collection)]
+                deleted = await history.delete_messages(ctx.channel, messages)
                 await mess.edit(
                     content=f"{self.bot.emote_dict['trash']} Deleted {len(deleted)} messages."
                 )
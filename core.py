@@ -4,6 +4,7 @@ import re
 import sys
 import json
 import time
+import asyncio
 import aiohttp
 import discord
 import logging
@@ -14,7 +15,7 @@ from discord.ext import commands, tasks
 from logging.handlers import RotatingFileHandler
 
 from settings import cleanup, database, constants
-from utilities import utils, saver, override
+from utilities import utils, saver, override, cluster, index, invalidation
 
 MAX_LOGGING_BYTES = 32 * 1024 * 1024  # 32 MiB
 
@@ -115,6 +116,17 @@ class Neutra(commands.AutoShardedBot):
         allowed_mentions = discord.AllowedMentions(
             roles=False, everyone=False, users=True, replied_user=True
         )
+        # Low memory mode only caches members in voice channels
+        # and chunks servers the first time a command is used there.
+        # Joins stay cached so chunked servers never go stale, which
+        # also keeps chunked members cached when they leave voice.
+        self.low_memory = constants.config.get("low_memory", False)
+        if self.low_memory:
+            member_cache_flags = discord.MemberCacheFlags.none()
+            member_cache_flags.voice = True
+            member_cache_flags.joined = True
+        else:
+            member_cache_flags = discord.MemberCacheFlags.all()
         super().__init__(
             allowed_mentions=allowed_mentions,
             command_prefix=get_prefixes,
@@ -122,7 +134,20 @@ class Neutra(commands.AutoShardedBot):
             strip_after_prefix=True,
             owner_ids=constants.owners,
             intents=discord.Intents.all(),
+            shard_ids=cluster.current.shard_ids,
+            shard_count=cluster.current.shard_count,
+            member_cache_flags=member_cache_flags,
+            chunk_guilds_at_startup=not self.low_memory,
+        )
+        self.chunked_guilds = set()  # Servers chunked on demand in low memory mode
+        self.chunk_tasks = {}  # server_id: Chunk in progress, shared by callers
+        self.join_index = index.JoinIndex()  # Members sorted by join date
+        self.name_index = index.NameIndex(  # Members by tag, username, and nickname
+            ngrams=constants.config.get("name_ngrams", False)
         )
+        self.cluster = cluster.current  # The shards this process runs
+        self.ipc = cluster.IPC(self)
+        self.ipc.register("totals", self.get_local_totals)
         self.developer_id = 708584008065351681
 
         self.command_stats = collections.Counter()
@@ -137,6 +162,9 @@ class Neutra(commands.AutoShardedBot):
         )  # discord invite regex
         self.emote_dict = constants.emotes
         self.prefixes = database.prefixes
+        self.invalidator = invalidation.CacheInvalidator(self)
+        self.invalidator.subscribe("prefixes", database.reload_prefixes)
+        self.invalidator.subscribe("servers", database.reload_settings)
         self.common_prefixes = [
             "!",
             ".",
@@ -253,9 +281,47 @@ class Neutra(commands.AutoShardedBot):
             # the bot attrs were set. Let's silence errors.
             pass
 
+        await self.invalidator.close()
+        await self.ipc.close()
         await super().close()
         await self.session.close()
 
+    ##############################
+    ## Cluster Helper Functions ##
+    ##############################
+
+    async def get_local_totals(self):
+        """
+        Counts for the shards this process runs.
+        """
+        totals = {
+            "clusters": 1,
+            "shards": len(self.shards),
+            "servers": len(self.guilds),
+            "members": 0,
+            "users": len(self.users),
+            "text_channels": 0,
+            "voice_channels": 0,
+            "stage_channels": 0,
+        }
+        for guild in self.guilds:
+            totals["members"] += len(guild.members)
+            totals["text_channels"] += len(guild.text_channels)
+            totals["voice_channels"] += len(guild.voice_channels)
+            totals["stage_channels"] += len(guild.stage_channels)
+        return totals
+
+    async def get_totals(self):
+        """
+        Sums the counts from every cluster.
+        Clusters that don't respond are left out.
+        """
+        totals = collections.Counter()
+        for result in await self.ipc.broadcast("totals"):
+            if result:
+                totals.update(result)
+        return totals
+
     ##############################
     ## Aiohttp Helper Functions ##
     ##############################
@@ -326,6 +392,8 @@ class Neutra(commands.AutoShardedBot):
             except Exception:
                 pass
             return
+        if self.low_memory and message.guild.id not in self.chunked_guilds:
+            self.loop.create_task(self.ensure_chunked(message.guild))
         # Check if we need to ignore, delete or react to the message
         ignore, delete, react = False, False, False
         respond = None
@@ -383,6 +451,9 @@ class Neutra(commands.AutoShardedBot):
         try:
             await database.initialize(self, member_list)
             print(utils.prefix_log("Initialized Database."))
+            await self.invalidator.start()
+            print(utils.prefix_log("Listening for cache invalidations."))
+            await self.ipc.start()
         except Exception as e:
             print(utils.traceback_maker(e))
 
@@ -671,6 +742,60 @@ class Neutra(commands.AutoShardedBot):
             return None
         return members[0]
 
+    async def ensure_chunked(self, guild):
+        """
+        Caches every member of a server.
+        Only needed in low memory mode, where servers
+        are not chunked when the bot starts. Callers that
+        arrive mid chunk wait on the same request.
+        """
+        if not self.low_memory or guild.id in self.chunked_guilds:
+            return
+        task = self.chunk_tasks.get(guild.id)
+        if task is None:
+            task = self.chunk_tasks[guild.id] = self.loop.create_task(
+                self.chunk_guild(guild)
+            )
+        # Shielded so one cancelled caller doesn't cancel the rest
+        await asyncio.shield(task)
+
+    async def chunk_guild(self, guild):
+        try:
+            await guild.chunk(cache=True)
+            self.chunked_guilds.add(guild.id)
+            # Chunked members never passed through the join hooks
+            self.join_index.invalidate(guild.id)
+            self.name_index.invalidate(guild.id)
+        finally:
+            self.chunk_tasks.pop(guild.id, None)
+
+    async def get_members(self, guild):
+        """
+        Returns all the members of a server,
+        chunking the server first if needed.
+        """
+        await self.ensure_chunked(guild)
+        return guild.members
+
+    async def get_join_order(self, guild):
+        """
+        Returns the server's members sorted by join date.
+        """
+        await self.ensure_chunked(guild)
+        return self.join_index.get(guild)
+
+    async def search_members(self, guild, field, search):
+        """
+        Returns the members of a server whose username
+        or nickname contains a search, case insensitive.
+        Members whose name starts with the search come first.
+        """
+        await self.ensure_chunked(guild)
+        names = self.name_index.get(guild)
+        member_ids = names.prefix(field, search)
+        member_ids += sorted(names.search(field, search).difference(member_ids))
+        return [m for m in map(guild.get_member, member_ids) if m]
+
     async def get_or_fetch_user(self, user_id):
         """
         Looks up a user in cache or fetches if not found.
@@ -853,7 +978,32 @@ class Neutra(commands.AutoShardedBot):
         except Exception:
             pass
 
+    async def on_guild_available(self, guild):
+        # Members are dropped when a server is reloaded.
+        self.chunked_guilds.discard(guild.id)
+        self.join_index.invalidate(guild.id)
+        self.name_index.invalidate(guild.id)
+
+    async def on_member_join(self, member):
+        self.join_index.add(member)
+        self.name_index.add(member)
+
+    async def on_member_remove(self, member):
+        self.join_index.remove(member)
+        self.name_index.remove(member)
+
+    async def on_member_update(self, before, after):
+        if before.nick != after.nick:
+            self.name_index.add(after)
+
+    async def on_user_update(self, before, after):
+        if str(before) != str(after):
+            self.name_index.update_user(after)
+
     async def on_guild_remove(self, guild):
+        self.chunked_guilds.discard(guild.id)
+        self.join_index.invalidate(guild.id)
+        self.name_index.invalidate(guild.id)
         if self.ready is False:
             return  # Wait until ready
         # This happens when the bot gets kicked from a server.
@@ -51,4 +51,20 @@ CREATE TABLE IF NOT EXISTS spotify (
     artist_id TEXT,
     track_id TEXT,
     insertion TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'UTC')
-);
\ No newline at end of file
+);
+
+-- Cached youtube_dl extractions
+CREATE TABLE IF NOT EXISTS extractions (
+    key TEXT PRIMARY KEY,
+    data JSONB NOT NULL,
+    expires DOUBLE PRECISION NOT NULL,
+    insertion TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
+CREATE INDEX IF NOT EXISTS extractions_expires_idx ON extractions(expires);
+
+-- Youtube videos found for spotify tracks
+CREATE TABLE IF NOT EXISTS spotify_videos (
+    track_id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    insertion TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'UTC')
+);
@@ -6,6 +6,7 @@ CREATE TABLE IF NOT EXISTS servers (
     autoroles BIGINT[] DEFAULT '{}',
     profanities TEXT[] DEFAULT '{}'
 );
+ALTER TABLE servers ADD COLUMN IF NOT EXISTS antiraid BOOLEAN DEFAULT False;
 
 CREATE TABLE IF NOT EXISTS prefixes (
     server_id BIGINT,
@@ -70,6 +71,9 @@ CREATE TABLE IF NOT EXISTS tasks (
     event TEXT,
     extra jsonb DEFAULT '{}'::jsonb 
 );
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS guild_id BIGINT;
+UPDATE tasks SET guild_id = (extra #>> '{args,0}')::BIGINT
+WHERE guild_id IS NULL AND event != 'reminder';
 
 CREATE TABLE IF NOT EXISTS invites (
     invitee BIGINT,
@@ -92,4 +96,52 @@ CREATE TABLE IF NOT EXISTS icons (
     height bigint,
     width bigint,
     insertion TIMESTAMP DEFAULT (NOW() AT TIME ZONE 'UTC')
-);
\ No newline at end of file
+);
+-- Publishes (table, key) on every write so other processes
+-- sharing this database can reload just the changed key.
+CREATE OR REPLACE FUNCTION notify_invalidation() RETURNS TRIGGER AS $$
+DECLARE
+    row_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_data := TO_JSONB(OLD);
+    ELSE
+        row_data := TO_JSONB(NEW);
+    END IF;
+    PERFORM PG_NOTIFY(
+        'cache_invalidation',
+        JSON_BUILD_OBJECT('table', TG_TABLE_NAME, 'key', row_data -> TG_ARGV[0])::TEXT
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS servers_invalidation ON servers;
+CREATE TRIGGER servers_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON servers
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('server_id');
+
+DROP TRIGGER IF EXISTS prefixes_invalidation ON prefixes;
+CREATE TRIGGER prefixes_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON prefixes
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('server_id');
+
+DROP TRIGGER IF EXISTS logs_invalidation ON logs;
+CREATE TRIGGER logs_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON logs
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('server_id');
+
+DROP TRIGGER IF EXISTS log_data_invalidation ON log_data;
+CREATE TRIGGER log_data_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON log_data
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('server_id');
+
+DROP TRIGGER IF EXISTS command_config_invalidation ON command_config;
+CREATE TRIGGER command_config_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON command_config
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('entity_id');
+
+DROP TRIGGER IF EXISTS plonks_invalidation ON plonks;
+CREATE TRIGGER plonks_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON plonks
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('server_id');
@@ -81,4 +81,9 @@ CREATE TABLE IF NOT EXISTS statuses (
 
 CREATE TABLE IF NOT EXISTS whitelist (
     user_id BIGINT PRIMARY KEY
-);
\ No newline at end of file
+);
+-- notify_invalidation() is defined in servers.sql
+DROP TRIGGER IF EXISTS whitelist_invalidation ON whitelist;
+CREATE TRIGGER whitelist_invalidation
+AFTER INSERT OR UPDATE OR DELETE ON whitelist
+FOR EACH ROW EXECUTE PROCEDURE notify_invalidation('user_id');
@@ -9,12 +9,17 @@ from collections import defaultdict
 
 from settings import constants
 from utilities import utils
+from utilities import cluster
 
 log = logging.getLogger("INFO_LOGGER")
 
 scripts = [x[:-4] for x in sorted(os.listdir("./data/scripts")) if x.endswith(".sql")]
 cxn = asyncio.get_event_loop().run_until_complete(
-    asyncpg.create_pool(constants.postgres)
+    asyncpg.create_pool(
+        constants.postgres,
+        min_size=cluster.current.pool_size,
+        max_size=cluster.current.pool_size,
+    )
 )
 
 prefixes = dict()
@@ -102,6 +107,7 @@ async def load_settings():
             (SELECT ROW_TO_JSON(_) FROM (SELECT
                 servers.muterole,
                 servers.antiinvite,
+                servers.antiraid,
                 servers.reassign,
                 servers.autoroles,
                 servers.profanities
@@ -121,6 +127,7 @@ async def fix_server(server):
             (SELECT ROW_TO_JSON(_) FROM (SELECT
                 servers.muterole,
                 servers.antiinvite,
+                servers.antiraid,
                 servers.reassign,
                 servers.autoroles,
                 servers.profanities
@@ -141,3 +148,31 @@ async def load_prefixes():
     records = await cxn.fetch(query)
     for server_id, prefix_list in records:
         prefixes[server_id] = prefix_list
+
+
+async def reload_prefixes(server_id=None):
+    # Reloads prefixes after another process changed them.
+    if server_id is None:
+        prefixes.clear()
+        return await load_prefixes()
+    query = """
+            SELECT ARRAY_REMOVE(ARRAY_AGG(prefix), NULL)
+            FROM prefixes WHERE server_id = $1;
+            """
+    prefix_list = await cxn.fetchval(query, server_id)
+    if prefix_list is None:  # No rows, back to the default prefix.
+        prefixes.pop(server_id, None)
+    else:
+        prefixes[server_id] = prefix_list
+
+
+async def reload_settings(server_id=None):
+    # Reloads server settings after another process changed them.
+    if server_id is None:
+        return await load_settings()
+    query = "SELECT 1 FROM servers WHERE server_id = $1;"
+    record = await cxn.fetchrow(query, server_id)
+    if record is None:
+        settings.pop(server_id, None)
+    else:
+        await fix_server(server_id)
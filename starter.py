@@ -1,11 +1,110 @@
 import os
+import sys
 import json
+import time
 import click
+import signal
+import asyncio
+import secrets
+import subprocess
+
+RESTART_DELAY = 5  # Seconds before restarting a crashed cluster
+
+
+def recommended_shards(token):
+    """Asks discord how many shards the bot should run."""
+    import aiohttp
+
+    async def fetch():
+        url = "https://discord.com/api/v9/gateway/bot"
+        headers = {"Authorization": f"Bot {token}"}
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, headers=headers) as resp:
+                resp.raise_for_status()
+                return (await resp.json())["shards"]
+
+    return asyncio.get_event_loop().run_until_complete(fetch())
+
+
+def launch(mode, token, clusters, shards, pool_size, port):
+    """
+    Spawns one process per cluster, each running
+    a contiguous range of shards, and restarts
+    any cluster that exits unexpectedly.
+    """
+    from utilities import cluster
+
+    if shards is None:
+        try:
+            shards = recommended_shards(token)
+        except Exception as e:
+            click.echo(f"Unable to fetch the recommended shard count: {e}")
+            shards = clusters
+    shards = max(shards, clusters)
+    secret = secrets.token_hex(16)  # Shared by the clusters for IPC
+
+    commands = []
+    for cluster_id, shard_ids in enumerate(cluster.shard_ranges(shards, clusters)):
+        env = dict(os.environ)
+        env[cluster.ENV] = cluster.Cluster(
+            cluster_id=cluster_id,
+            cluster_count=clusters,
+            shard_ids=shard_ids,
+            shard_count=shards,
+            pool_size=pool_size,
+            port=port,
+            secret=secret,
+        ).to_env()
+        commands.append(([sys.executable, "-u", __file__, mode], env))
+        click.echo(f"Cluster {cluster_id}: shards {shard_ids[0]}-{shard_ids[-1]}")
+
+    processes = [subprocess.Popen(args, env=env) for args, env in commands]
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    restarts = {}  # cluster_id: When a crashed cluster is started again
+    while not stopping:
+        time.sleep(1)
+        now = time.monotonic()
+        for cluster_id, process in enumerate(processes):
+            if stopping:
+                break  # Don't spawn anything stop() can't signal
+            code = process.poll()
+            if code is None:
+                continue
+            if cluster_id not in restarts:
+                click.echo(
+                    f"Cluster {cluster_id} exited with code {code}. "
+                    f"Restarting in {RESTART_DELAY}s..."
+                )
+                restarts[cluster_id] = now + RESTART_DELAY
+            elif now >= restarts[cluster_id]:
+                del restarts[cluster_id]
+                args, env = commands[cluster_id]
+                processes[cluster_id] = subprocess.Popen(args, env=env)
+                if stopping:  # stop() ran while it was starting
+                    processes[cluster_id].send_signal(signal.SIGINT)
+
+    for process in processes:
+        process.wait()
 
 
 @click.command()
 @click.argument("mode", default="production")
-def main(mode):
+@click.option("--clusters", default=1, help="Number of processes to run.")
+@click.option("--shards", default=None, type=int, help="Total number of shards.")
+@click.option("--pool-size", default=10, help="Postgres connections per cluster.")
+@click.option("--ipc-port", default=20000, help="Port of cluster 0's IPC server.")
+def main(mode, clusters, shards, pool_size, ipc_port):
     """Launches the bot."""
     mode = mode.lower()
 
@@ -26,10 +125,21 @@ def main(mode):
         tester = False
         token = conf["token"]
 
-    from core import bot
-
     block = "#" * (len(mode) + 19)
     startmsg = f"{block}\n## Running {mode.capitalize()} Mode ## \n{block}"
+
+    from utilities import cluster
+
+    if cluster.ENV not in os.environ:
+        if clusters > 1:  # We're the launcher, the clusters run the bot.
+            click.echo(startmsg)
+            return launch(mode, token, clusters, shards, pool_size, ipc_port)
+        cluster.current.pool_size = pool_size
+
+    from core import bot
+
+    if bot.cluster.clustered:
+        startmsg += f"\n## {bot.cluster.name} ##"
     click.echo(startmsg)
     # run the application ...
     bot.run(token=token, tester=tester)
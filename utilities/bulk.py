@@ -0,0 +1,199 @@
+import time
+import asyncio
+import discord
+
+from collections import deque
+
+from utilities import checks
+
+WORKERS = 5  # Targets handled at once
+PROGRESS_INTERVAL = 5  # Seconds between progress edits
+BAN_BATCH = 200  # Most users discord accepts in one bulk ban
+
+
+def plural(count):
+    return "" if count == 1 else "s"
+
+
+class BulkAction:
+    """
+    Runs a moderation action over many targets.
+    Targets are checked against the role hierarchy up front,
+    then handed to a small pool of workers. discord.py holds
+    one lock per rate limit bucket, so requests to the same
+    route still go out in order and respect the bucket,
+    while the rest of each action (DMs, timers, queries)
+    overlaps instead of waiting its turn.
+
+    Actions take one target, or a list of targets when
+    batch_size is set, in which case they return a dict
+    of the targets that failed and why.
+
+    A cancelled action stops taking new targets and keeps
+    the rest, so calling run() again resumes it.
+    """
+
+    def __init__(
+        self,
+        ctx,
+        targets,
+        action,
+        *,
+        verb,
+        gerund,
+        noun="user",
+        check=checks.check_priv,
+        record=str,
+        batch_size=None,
+        workers=WORKERS,
+    ):
+        self.ctx = ctx
+        self.action = action
+        self.verb = verb  # "Banned"
+        self.gerund = gerund  # "Banning"
+        self.noun = noun
+        self.check = check
+        self.record = record  # Turns a target into a mod_action entry
+        self.batch_size = batch_size
+        self.workers = workers
+
+        self.total = len(targets)
+        self.pending = deque(targets)
+        self.running = {}  # Targets in flight, in the order they were taken
+        self.succeeded = []
+        self.failed = []  # (name, reason) for helpers.error_info
+        self.checked = False
+        self.stopping = False
+        self.elapsed = 0.0
+
+    @property
+    def done(self):
+        return len(self.succeeded) + len(self.failed)
+
+    @property
+    def rate(self):
+        return len(self.succeeded) / self.elapsed if self.elapsed else 0.0
+
+    async def prefilter(self):
+        if self.check is None:
+            return
+        allowed = deque()
+        for target in self.pending:
+            res = await self.check(self.ctx, target)
+            if res:
+                self.failed.append((str(target), res))
+            else:
+                allowed.append(target)
+        self.pending = allowed
+
+    def cancel(self):
+        """Stops after the targets in flight finish."""
+        self.stopping = True
+
+    async def run(self, message=None):
+        """
+        Runs until every target is handled or the action is
+        cancelled. Edits the message with progress if given.
+        """
+        if not self.checked:
+            await self.prefilter()
+            self.checked = True
+
+        self.stopping = False
+        started = time.monotonic()
+        count = min(self.workers, len(self.pending))
+        workers = [asyncio.create_task(self.worker()) for _ in range(count)]
+        reporter = None
+        if message is not None:
+            reporter = asyncio.create_task(self.report(message, started))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if reporter is not None:
+                reporter.cancel()
+            self.elapsed += time.monotonic() - started
+            # Anything interrupted mid request is retried on resume.
+            self.pending.extendleft(reversed(list(self.running)))
+            self.running.clear()
+
+    async def worker(self):
+        while self.pending and not self.stopping:
+            if self.batch_size:
+                count = min(self.batch_size, len(self.pending))
+                batch = [self.pending.popleft() for _ in range(count)]
+            else:
+                batch = [self.pending.popleft()]
+            self.running.update(dict.fromkeys(batch))
+
+            try:
+                if self.batch_size:
+                    failures = await self.action(batch) or {}
+                else:
+                    await self.action(batch[0])
+                    failures = {}
+            except Exception as e:
+                failures = {target: e for target in batch}
+
+            for target in batch:
+                self.running.pop(target, None)
+                if target in failures:
+                    self.failed.append((str(target), failures[target]))
+                else:
+                    self.succeeded.append(self.record(target))
+
+    def progress(self, elapsed=None):
+        elapsed = self.elapsed if elapsed is None else elapsed
+        rate = len(self.succeeded) / elapsed if elapsed else 0.0
+        return (
+            f"{self.ctx.bot.emote_dict['loading']} **{self.gerund} "
+            f"{self.total:,} {self.noun}{plural(self.total)}... "
+            f"{self.done:,}/{self.total:,} ({rate:.1f}/s)**"
+        )
+
+    async def report(self, message, started):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                await message.edit(content=self.progress(time.monotonic() - started))
+            except discord.HTTPException:
+                pass
+
+    def summary(self):
+        count = len(self.succeeded)
+        return (
+            f"{self.verb} {count:,}/{self.total:,} {self.noun}{plural(self.total)} "
+            f"in {self.elapsed:.1f}s ({self.rate:.1f}/s)."
+        )
+
+
+async def bulk_ban(guild, users, *, reason=None, delete_message_days=0):
+    """
+    Bans up to BAN_BATCH users with one request.
+    Falls back to one request per user if the bot
+    cannot use the bulk ban endpoint.
+    Returns a dict of the users that were not banned.
+    """
+    route = discord.http.Route("POST", "/guilds/{guild_id}/bulk-ban", guild_id=guild.id)
+    payload = {
+        "user_ids": [user.id for user in users],
+        "delete_message_seconds": delete_message_days * 86400,
+    }
+    try:
+        data = await guild._state.http.request(route, json=payload, reason=reason)
+    except discord.HTTPException as e:
+        if e.status not in (403, 404):
+            raise
+        failures = {}
+        for user in users:
+            try:
+                await guild.ban(
+                    user, reason=reason, delete_message_days=delete_message_days
+                )
+            except Exception as e:
+                failures[user] = e
+        return failures
+
+    banned = {int(user_id) for user_id in data.get("banned_users", [])}
+    return {user: "Unable to ban user." for user in users if user.id not in banned}
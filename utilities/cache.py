@@ -0,0 +1,188 @@
+import time
+import asyncio
+import discord
+
+from collections import OrderedDict, deque, namedtuple
+
+MISSING = object()
+
+Snapshot = namedtuple(
+    "Snapshot",
+    ["id", "author_id", "content", "created_at", "attachments", "stored_at"],
+)
+
+
+class SnipeCache:
+    """
+    Per channel ring buffers of compact message snapshots.
+    Each channel keeps at most maxlen snapshots and entries
+    older than ttl seconds are dropped when the channel is read.
+    """
+
+    def __init__(self, maxlen=50, ttl=None):
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self.channels = {}
+
+    def __len__(self):
+        return sum(len(d) for d in self.channels.values())
+
+    def add(self, message):
+        snapshot = Snapshot(
+            message.id,
+            message.author.id,
+            message.content,
+            message.created_at,
+            tuple(a.url for a in message.attachments),
+            time.monotonic(),
+        )
+        buffer = self.channels.get(message.channel.id)
+        if buffer is None:
+            buffer = self.channels[message.channel.id] = deque(maxlen=self.maxlen)
+        buffer.append(snapshot)
+
+    def expire(self, channel_id):
+        buffer = self.channels.get(channel_id)
+        if buffer is None:
+            return
+        if self.ttl is not None:
+            cutoff = time.monotonic() - self.ttl
+            while buffer and buffer[0].stored_at < cutoff:
+                buffer.popleft()
+        if not buffer:
+            del self.channels[channel_id]
+
+    def prune(self):
+        for channel_id in list(self.channels):
+            self.expire(channel_id)
+
+    def get(self, channel_id, author_id=None):
+        """
+        Returns the latest snapshot in a channel,
+        optionally only from a specific author.
+        """
+        self.expire(channel_id)
+        buffer = self.channels.get(channel_id, ())
+        for snapshot in reversed(buffer):
+            if author_id is None or snapshot.author_id == author_id:
+                return snapshot
+
+    def remove_channel(self, channel_id):
+        self.channels.pop(channel_id, None)
+
+
+class TTLCache:
+    """
+    A mapping whose entries expire after ttl seconds.
+    The least recently set entry is evicted once maxsize is hit.
+    Keeps hit and miss counters for monitoring.
+    """
+
+    def __init__(self, ttl, maxsize=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.data = OrderedDict()  # key: (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            del self.data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        self.data.pop(key, None)
+        self.data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        if self.maxsize and len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        entry = self.data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self.data.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class InviteCache:
+    """
+    Resolves invite codes to the ID of the server they point to.
+    A server's own vanity code and known invites resolve locally.
+    Everything else goes through a TTL cache that stores both
+    valid (positive) and unknown (negative) codes. Concurrent
+    lookups of the same code share one request.
+    """
+
+    def __init__(self, bot, ttl=3600, negative_ttl=300, maxsize=10000):
+        self.bot = bot
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(ttl, maxsize)
+        self.inflight = {}
+        self.local_hits = 0
+
+    @staticmethod
+    def get_code(url):
+        return url.rstrip("/").split("/")[-1]
+
+    def resolve_locally(self, code, guild):
+        if code == getattr(guild, "vanity_url_code", None):
+            return True
+        invites = self.bot.invites.get(guild.id, ())
+        return any(invite.code == code for invite in invites)
+
+    async def fetch(self, code):
+        try:
+            invite = await self.bot.fetch_invite(
+                code, with_counts=False, with_expiration=False
+            )
+        except discord.NotFound:
+            self.cache.set(code, None, self.negative_ttl)
+            return None
+        guild_id = invite.guild.id if invite.guild else None
+        self.cache.set(code, guild_id)
+        return guild_id
+
+    async def resolve(self, url, guild):
+        """
+        Returns the server ID an invite points to,
+        or None if the invite does not exist.
+        Raises discord.HTTPException if the lookup fails.
+        """
+        code = self.get_code(url)
+        if self.resolve_locally(code, guild):
+            self.local_hits += 1
+            return guild.id
+
+        guild_id = self.cache.get(code, MISSING)
+        if guild_id is not MISSING:
+            return guild_id
+
+        task = self.inflight.get(code)
+        if task is None:
+            task = self.bot.loop.create_task(self.fetch(code))
+            self.inflight[code] = task
+            task.add_done_callback(lambda _: self.inflight.pop(code, None))
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "local hits": self.local_hits,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "hit rate": f"{self.cache.hit_rate:.2%}",
+            "size": len(self.cache),
+            "in flight": len(self.inflight),
+        }
@@ -41,47 +41,7 @@ def is_disabled(ctx, command):
     if not config:
         return False
 
-    ignored = config.ignored
-    command_config = config.command_config
-    # Reasons for bypassing
-    if ctx.guild is None:
-        return False  # Do not restrict in DMs.
-
-    if is_admin(ctx):
-        return False  # Contibutors are immune.
-
-    if isinstance(ctx.author, discord.Member):
-        if ctx.author.guild_permissions.manage_guild:
-            return False  # Manage guild is immune.
-
-    # Now check channels, roles, and users.
-    if ctx.channel.id in ignored[ctx.guild.id]:
-        return True  # Channel is ignored.
-
-    if ctx.author.id in ignored[ctx.guild.id]:
-        return True  # User is ignored.
-
-    if any(
-        (
-            role_id in ignored[ctx.guild.id]
-            for role_id in [r.id for r in ctx.author.roles]
-        )
-    ):
-        return True  # Role is ignored.
-
-    if str(command) in command_config[ctx.guild.id]:
-        return True  # Disabled for the whole server.
-
-    if str(command) in command_config[ctx.channel.id]:
-        return True  # Disabled for the channel
-
-    if str(command) in command_config[ctx.author.id]:
-        return True  # Disabled for the user
-
-    if any((str(command) in command_config[role_id] for role_id in ctx.author._roles)):
-        return True  # Disabled for the role
-
-    return False  # Ok just in case we get here...
+    return config.resolver.is_blocked(ctx, command)
 
 
 def is_mod():
@@ -0,0 +1,199 @@
+import os
+import hmac
+import json
+import asyncio
+import logging
+import traceback
+
+log = logging.getLogger("INFO_LOGGER")
+
+ENV = "NEUTRA_CLUSTER"  # Set by the launcher for each cluster process
+HOST = "127.0.0.1"
+BASE_PORT = 20000  # Cluster N listens on BASE_PORT + N
+POOL_SIZE = 10  # asyncpg's default pool size
+TIMEOUT = 10  # Seconds to wait on another cluster
+READ_LIMIT = 2 ** 24  # Max bytes in one IPC message
+
+
+def shard_ranges(shard_count, cluster_count):
+    """
+    Splits shard IDs into cluster_count contiguous ranges.
+    Earlier clusters take one extra shard when
+    the shards don't divide evenly.
+    """
+    per_cluster, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        end = start + per_cluster + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+class Cluster:
+    """
+    Describes the slice of the bot this process runs.
+    A process started without the launcher is a single
+    cluster that lets discord.py pick the shards.
+    """
+
+    def __init__(
+        self,
+        cluster_id=0,
+        cluster_count=1,
+        shard_ids=None,
+        shard_count=None,
+        pool_size=POOL_SIZE,
+        port=BASE_PORT,
+        secret=None,
+    ):
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.pool_size = pool_size
+        self.port = port  # Base port, shared by every cluster
+        self.secret = secret
+
+    @property
+    def clustered(self):
+        return self.cluster_count > 1
+
+    def owns(self, guild_id):
+        """
+        Whether a guild's events are handled by this cluster.
+        A guild_id of None means DMs, which Discord sends to shard 0.
+        """
+        if not self.clustered:
+            return True
+        if guild_id is None:
+            return 0 in self.shard_ids
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    @property
+    def name(self):
+        return f"Cluster {self.cluster_id}"
+
+    def get_port(self, cluster_id):
+        return self.port + cluster_id
+
+    @classmethod
+    def from_env(cls):
+        data = os.environ.get(ENV)
+        if not data:
+            return cls()
+        return cls(**json.loads(data))
+
+    def to_env(self):
+        return json.dumps(self.__dict__)
+
+
+current = Cluster.from_env()
+
+
+class IPC:
+    """
+    Lightweight request/response IPC between clusters.
+    Each cluster serves newline delimited JSON on a local
+    port. Handlers are registered by name, take keyword
+    arguments, and return JSON serializable data.
+    When the bot isn't clustered, every call runs locally.
+    """
+
+    def __init__(self, bot, cluster=current):
+        self.bot = bot
+        self.cluster = cluster
+        self.handlers = {}
+        self.server = None
+
+    def register(self, name, handler):
+        self.handlers[name] = handler
+
+    def unregister(self, name):
+        self.handlers.pop(name, None)
+
+    async def start(self):
+        if not self.cluster.clustered or self.server:
+            return
+        self.server = await asyncio.start_server(
+            self.serve,
+            HOST,
+            self.cluster.get_port(self.cluster.cluster_id),
+            limit=READ_LIMIT,
+        )
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def run_local(self, name, kwargs):
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise LookupError(f"No IPC handler named {name}")
+        return await handler(**kwargs)
+
+    async def serve(self, reader, writer):
+        try:
+            line = await reader.readline()
+            request = json.loads(line)
+            secret = str(request.get("secret", ""))
+            if not hmac.compare_digest(secret, str(self.cluster.secret or "")):
+                return  # Not one of ours
+            try:
+                data = await self.run_local(request["name"], request["kwargs"])
+            except Exception as e:
+                self.bot.dispatch("error", "ipc_error", tb=traceback.format_exc())
+                response = {"error": str(e)}
+            else:
+                response = {"data": data}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        except (ValueError, KeyError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def request(self, cluster_id, name, **kwargs):
+        """
+        Runs a handler on a cluster and returns its data.
+        Raises RuntimeError if the cluster reported an error.
+        """
+        if cluster_id == self.cluster.cluster_id:
+            return await self.run_local(name, kwargs)
+
+        port = self.cluster.get_port(cluster_id)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(HOST, port, limit=READ_LIMIT), TIMEOUT
+        )
+        try:
+            payload = {"secret": self.cluster.secret, "name": name, "kwargs": kwargs}
+            writer.write(json.dumps(payload).encode("utf-8") + b"\n")
+            await writer.drain()
+            response = json.loads(await asyncio.wait_for(reader.readline(), TIMEOUT))
+        finally:
+            writer.close()
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["data"]
+
+    async def broadcast(self, name, **kwargs):
+        """
+        Runs a handler on every cluster.
+        Returns a list of results in cluster order.
+        Clusters that failed to respond give None.
+        """
+        results = await asyncio.gather(
+            *(
+                self.request(cluster_id, name, **kwargs)
+                for cluster_id in range(self.cluster.cluster_count)
+            ),
+            return_exceptions=True,
+        )
+        for cluster_id, result in enumerate(results):
+            if isinstance(result, Exception):
+                log.warning(f"IPC {name} failed on cluster {cluster_id}: {result}")
+                results[cluster_id] = None
+        return results
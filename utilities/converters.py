@@ -40,6 +40,23 @@ async def prettify(ctx, arg):
     return pretty_arg
 
 
+def resolve_members(ctx, member_ids):
+    """Returns the cached members for a set of member IDs."""
+    return [m for m in map(ctx.guild.get_member, member_ids) if m]
+
+
+def find_members(ctx, user_name):
+    """
+    Case insensitive username or nickname
+    lookup through the server's name index.
+    """
+    names = ctx.bot.name_index.get(ctx.guild)
+    member_ids = names.find_folded("nick", user_name) | names.find_folded(
+        "name", user_name
+    )
+    return resolve_members(ctx, member_ids)
+
+
 async def disambiguate(ctx, matches, sort=lambda m: str(m), timeout=30):
     if len(matches) == 1:
         return matches[0]
@@ -193,29 +210,16 @@ class UniqueMember(commands.Converter):
         Returns list of possible matches.
         """
 
-        member_tags = [str(m) for m in ctx.guild.members]
-        member_names = [m.name for m in ctx.guild.members]
-        member_nicks = [m.display_name for m in ctx.guild.members]
-
-        lower_member_tags = [str(m).lower() for m in ctx.guild.members]
-        lower_member_names = [m.name.lower() for m in ctx.guild.members]
-        lower_member_nicks = [m.display_name.lower() for m in ctx.guild.members]
-
-        def pred(member):
-            if member_name in member_tags:
-                return str(member) == member_name
-            if member_name in lower_member_tags:  # Case insensitive name#discrim
-                return member.name.lower() == member_name.lower()
-            if member_name in member_names:
-                return member.name == member_name
-            if member_name in lower_member_names:  # Case insensitive name
-                return member.name.lower() == member_name.lower()
-            if member_name in member_nicks:
-                return member.display_name == member_name
-            if member_name in lower_member_nicks:  # Case insensitive nickname
-                return member.display_name.lower() == member_name.lower()
-
-        results = [m for m in ctx.guild.members if pred(m)]
+        names = ctx.bot.name_index.get(ctx.guild)
+        results = []
+        for field in ("tag", "name", "nick"):
+            member_ids = names.find(field, member_name)
+            if not member_ids:  # Case insensitive fallback
+                member_ids = names.find_folded(field, member_name)
+            if member_ids:
+                results = resolve_members(ctx, member_ids)
+                break
+
         if results:
             if len(results) > 1:
                 raise exceptions.AmbiguityError(member_name, "User")
@@ -511,19 +515,11 @@ class DiscordBot(commands.Converter):
         tag_match = USERNAME_REGEX.match(bot_name)
 
         if tag_match:
-
-            def pred(member):
-                return member.name == tag_match.group(
-                    1
-                ) and member.discriminator == tag_match.group(2)
-
             result = None
             if ctx.guild:
-                result = discord.utils.get(
-                    ctx.guild.members,
-                    name=tag_match.group(1),
-                    discriminator=tag_match.group(2),
-                )
+                names = ctx.bot.name_index.get(ctx.guild)
+                members = resolve_members(ctx, names.find("tag", tag_match.group(0)))
+                result = members[0] if members else None
             if not result:
                 result = discord.utils.get(
                     ctx.bot.users,
@@ -534,14 +530,7 @@ class DiscordBot(commands.Converter):
                 return [result]
 
         if ctx.guild:
-            user_name = bot_name.lower()
-
-            def pred(member):
-                return (
-                    member.nick and member.nick.lower() == user_name
-                ) or member.name.lower() == user_name
-
-            return [m for m in ctx.guild.members if pred(m)]
+            return find_members(ctx, bot_name)
         return []
 
     async def find_match(self, ctx, argument):
@@ -611,19 +600,11 @@ class DiscordUser(commands.Converter):
         tag_match = USERNAME_REGEX.match(user_name)
 
         if tag_match:
-
-            def pred(member):
-                return member.name == tag_match.group(
-                    1
-                ) and member.discriminator == tag_match.group(2)
-
             result = None
             if ctx.guild:
-                result = discord.utils.get(
-                    ctx.guild.members,
-                    name=tag_match.group(1),
-                    discriminator=tag_match.group(2),
-                )
+                names = ctx.bot.name_index.get(ctx.guild)
+                members = resolve_members(ctx, names.find("tag", tag_match.group(0)))
+                result = members[0] if members else None
             if not result:
                 result = discord.utils.get(
                     ctx.bot.users,
@@ -634,14 +615,7 @@ class DiscordUser(commands.Converter):
                 return [result]
 
         if ctx.guild:
-            user_name = user_name.lower()
-
-            def pred(member):
-                return (
-                    member.nick and member.nick.lower() == user_name
-                ) or member.name.lower() == user_name
-
-            return [m for m in ctx.guild.members if pred(m)]
+            return find_members(ctx, user_name)
         return []
 
     async def find_match(self, ctx, argument):
@@ -843,19 +817,11 @@ class DiscordMember(commands.Converter):
         tag_match = USERNAME_REGEX.match(user_name)
 
         if tag_match:
-
-            def pred(member):
-                return member.name == tag_match.group(
-                    1
-                ) and member.discriminator == tag_match.group(2)
-
             result = None
             if ctx.guild:
-                result = discord.utils.get(
-                    ctx.guild.members,
-                    name=tag_match.group(1),
-                    discriminator=tag_match.group(2),
-                )
+                names = ctx.bot.name_index.get(ctx.guild)
+                members = resolve_members(ctx, names.find("tag", tag_match.group(0)))
+                result = members[0] if members else None
             if not result:
                 raise commands.BadArgument(
                     f"User `{await prettify(ctx, user_name)}` not found."
@@ -864,14 +830,7 @@ class DiscordMember(commands.Converter):
                 return [result]
 
         if ctx.guild:
-            user_name = user_name.lower()
-
-            def pred(member):
-                return (
-                    member.nick and member.nick.lower() == user_name
-                ) or member.name.lower() == user_name
-
-            return [m for m in ctx.guild.members if pred(m)]
+            return find_members(ctx, user_name)
         return []
 
     async def find_match(self, ctx, argument):
@@ -0,0 +1,92 @@
+import discord
+
+from datetime import timedelta
+
+from utilities import utils
+
+BULK_DELETE_LIMIT = 100  # Most messages discord deletes in one request
+BULK_DELETE_AGE = timedelta(days=14)  # Older messages can't be bulk deleted
+
+
+async def scan(messageable, *, limit, before=None, after=None, check=None):
+    """
+    Yields messages newest first. Messages still in the
+    cache are used before paging the API, which is asked
+    for 100 messages at a time. Only messages that pass
+    the check are yielded.
+    """
+    history = utils.CachedHistoryIterator(
+        messageable, limit, before=before, after=after, oldest_first=False
+    )
+    async for message in history:
+        if after and message.id <= after.id:
+            break  # Everything past here is older than the search
+        if check is None or check(message):
+            yield message
+
+
+class Deleter:
+    """
+    Collects messages to delete and deletes them in
+    bulk deletes of 100. Messages too old to bulk
+    delete are deleted one at a time.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        # Leave a minute of leeway so a message doesn't age out mid request.
+        self.cutoff = discord.utils.time_snowflake(
+            discord.utils.utcnow() - BULK_DELETE_AGE + timedelta(minutes=1)
+        )
+        self.pending = []
+        self.deleted = []
+
+    async def add(self, message):
+        if message.id > self.cutoff:
+            self.pending.append(message)
+            if len(self.pending) == BULK_DELETE_LIMIT:
+                await self.flush()
+        else:
+            try:
+                await self.channel.get_partial_message(message.id).delete()
+            except discord.NotFound:
+                return  # Already deleted
+            self.deleted.append(message)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await self.channel.delete_messages(batch)
+        except discord.NotFound:
+            return  # A single message was already deleted
+        self.deleted.extend(batch)
+
+
+async def purge(channel, *, limit, check=None, before=None, after=None):
+    """
+    Deletes the messages that pass a check while the
+    history is still being scanned.
+    Returns the deleted messages.
+    """
+    deleter = Deleter(channel)
+    async for message in scan(
+        channel, limit=limit, before=before, after=after, check=check
+    ):
+        await deleter.add(message)
+    await deleter.flush()
+    return deleter.deleted
+
+
+async def delete_messages(channel, messages):
+    """
+    Deletes known messages or discord.Objects
+    without scanning the channel for them.
+    Returns the deleted messages.
+    """
+    deleter = Deleter(channel)
+    for message in messages:
+        await deleter.add(message)
+    await deleter.flush()
+    return deleter.deleted
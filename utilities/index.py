@@ -0,0 +1,311 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+def join_key(member):
+    # Members with an unknown join date sort first.
+    joined_at = member.joined_at
+    return (joined_at.timestamp() if joined_at else -1, member.id)
+
+
+class JoinOrder:
+    """
+    The members of one server sorted by join date.
+    Stored as a sorted list of (timestamp, member_id)
+    so rank, nth member and date range lookups
+    are binary searches instead of full sorts.
+    """
+
+    __slots__ = ("keys",)
+
+    def __init__(self, members=()):
+        self.keys = sorted(join_key(m) for m in members)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, member):
+        key = join_key(member)
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            self.keys.insert(index, key)
+
+    def remove(self, member):
+        key = join_key(member)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+    def rank(self, member):
+        """
+        Returns the 1-based join position of a member,
+        or None if the member isn't indexed.
+        """
+        key = join_key(member)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index + 1
+
+    def nth(self, index):
+        """Returns the ID of the member at a 0-based position."""
+        return self.keys[index][1]
+
+    def slice(self, start=None, stop=None, *, reverse=False):
+        """Returns member IDs by join position."""
+        keys = self.keys[start:stop]
+        if reverse:
+            keys.reverse()
+        return [member_id for _, member_id in keys]
+
+    def between(self, after=None, before=None):
+        """Returns the IDs of members that joined between two datetimes."""
+        start = 0
+        stop = None
+        if after:
+            start = bisect_right(self.keys, (after.timestamp(), float("inf")))
+        if before:
+            stop = bisect_left(self.keys, (before.timestamp(), -1))
+        return self.slice(start, stop)
+
+
+class JoinIndex:
+    """
+    Join orders for every server, built the first time
+    they are needed and kept up to date on joins and leaves.
+    An order is dropped with invalidate() when the server's
+    member cache is reloaded, and rebuilt on the next lookup.
+    """
+
+    def __init__(self):
+        self.guilds = {}  # server_id: JoinOrder
+
+    def get(self, guild):
+        order = self.guilds.get(guild.id)
+        if order is None:
+            order = self.guilds[guild.id] = JoinOrder(guild.members)
+        return order
+
+    def add(self, member):
+        order = self.guilds.get(member.guild.id)
+        if order is not None and member.guild.get_member(member.id):
+            order.add(member)
+
+    def remove(self, member):
+        order = self.guilds.get(member.guild.id)
+        if order is not None:
+            order.remove(member)
+
+    def invalidate(self, guild_id):
+        self.guilds.pop(guild_id, None)
+
+
+NAME_FIELDS = ("tag", "name", "nick")
+PREFIX_FIELDS = ("name", "nick")  # Fields with prefix and substring searches
+GRAM_SIZE = 3
+EMPTY = frozenset()
+
+
+def name_values(member):
+    return (str(member), member.name, member.nick)
+
+
+def split_grams(value):
+    return {value[i : i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
+
+
+def add_id(mapping, key, member_id):
+    """
+    Adds a member ID under a key. Most keys belong to a single
+    member, so a bare ID is stored until a second one arrives.
+    Returns True if the key is new.
+    """
+    current = mapping.get(key)
+    if current is None:
+        mapping[key] = member_id
+        return True
+    if isinstance(current, set):
+        current.add(member_id)
+    elif current != member_id:
+        mapping[key] = {current, member_id}
+    return False
+
+
+def remove_id(mapping, key, member_id):
+    """
+    Removes a member ID from a key.
+    Returns True if the key is gone.
+    """
+    current = mapping.get(key)
+    if isinstance(current, set):
+        current.discard(member_id)
+        if len(current) == 1:
+            mapping[key] = current.pop()
+        return False
+    if current == member_id:
+        del mapping[key]
+        return True
+    return False
+
+
+def get_ids(mapping, key):
+    current = mapping.get(key)
+    if current is None:
+        return EMPTY
+    if isinstance(current, set):
+        return frozenset(current)
+    return frozenset((current,))
+
+
+class MemberNames:
+    """
+    The tags, usernames and nicknames of one server's members.
+    Each field maps case folded values to member IDs,
+    and folded usernames and nicknames are also kept sorted
+    for prefix lookups. Substring searches scan the distinct
+    folded values, or use an index of 3 character grams
+    when it is enabled, which trades memory for fast
+    searches on big servers.
+    """
+
+    __slots__ = ("entries", "folded", "sorted", "grams")
+
+    def __init__(self, members=(), *, ngrams=False):
+        self.entries = {}  # member_id: (tag, name, nick)
+        self.folded = {field: {} for field in NAME_FIELDS}
+        self.sorted = {field: [] for field in PREFIX_FIELDS}
+        self.grams = {field: {} for field in PREFIX_FIELDS} if ngrams else None
+        for member in members:
+            self.index(member.id, name_values(member), sort=False)
+        for field, keys in self.sorted.items():
+            keys[:] = sorted(self.folded[field])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def index(self, member_id, values, *, sort=True):
+        self.entries[member_id] = values
+        for field, value in zip(NAME_FIELDS, values):
+            if value is None:
+                continue
+            folded = value.casefold()
+            if not add_id(self.folded[field], folded, member_id):
+                continue
+            if field not in self.sorted:
+                continue
+            if sort:
+                insort(self.sorted[field], folded)
+            if self.grams is not None:
+                for gram in split_grams(folded):
+                    self.grams[field].setdefault(gram, set()).add(folded)
+
+    def unindex(self, member_id):
+        values = self.entries.pop(member_id, None)
+        if values is None:
+            return
+        for field, value in zip(NAME_FIELDS, values):
+            if value is None:
+                continue
+            folded = value.casefold()
+            if not remove_id(self.folded[field], folded, member_id):
+                continue
+            if field not in self.sorted:
+                continue
+            keys = self.sorted[field]
+            index = bisect_left(keys, folded)
+            if index < len(keys) and keys[index] == folded:
+                del keys[index]
+            if self.grams is not None:
+                for gram in split_grams(folded):
+                    keys = self.grams[field].get(gram)
+                    if keys is not None:
+                        keys.discard(folded)
+                        if not keys:
+                            del self.grams[field][gram]
+
+    def update(self, member_id, values):
+        if self.entries.get(member_id) != values:
+            self.unindex(member_id)
+            self.index(member_id, values)
+
+    def find(self, field, value):
+        """Returns the IDs of members with an exact value."""
+        position = NAME_FIELDS.index(field)
+        return frozenset(
+            member_id
+            for member_id in self.find_folded(field, value)
+            if self.entries[member_id][position] == value
+        )
+
+    def find_folded(self, field, value):
+        """Returns the IDs of members with a case insensitive value."""
+        return get_ids(self.folded[field], value.casefold())
+
+    def prefix(self, field, value):
+        """Returns the IDs of members whose value starts with a prefix."""
+        value = value.casefold()
+        keys = self.sorted[field]
+        results = []
+        for index in range(bisect_left(keys, value), len(keys)):
+            if not keys[index].startswith(value):
+                break
+            results.extend(sorted(get_ids(self.folded[field], keys[index])))
+        return results
+
+    def search(self, field, value):
+        """Returns the IDs of members whose value contains a substring."""
+        value = value.casefold()
+        if self.grams is None or len(value) < GRAM_SIZE:
+            keys = self.folded[field]
+        else:
+            gram_sets = sorted(
+                (self.grams[field].get(gram, EMPTY) for gram in split_grams(value)),
+                key=len,
+            )
+            keys = gram_sets[0].intersection(*gram_sets[1:])
+        results = set()
+        for folded in keys:
+            if value in folded:
+                results.update(get_ids(self.folded[field], folded))
+        return results
+
+
+class NameIndex:
+    """
+    Member names for every server, built the first time
+    they are needed and kept up to date on joins, leaves,
+    nickname changes and username changes.
+    Like the join index, a server's names are dropped
+    with invalidate() when its member cache is reloaded.
+    """
+
+    def __init__(self, *, ngrams=False):
+        self.ngrams = ngrams
+        self.guilds = {}  # server_id: MemberNames
+
+    def get(self, guild):
+        names = self.guilds.get(guild.id)
+        if names is None:
+            names = self.guilds[guild.id] = MemberNames(
+                guild.members, ngrams=self.ngrams
+            )
+        return names
+
+    def add(self, member):
+        names = self.guilds.get(member.guild.id)
+        if names is not None and member.guild.get_member(member.id):
+            names.update(member.id, name_values(member))
+
+    def remove(self, member):
+        names = self.guilds.get(member.guild.id)
+        if names is not None:
+            names.unindex(member.id)
+
+    def update_user(self, user):
+        """Reindexes a user in every server they share with the bot."""
+        tag, name = str(user), user.name
+        for names in self.guilds.values():
+            values = names.entries.get(user.id)
+            if values is not None:
+                names.update(user.id, (tag, name, values[2]))
+
+    def invalidate(self, guild_id):
+        self.guilds.pop(guild_id, None)
@@ -0,0 +1,105 @@
+import json
+import asyncio
+import logging
+
+from collections import defaultdict
+
+from utilities import utils
+
+log = logging.getLogger("INFO_LOGGER")
+
+CHANNEL = "cache_invalidation"  # Must match notify_invalidation() in servers.sql
+RECONNECT_DELAY = 5  # Seconds between attempts to restore the listener
+
+
+class CacheInvalidator:
+    """
+    Keeps per-process caches in sync across processes.
+    Database triggers publish a (table, key) event on the
+    cache_invalidation channel whenever a cached table is
+    written to, no matter which process or app wrote it.
+    Every process listens on a dedicated connection and
+    reloads just the affected key.
+
+    Handlers are coroutine functions that take the key.
+    A key of None means events may have been missed
+    and the whole cache should be reloaded.
+    """
+
+    def __init__(self, bot, channel=CHANNEL):
+        self.bot = bot
+        self.channel = channel
+        self.handlers = defaultdict(list)  # table: [handlers]
+        self.connection = None
+        self.received = 0  # Events received since startup
+        self.closed = False
+
+    def subscribe(self, table, handler):
+        self.handlers[table].append(handler)
+
+    def unsubscribe(self, table, handler):
+        try:
+            self.handlers[table].remove(handler)
+        except ValueError:
+            pass
+
+    async def start(self):
+        self.connection = await self.bot.cxn.acquire()
+        await self.connection.add_listener(self.channel, self.on_notify)
+        self.connection.add_termination_listener(self.on_terminate)
+
+    async def close(self):
+        self.closed = True
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        try:
+            await connection.remove_listener(self.channel, self.on_notify)
+        finally:
+            await self.bot.cxn.release(connection)
+
+    def on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+            table, key = event["table"], event["key"]
+        except (ValueError, KeyError):
+            log.warning(f"Malformed cache invalidation payload: {payload}")
+            return
+        self.received += 1
+        for handler in self.handlers.get(table, ()):
+            self.bot.loop.create_task(self.run(handler, key))
+
+    def on_terminate(self, connection):
+        if self.closed:
+            return
+        log.warning("Cache invalidation listener lost its connection.")
+        self.bot.loop.create_task(self.reconnect())
+
+    async def reconnect(self):
+        connection, self.connection = self.connection, None
+        try:
+            await self.bot.cxn.release(connection)
+        except Exception:
+            pass
+        while not self.closed:
+            try:
+                await self.start()
+            except Exception as e:
+                log.warning(f"Unable to restore cache invalidation listener: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+            else:
+                break
+        if self.closed:
+            return
+        # Anything written while we were disconnected was missed.
+        for handlers in list(self.handlers.values()):
+            for handler in handlers:
+                await self.run(handler, None)
+
+    async def run(self, handler, key):
+        try:
+            await handler(key)
+        except Exception as e:
+            self.bot.dispatch(
+                "error", "invalidation_error", tb=utils.traceback_maker(e)
+            )
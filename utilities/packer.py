@@ -0,0 +1,194 @@
+import io
+import discord
+
+# Discord's embed limits
+# https://discord.com/developers/docs/resources/channel#embed-object-embed-limits
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+FIELD_COUNT_LIMIT = 25
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+FOOTER_LIMIT = 2048
+AUTHOR_LIMIT = 256
+TOTAL_LIMIT = 6000  # Per embed and per message
+EMBEDS_PER_MESSAGE = 10
+FILES_PER_MESSAGE = 10
+
+MAX_SPLIT_EMBEDS = 3  # Longer descriptions are sent as a text attachment
+ATTACHMENT_PREVIEW = 1000  # Characters kept in the embed when attaching
+
+
+def truncate(string, max_chars):
+    return (string[: max_chars - 3] + "...") if len(string) > max_chars else string
+
+
+def embed_size(data):
+    """
+    Counts the characters in an embed dict the same
+    way discord does when enforcing the 6000 char limit.
+    """
+    total = len(data.get("title", "")) + len(data.get("description", ""))
+    total += len(data.get("footer", {}).get("text", ""))
+    total += len(data.get("author", {}).get("name", ""))
+    for field in data.get("fields", []):
+        total += len(field["name"]) + len(field["value"])
+    return total
+
+
+def split_text(text, limit):
+    """
+    Splits text into chunks no longer than limit.
+    Prefers newline boundaries and keeps code
+    blocks balanced across chunks.
+    """
+    chunks = []
+    current = ""
+    in_block = False
+
+    def flush():
+        nonlocal current
+        chunk = current
+        if in_block:  # Close the block here and reopen it in the next chunk.
+            chunk += "```"
+        chunks.append(chunk)
+        current = "```\n" if in_block else ""
+
+    for line in text.splitlines(keepends=True):
+        # Leave room for a closing and reopening code fence.
+        room = limit - 8
+        while len(line) > room:
+            space = room - len(current)
+            if space <= 0:
+                flush()
+                continue
+            current += line[:space]
+            line = line[space:]
+            flush()
+        if len(current) + len(line) > room:
+            flush()
+        current += line
+        if line.count("```") % 2:
+            in_block = not in_block
+
+    if current.strip("`\n"):
+        chunks.append(current)
+    return chunks or [""]
+
+
+def clamp(data):
+    """
+    Truncates every embed component that
+    has its own limit. Returns a new dict.
+    """
+    data = dict(data)
+    if "title" in data:
+        data["title"] = truncate(data["title"], TITLE_LIMIT)
+    if "author" in data:
+        data["author"] = dict(data["author"])
+        data["author"]["name"] = truncate(data["author"].get("name", ""), AUTHOR_LIMIT)
+    if "footer" in data:
+        data["footer"] = dict(data["footer"])
+        data["footer"]["text"] = truncate(data["footer"].get("text", ""), FOOTER_LIMIT)
+    if "fields" in data:
+        data["fields"] = [
+            dict(
+                field,
+                name=truncate(field["name"], FIELD_NAME_LIMIT) or "\u200b",
+                value=truncate(field["value"], FIELD_VALUE_LIMIT) or "\u200b",
+            )
+            for field in data["fields"][:FIELD_COUNT_LIMIT]
+        ]
+    # Fields are the last thing to go if the embed is still too big.
+    while embed_size(data) > TOTAL_LIMIT and data.get("fields"):
+        data["fields"].pop()
+    if embed_size(data) > TOTAL_LIMIT:
+        over = embed_size(data) - TOTAL_LIMIT
+        description = data.get("description", "")
+        data["description"] = truncate(description, max(len(description) - over, 3))
+    return data
+
+
+def fit(embed, *, filename="log.txt"):
+    """
+    Makes an embed safe to send.
+    Returns a list of embeds that each fit discord's
+    limits and a list of files holding any text
+    too large to show in an embed.
+    """
+    data = embed.to_dict()
+    description = data.get("description", "")
+    files = []
+
+    if len(description) > DESCRIPTION_LIMIT * MAX_SPLIT_EMBEDS:
+        # Huge body. Show a preview and attach the rest.
+        fp = io.BytesIO(description.encode("utf-8"))
+        files.append(discord.File(fp, filename=filename))
+        preview = truncate(description, ATTACHMENT_PREVIEW)
+        if preview.count("```") % 2:
+            preview += "```"
+        data["description"] = preview + f"\n**Full content attached as `{filename}`**"
+        return [discord.Embed.from_dict(clamp(data))], files
+
+    # Leave room for the title, author, footer and fields on the first embed.
+    overhead = embed_size(clamp(dict(data, description="")))
+    limit = min(DESCRIPTION_LIMIT, TOTAL_LIMIT - overhead)
+    if len(description) <= limit:
+        clamped = clamp(data)
+        if clamped == data:  # Already within limits
+            return [embed], files
+        return [discord.Embed.from_dict(clamped)], files
+
+    chunks = split_text(description, min(DESCRIPTION_LIMIT, TOTAL_LIMIT))
+    embeds = []
+    for index, chunk in enumerate(chunks):
+        first = index == 0
+        last = index == len(chunks) - 1
+        part = {"type": "rich", "description": chunk}
+        if "color" in data:
+            part["color"] = data["color"]
+        if first:  # Header goes on the first embed
+            for key in ("title", "url", "author", "thumbnail"):
+                if key in data:
+                    part[key] = data[key]
+        if last:  # Everything else goes on the last embed
+            for key in ("fields", "footer", "timestamp", "image"):
+                if key in data:
+                    part[key] = data[key]
+        embeds.append(discord.Embed.from_dict(clamp(part)))
+    return embeds, files
+
+
+def pack(
+    items,
+    *,
+    max_chars=TOTAL_LIMIT,
+    max_embeds=EMBEDS_PER_MESSAGE,
+    max_files=FILES_PER_MESSAGE,
+):
+    """
+    Next-fit packing of queued embeds and files into messages.
+    Items keep their order and a message is closed as soon
+    as the next embed doesn't fit in it. Files go in the
+    message of the embed queued before them.
+    Returns a list of (embeds, files), one per message.
+    """
+    messages = []
+    size = 0  # Characters in the last message
+    for item in items:
+        if isinstance(item, discord.Embed):
+            length = len(item)
+            if (
+                not messages
+                or len(messages[-1][0]) >= max_embeds
+                or size + length > max_chars
+            ):
+                messages.append(([], []))
+                size = 0
+            messages[-1][0].append(item)
+            size += length
+        else:
+            if not messages or len(messages[-1][1]) >= max_files:
+                messages.append(([], []))
+                size = 0
+            messages[-1][1].append(item)
+    return messages
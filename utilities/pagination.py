@@ -1,5 +1,6 @@
 import asyncio
 from collections import namedtuple
+from collections.abc import Sequence
 
 import discord
 from discord.ext import menus
@@ -120,6 +121,30 @@ class MainMenu(menus.MenuPages):
             pass
 
 
+class LazyEntries(Sequence):
+    """
+    Entries for a page source that are only built
+    when their page is shown. getter(index) returns
+    the entry at that index.
+    """
+
+    def __init__(self, length, getter):
+        self.length = length
+        self.getter = getter
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.getter(i) for i in range(self.length)[index]]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("entry index out of range")
+        return self.getter(index)
+
+
 class FieldPageSource(menus.ListPageSource):
     """A page source that requires (field_name, field_value) tuple items."""
 
@@ -0,0 +1,164 @@
+import discord
+
+from utilities import checks
+
+EMPTY = frozenset()
+
+
+class PermissionResolver:
+    """
+    Compiled ignore and disabled command lists.
+    Ignored entities are kept as one frozenset per server
+    and disabled commands as an index from command name
+    to the frozenset of entities it is disabled for,
+    so a member's roles are checked with one set
+    intersection no matter how many roles they have.
+    """
+
+    def __init__(self):
+        self.ignored = {}  # server_id: frozenset of entity_ids
+        self.disabled = {}  # entity_id: frozenset of command names
+        self.disabled_for = {}  # command name: frozenset of entity_ids
+
+    ############
+    ## Ignore ##
+    ############
+
+    def load_ignored(self, records):
+        self.ignored = {
+            record["server_id"]: frozenset(record["entities"]) for record in records
+        }
+
+    def get_ignored(self, guild_id):
+        return self.ignored.get(guild_id, EMPTY)
+
+    def set_ignored(self, guild_id, entity_ids):
+        ignored = frozenset(entity_ids)
+        if ignored:
+            self.ignored[guild_id] = ignored
+        else:
+            self.ignored.pop(guild_id, None)
+
+    def ignore(self, guild_id, entity_ids):
+        self.set_ignored(guild_id, self.get_ignored(guild_id).union(entity_ids))
+
+    def unignore(self, guild_id, entity_ids):
+        self.set_ignored(guild_id, self.get_ignored(guild_id).difference(entity_ids))
+
+    def clear_ignored(self, guild_id):
+        self.ignored.pop(guild_id, None)
+
+    ##############
+    ## Commands ##
+    ##############
+
+    def load_disabled(self, records):
+        self.disabled = {
+            record["entity_id"]: frozenset(record["commands"]) for record in records
+        }
+        index = {}
+        for entity_id, commands in self.disabled.items():
+            for command in commands:
+                index.setdefault(command, set()).add(entity_id)
+        self.disabled_for = {
+            command: frozenset(entity_ids) for command, entity_ids in index.items()
+        }
+
+    def get_disabled(self, entity_id):
+        return self.disabled.get(entity_id, EMPTY)
+
+    def set_disabled(self, entity_id, commands):
+        old = self.get_disabled(entity_id)
+        new = frozenset(commands)
+        if new:
+            self.disabled[entity_id] = new
+        else:
+            self.disabled.pop(entity_id, None)
+
+        for command in new - old:
+            self.disabled_for[command] = self.disabled_for.get(command, EMPTY) | {
+                entity_id
+            }
+        for command in old - new:
+            entity_ids = self.disabled_for.get(command, EMPTY) - {entity_id}
+            if entity_ids:
+                self.disabled_for[command] = entity_ids
+            else:
+                self.disabled_for.pop(command, None)
+
+    def disable(self, entity_id, commands):
+        self.set_disabled(entity_id, self.get_disabled(entity_id).union(commands))
+
+    def enable(self, entity_id, commands):
+        self.set_disabled(entity_id, self.get_disabled(entity_id).difference(commands))
+
+    ###############
+    ## Resolving ##
+    ###############
+
+    @staticmethod
+    def is_immune(ctx):
+        if ctx.guild is None:
+            return True  # Do not restrict in DMs.
+
+        if checks.is_admin(ctx):
+            return True  # Contibutors are immune.
+
+        if isinstance(ctx.author, discord.Member):
+            if ctx.author.guild_permissions.manage_guild:
+                return True  # Manage guild is immune.
+
+        return False
+
+    @staticmethod
+    def get_roles(ctx):
+        return getattr(ctx.author, "_roles", ())
+
+    def is_ignored(self, ctx):
+        """
+        Check if the channel, author, or
+        any of the author's roles are ignored.
+        """
+        ignored = self.ignored.get(ctx.guild.id)
+        if not ignored:
+            return False
+
+        if ctx.guild.id in ignored:
+            return True  # Everyone is ignored, @everyone shares the server ID.
+
+        if ctx.channel.id in ignored:
+            return True  # Channel is ignored.
+
+        if ctx.author.id in ignored:
+            return True  # User is ignored.
+
+        return not ignored.isdisjoint(self.get_roles(ctx))  # Role is ignored.
+
+    def is_disabled(self, ctx, command):
+        """
+        Check if a command is disabled for the server,
+        channel, author, or any of the author's roles.
+        """
+        entity_ids = self.disabled_for.get(str(command))
+        if not entity_ids:
+            return False
+
+        if ctx.guild.id in entity_ids:
+            return True  # Disabled for the whole server.
+
+        if ctx.channel.id in entity_ids:
+            return True  # Disabled for the channel
+
+        if ctx.author.id in entity_ids:
+            return True  # Disabled for the user
+
+        return not entity_ids.isdisjoint(self.get_roles(ctx))  # Disabled for the role
+
+    def is_blocked(self, ctx, command):
+        """
+        Check if a command cannot be run in a context,
+        either from ignores or disabled commands.
+        """
+        if self.is_immune(ctx):
+            return False
+        return self.is_ignored(ctx) or self.is_disabled(ctx, command)
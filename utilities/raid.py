@@ -0,0 +1,283 @@
+import sys
+import json
+import zlib
+
+from collections import deque, namedtuple
+
+Trigger = namedtuple(
+    "Trigger",
+    [
+        "kind",
+        "guild_id",
+        "user_ids",
+        "messages",
+        "raid",  # False when only the users in the trigger are handled
+    ],
+)
+Thresholds = namedtuple(
+    "Thresholds",
+    [
+        "joins",  # Joins per join_window
+        "join_window",
+        "messages",  # Messages per user per message_window
+        "message_window",
+        "duplicates",  # Identical messages per duplicate_window
+        "duplicate_window",
+        "mentions",  # Mentions per user per mention_window
+        "mention_window",
+        "raid_duration",  # Seconds raid mode stays on after a trigger
+        "duplicate_length",  # Shortest message counted as a duplicate
+        "account_age",  # Accounts younger than this are newcomers
+        "member_age",  # So are members who joined more recently
+    ],
+)
+DEFAULT_THRESHOLDS = Thresholds(10, 60, 8, 5, 5, 15, 15, 10, 600, 10, 604800, 86400)
+
+RECENT_MESSAGES = 500  # Messages kept per server for bulk actions
+MAX_HASHES = 1000  # Distinct message hashes tracked per server
+RAID_USERS = 2  # Distinct users sending duplicates before it counts as a raid
+
+
+class SlidingWindow:
+    """
+    Ring buffer of (timestamp, weight) pairs
+    with a running total of the weights
+    inside the last window seconds.
+    """
+
+    __slots__ = ("window", "events", "total")
+
+    def __init__(self, window, maxlen=256):
+        self.window = window
+        self.events = deque(maxlen=maxlen)
+        self.total = 0
+
+    def expire(self, now):
+        cutoff = now - self.window
+        while self.events and self.events[0][0] <= cutoff:
+            self.total -= self.events.popleft()[1]
+
+    def add(self, now, weight=1):
+        self.expire(now)
+        if len(self.events) == self.events.maxlen:
+            self.total -= self.events[0][1]  # The deque is about to drop it
+        self.events.append((now, weight))
+        self.total += weight
+        return self.total
+
+    def count(self, now):
+        self.expire(now)
+        return self.total
+
+
+class GuildRaidState:
+    def __init__(self, thresholds):
+        self.thresholds = thresholds
+        self.joins = SlidingWindow(thresholds.join_window)
+        self.joined = deque(maxlen=RECENT_MESSAGES)  # (timestamp, user_id)
+        self.users = {}  # user_id: SlidingWindow of messages
+        self.mentions = {}  # user_id: SlidingWindow of mentions
+        self.hashes = {}  # content hash: SlidingWindow of messages
+        self.recent = deque(maxlen=RECENT_MESSAGES)
+        self.raid_until = 0.0
+        self.raiders = set()
+
+    def in_raid(self, now):
+        if self.raid_until and now >= self.raid_until:
+            self.raid_until = 0.0
+            self.raiders.clear()
+        return self.raid_until > now
+
+    def prune(self, now):
+        for store in (self.users, self.mentions, self.hashes):
+            for key in [k for k, w in store.items() if not w.count(now)]:
+                del store[key]
+        # Still too many live hashes, drop the oldest.
+        while len(self.hashes) > MAX_HASHES:
+            del self.hashes[next(iter(self.hashes))]
+
+    @property
+    def idle(self):
+        return not (self.users or self.mentions or self.hashes or self.raid_until)
+
+
+class RaidEngine:
+    """
+    Sliding window raid detection.
+    Events are fed in with their own timestamps so the
+    same engine runs live or against a recorded trace.
+    A Trigger describes the users and messages that should
+    be handled with bulk actions. Only triggers spread over
+    several users (mass joins or duplicates from different
+    accounts) put the server into raid mode. A single user
+    flooding only has their own messages handled.
+    """
+
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS):
+        self.thresholds = thresholds
+        self.guilds = {}
+
+    def get_state(self, guild_id):
+        state = self.guilds.get(guild_id)
+        if state is None:
+            state = self.guilds[guild_id] = GuildRaidState(self.thresholds)
+        return state
+
+    def in_raid(self, guild_id, now):
+        state = self.guilds.get(guild_id)
+        return state is not None and state.in_raid(now)
+
+    def is_newcomer(self, created_at, joined_at, now):
+        """
+        Returns True if an account or its membership is new.
+        Only newcomers count toward duplicate messages,
+        so regulars repeating each other isn't a raid.
+        """
+        if now - created_at < self.thresholds.account_age:
+            return True
+        return joined_at is not None and now - joined_at < self.thresholds.member_age
+
+    def prune(self, now):
+        """Drops expired windows and servers with nothing left to track."""
+        for guild_id, state in list(self.guilds.items()):
+            state.prune(now)
+            if not state.in_raid(now) and state.idle and not state.joins.count(now):
+                del self.guilds[guild_id]
+
+    def is_raider(self, guild_id, user_id, now):
+        state = self.guilds.get(guild_id)
+        return state is not None and state.in_raid(now) and user_id in state.raiders
+
+    def start_raid(self, state, now, user_ids):
+        state.raid_until = now + self.thresholds.raid_duration
+        state.raiders.update(user_ids)
+
+    def on_join(self, guild_id, user_id, now):
+        state = self.get_state(guild_id)
+        state.joined.append((now, user_id))
+        count = state.joins.add(now)
+        if state.in_raid(now):  # Joined during a raid
+            state.raiders.add(user_id)
+            return None
+        if count < self.thresholds.joins:
+            return None
+
+        cutoff = now - self.thresholds.join_window
+        user_ids = {uid for ts, uid in state.joined if ts > cutoff}
+        self.start_raid(state, now, user_ids)
+        return Trigger("joins", guild_id, user_ids, [], True)
+
+    def on_message(
+        self,
+        guild_id,
+        channel_id,
+        user_id,
+        message_id,
+        content,
+        mentions,
+        now,
+        *,
+        newcomer=True,
+    ):
+        state = self.get_state(guild_id)
+        thresholds = self.thresholds
+        digest = None
+        if newcomer and len(content.strip()) >= thresholds.duplicate_length:
+            digest = zlib.crc32(content.lower().encode("utf-8"))
+        state.recent.append((now, channel_id, message_id, user_id, digest))
+
+        window = state.users.get(user_id)
+        if window is None:
+            window = state.users[user_id] = SlidingWindow(thresholds.message_window)
+        kind = None
+        if window.add(now) >= thresholds.messages:
+            kind = "messages"
+
+        if mentions:
+            window = state.mentions.get(user_id)
+            if window is None:
+                window = state.mentions[user_id] = SlidingWindow(
+                    thresholds.mention_window
+                )
+            if window.add(now, mentions) >= thresholds.mentions:
+                kind = "mentions"
+
+        if digest is not None:
+            window = state.hashes.get(digest)
+            if window is None:
+                window = state.hashes[digest] = SlidingWindow(
+                    thresholds.duplicate_window
+                )
+            if window.add(now) >= thresholds.duplicates:
+                kind = "duplicates"
+
+        if len(state.users) > RECENT_MESSAGES or len(state.hashes) > MAX_HASHES:
+            state.prune(now)
+
+        if state.in_raid(now) and user_id in state.raiders:
+            # Already handled, just clean up after them.
+            return Trigger(
+                "raider", guild_id, {user_id}, [(channel_id, message_id)], False
+            )
+        if kind is None:
+            return None
+
+        if kind == "duplicates":
+            cutoff = now - thresholds.duplicate_window
+            matched = [r for r in state.recent if r[0] > cutoff and r[4] == digest]
+        else:
+            cutoff = now - max(thresholds.message_window, thresholds.mention_window)
+            matched = [r for r in state.recent if r[0] > cutoff and r[3] == user_id]
+
+        user_ids = {r[3] for r in matched}
+        raid = kind == "duplicates" and len(user_ids) >= RAID_USERS
+        if raid:
+            self.start_raid(state, now, user_ids)
+        messages = [(r[1], r[2]) for r in matched]
+        return Trigger(kind, guild_id, user_ids, messages, raid)
+
+
+def replay(events, engine=None):
+    """
+    Feeds a recorded trace through the engine.
+    Each event is a dict with a "type" of "join" or "message",
+    a "time" in seconds and the fields the handler takes.
+    Returns the list of triggers in order.
+    """
+    engine = engine or RaidEngine()
+    triggers = []
+    for event in events:
+        if event["type"] == "join":
+            trigger = engine.on_join(
+                event["guild_id"], event["user_id"], event["time"]
+            )
+        else:
+            trigger = engine.on_message(
+                event["guild_id"],
+                event["channel_id"],
+                event["user_id"],
+                event["message_id"],
+                event.get("content", ""),
+                event.get("mentions", 0),
+                event["time"],
+                newcomer=event.get("newcomer", True),
+            )
+        if trigger:
+            triggers.append((event["time"], trigger))
+    return triggers
+
+
+def load_trace(path):
+    """Reads a trace file with one JSON event per line."""
+    with open(path, "r", encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+if __name__ == "__main__":
+    # python -m utilities.raid trace.jsonl
+    for timestamp, trigger in replay(load_trace(sys.argv[1])):
+        print(
+            f"{timestamp:.3f} {trigger.kind} guild={trigger.guild_id} "
+            f"users={len(trigger.user_ids)} messages={len(trigger.messages)} "
+            f"raid={trigger.raid}"
+        )
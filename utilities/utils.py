@@ -556,11 +556,15 @@ class CachedHistoryIterator(HistoryIterator):
             channel = await self.messageable._get_channel()
             self.channel = channel
 
-        for msg in reversed(self.channel._state._messages):
-            if (
-                msg.channel.id == self.channel.id
-                and self.limit > 0
-                and (not self.before or msg.id < self.before.id)
+        cached = self.channel._state._messages
+        if not cached:
+            return  # The message cache is disabled or empty
+
+        for msg in reversed(cached):
+            if self.limit <= 0 or (self.after and msg.id <= self.after.id):
+                break
+            if msg.channel.id == self.channel.id and (
+                not self.before or msg.id < self.before.id
             ):
                 self.limit -= 1
                 self.before = discord.Object(id=msg.id)
@@ -0,0 +1,176 @@
+import time
+import asyncio
+import discord
+import logging
+
+from collections import deque
+
+from utilities import utils
+from utilities import packer
+
+log = logging.getLogger("INFO_LOGGER")
+
+PACK_WINDOW = 50  # Max queued items considered for one round of packing
+MAX_CONCURRENT_SENDS = 8  # Max webhook requests in flight across all guilds
+
+
+class WebhookSender:
+    """
+    Owns the queue for a single webhook.
+    Each webhook has its own rate limit bucket on
+    discord's side, so each sender drains its own
+    queue without waiting on any other webhook.
+    """
+
+    def __init__(self, dispatcher, webhook):
+        self.dispatcher = dispatcher
+        self.webhook = webhook
+
+        self.pending = deque()
+        self.ready = deque()  # Packed (embeds, files) waiting to be sent
+        self.event = asyncio.Event()
+
+        self.sent = 0  # Messages successfully posted
+        self.latency = 0.0  # Seconds taken by the last send
+        self.total_latency = 0.0  # Used to compute the average send time
+
+        self.task = dispatcher.loop.create_task(self.runner())
+
+    @property
+    def depth(self):
+        return len(self.pending) + sum(len(e) + len(f) for e, f in self.ready)
+
+    @property
+    def average_latency(self):
+        if not self.sent:
+            return 0.0
+        return self.total_latency / self.sent
+
+    def put(self, item):
+        self.pending.append(item)
+        self.event.set()
+
+    def stop(self):
+        self.task.cancel()
+        self.pending.clear()
+        self.ready.clear()
+
+    def next_batch(self):
+        """
+        Returns the next (embeds, files) message to send.
+        Queued embeds are packed in order into as few
+        messages as possible, each file staying in the
+        message of the embed it belongs to.
+        """
+        if not self.ready:
+            items = []
+            while self.pending and (
+                len(items) < PACK_WINDOW
+                # Don't leave an embed's files for the next round.
+                or not isinstance(self.pending[0], discord.Embed)
+            ):
+                items.append(self.pending.popleft())
+            self.ready.extend(packer.pack(items))
+        if self.ready:
+            return self.ready.popleft()
+        return [], []
+
+    async def runner(self):
+        try:
+            while True:
+                if not self.pending and not self.ready:
+                    self.event.clear()
+                    await self.event.wait()
+
+                embeds, files = self.next_batch()
+                if not embeds and not files:
+                    continue
+
+                async with self.dispatcher.semaphore:
+                    st = time.perf_counter()
+                    try:
+                        await self.webhook.send(
+                            embeds=embeds,
+                            files=files,
+                            username=self.dispatcher.username,
+                            avatar_url=self.dispatcher.avatar_url,
+                        )
+                    except discord.NotFound:  # Users manually deleted the webhook.
+                        self.pending.clear()
+                        self.ready.clear()
+                        continue
+                    except discord.HTTPException as e:
+                        log.warning(f"Webhook {self.webhook.id} send failed: {e}")
+                        continue
+                    except Exception as e:
+                        self.dispatcher.bot.dispatch(
+                            "error", "logging_error", tb=utils.traceback_maker(e)
+                        )
+                        continue
+
+                    self.latency = time.perf_counter() - st
+                    self.total_latency += self.latency
+                    self.sent += 1
+        except asyncio.CancelledError:
+            pass
+
+
+class WebhookDispatcher:
+    """
+    Fans queued embeds and files out to one sender task
+    per webhook. A global semaphore caps how many
+    webhook requests can be in flight at once.
+    """
+
+    def __init__(self, bot, concurrency=MAX_CONCURRENT_SENDS):
+        self.bot = bot
+        self.loop = bot.loop
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.senders = {}
+
+    @property
+    def username(self):
+        return f"{self.bot.user.name}-logger"
+
+    @property
+    def avatar_url(self):
+        return self.bot.user.display_avatar.url
+
+    def get_sender(self, webhook):
+        sender = self.senders.get(webhook.id)
+        if sender is None:
+            sender = WebhookSender(self, webhook)
+            self.senders[webhook.id] = sender
+        return sender
+
+    def put(self, webhook, item):
+        sender = self.get_sender(webhook)
+        if isinstance(item, discord.Embed):
+            # Split or truncate oversized embeds before they are queued.
+            embeds, files = packer.fit(item)
+            for embed in embeds:
+                sender.put(embed)
+            for file in files:
+                sender.put(file)
+        else:
+            sender.put(item)
+
+    def remove(self, webhook):
+        sender = self.senders.pop(webhook.id, None)
+        if sender:
+            sender.stop()
+
+    def close(self):
+        for sender in self.senders.values():
+            sender.stop()
+        self.senders.clear()
+
+    def stats(self, webhook):
+        """
+        Returns (queue depth, last latency, average latency, messages sent)
+        for the sender of a webhook.
+        """
+        sender = self.senders.get(webhook.id)
+        if sender is None:
+            return (0, 0.0, 0.0, 0)
+        return (sender.depth, sender.latency, sender.average_latency, sender.sent)
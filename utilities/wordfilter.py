@@ -0,0 +1,98 @@
+import re
+
+# Leetspeak substitutions, same as better_profanity's character mapping.
+CHARS_MAPPING = {
+    "a": ("a", "@", "*", "4"),
+    "i": ("i", "*", "l", "1"),
+    "o": ("o", "*", "0", "@"),
+    "u": ("u", "*", "v"),
+    "v": ("v", "*", "u"),
+    "l": ("l", "1"),
+    "e": ("e", "*", "3"),
+    "s": ("s", "$", "5"),
+    "t": ("t", "7"),
+}
+
+
+def char_pattern(char):
+    if char.isspace():
+        return r"\s+"
+    variants = CHARS_MAPPING.get(char)
+    if not variants:
+        return re.escape(char)
+    return "[" + "".join(re.escape(v) for v in variants) + "]"
+
+
+def trie_pattern(node):
+    """
+    Builds a regex from a character trie so that
+    words sharing a prefix share a single branch.
+    """
+    alternatives = [
+        char_pattern(char) + trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+    if not alternatives:
+        return ""
+    if len(alternatives) == 1 and "" not in node:
+        return alternatives[0]
+    pattern = "(?:" + "|".join(alternatives) + ")"
+    if "" in node:  # A word ends here, the rest is optional.
+        pattern += "?"
+    return pattern
+
+
+class WordFilter:
+    """
+    A compiled matcher for a server's filtered words.
+    All words and their leetspeak variants are folded into
+    one regex built from a trie, so checking a message is
+    a single scan instead of one scan per word.
+    """
+
+    def __init__(self, words):
+        self.words = tuple(words)
+        trie = {}
+        for word in self.words:
+            word = " ".join(word.lower().split())
+            if not word:
+                continue
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        pattern = trie_pattern(trie)
+        if pattern:
+            self.regex = re.compile(rf"(?<!\w){pattern}(?!\w)", re.IGNORECASE)
+        else:
+            self.regex = None
+
+    def search(self, content):
+        if self.regex is None:
+            return None
+        return self.regex.search(content)
+
+    def contains_profanity(self, content):
+        return self.search(content) is not None
+
+
+class FilterCache:
+    """
+    Compiled word filters per server. A filter is rebuilt
+    when the server's word list no longer matches the
+    list it was compiled from.
+    """
+
+    def __init__(self):
+        self.filters = {}
+
+    def get(self, guild_id, words):
+        wordfilter = self.filters.get(guild_id)
+        if wordfilter is None or wordfilter.words != tuple(words):
+            wordfilter = self.filters[guild_id] = WordFilter(words)
+        return wordfilter
+
+    def invalidate(self, guild_id):
+        self.filters.pop(guild_id, None)